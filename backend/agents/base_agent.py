@@ -1,17 +1,20 @@
 from abc import ABC, abstractmethod
 from backend.models.data_models import AgentState, Message
 from backend.mcp_server.mcp_server import MCPServer
+from backend.services.chat_stream import TokenStream
 
 class BaseAgent(ABC):
     def __init__(self, mcp_server: MCPServer):
         self.mcp_server = mcp_server
 
     @abstractmethod
-    async def process(self, user_input: str, state: AgentState) -> dict:
+    async def process(self, user_input: str, state: AgentState, stream: TokenStream = None) -> dict:
         """
         Process the user input and return a response dict containing:
         - response: str
         - next_agent: str (optional)
         - updated_context: dict (updates to state.context_variables)
+
+        With a `stream`, the LLM's response tokens are pushed to it as they arrive.
         """
         pass
@@ -2,14 +2,15 @@ from backend.agents.base_agent import BaseAgent
 from backend.models.data_models import AgentState
 from backend.models.signatures import EducationSignature
 from backend.mcp_server.mcp_server import MCPServer
+from backend.services.chat_stream import TokenStream
 
 class EducationAgent(BaseAgent):
     def __init__(self, mcp_server: MCPServer):
         super().__init__(mcp_server)
 
-    async def process(self, user_input: str, state: AgentState) -> dict:
+    async def process(self, user_input: str, state: AgentState, stream: TokenStream = None) -> dict:
         # Call Gemini via MCP Server (handles history and profile injection)
-        result = await self.mcp_server.predict(EducationSignature, state, user_input=user_input)
+        result = await self.mcp_server.predict(EducationSignature, state, stream=stream, user_input=user_input)
         
         return {
             "response": result.response,
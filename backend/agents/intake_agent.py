@@ -2,12 +2,14 @@ from backend.agents.base_agent import BaseAgent
 from backend.models.data_models import AgentState
 from backend.models.signatures import IntakeSignature
 from backend.mcp_server.mcp_server import MCPServer
+from backend.services.chat_stream import TokenStream
+from backend.services.context_builder import SUMMARY_KEY
 
 class IntakeAgent(BaseAgent):
     def __init__(self, mcp_server: MCPServer):
         super().__init__(mcp_server)
 
-    async def process(self, user_input: str, state: AgentState) -> dict:
+    async def process(self, user_input: str, state: AgentState, stream: TokenStream = None) -> dict:
         # 1. Handle Resume/Fresh Choice
         if state.context_variables.get("pending_resume_choice"):
             print(f"IntakeAgent: Handling resume choice for user input: '{user_input}'")
@@ -22,6 +24,7 @@ class IntakeAgent(BaseAgent):
                 print("IntakeAgent: User wants a fresh start. Wiping conversation history.")
                 # We wipe history but keep the profile
                 state.conversation_history = state.conversation_history[-1:] # Keep only the current turn's setup
+                state.context_variables.pop(SUMMARY_KEY, None) # ...and forget the summary of the old turns
             
             return {
                 "response": "Understood. Let's dive in. How are you feeling about your health goals currently?",
@@ -54,7 +57,7 @@ class IntakeAgent(BaseAgent):
         
         # Call Gemini via MCP Server (handles history and profile injection)
         print(f"IntakeAgent: Calling LLM via MCP with input '{user_input}'...")
-        result = await self.mcp_server.predict(IntakeSignature, state, user_input=user_input)
+        result = await self.mcp_server.predict(IntakeSignature, state, stream=stream, user_input=user_input)
         print(f"IntakeAgent: LLM returned. Result: {result}")
         
         # Defensive access to result attributes
@@ -2,14 +2,15 @@ from backend.agents.base_agent import BaseAgent
 from backend.models.data_models import AgentState
 from backend.models.signatures import MotivationSignature
 from backend.mcp_server.mcp_server import MCPServer
+from backend.services.chat_stream import TokenStream
 
 class MotivationAgent(BaseAgent):
     def __init__(self, mcp_server: MCPServer):
         super().__init__(mcp_server)
 
-    async def process(self, user_input: str, state: AgentState) -> dict:
+    async def process(self, user_input: str, state: AgentState, stream: TokenStream = None) -> dict:
         # Call Gemini via MCP Server (handles history and profile injection)
-        result = await self.mcp_server.predict(MotivationSignature, state, user_input=user_input)
+        result = await self.mcp_server.predict(MotivationSignature, state, stream=stream, user_input=user_input)
         
         # Defensive access to all optional fields
         response_text = getattr(result, 'response', "I'm listening. Tell me more.")
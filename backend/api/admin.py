@@ -1,15 +1,16 @@
-from fastapi import APIRouter
+import json
+import time
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from typing import List, Dict
 from pydantic import BaseModel
 from backend.orchestrator.orchestrator import Orchestrator
+from backend.services import cohort
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
-# We need a way to access the orchestrator instance.
-# For now, we'll import it from main (circular import risk, but okay for MVP if structured right,
-# or better, dependency injection).
-# simplified: We will re-instantiate or share state via a singleton pattern in a real app.
-# For this mock, I'll just return mock data.
+# The orchestrator instance is shared via request.app.state.orchestrator (set in main.py),
+# which avoids a circular import of backend.main.
 
 class AgentConfig(BaseModel):
     name: str
@@ -31,8 +32,96 @@ async def get_agents():
     ]
 
 @router.get("/conversations", response_model=List[ConversationLog])
-async def get_conversations():
-    return [
-        ConversationLog(user_id="user_123", message_count=15, last_active="2025-10-26T10:00:00"),
-        ConversationLog(user_id="user_456", message_count=5, last_active="2025-10-26T09:30:00"),
-    ]
+async def get_conversations(request: Request, limit: int = 50):
+    # Fans out across every persistence shard and merges by last activity
+    persistence = request.app.state.orchestrator.persistence
+    return [ConversationLog(**row) for row in await persistence.list_conversations(limit)]
+
+@router.get("/shards")
+async def get_shards(request: Request):
+    """Per-shard users / messages / audit rows and file size."""
+    persistence = request.app.state.orchestrator.persistence
+    return await persistence.shard_summary()
+
+@router.post("/maintenance")
+async def run_maintenance(request: Request, full_vacuum: bool = False):
+    """Runs an archive / compaction / retention / vacuum pass now and returns its report."""
+    maintenance = request.app.state.orchestrator.maintenance
+    return await maintenance.run_once(full_vacuum=full_vacuum)
+
+@router.get("/roster")
+async def get_roster(request: Request):
+    """Shared patient roster: size, where it was loaded from, load time and memory."""
+    roster = request.app.state.orchestrator.roster
+    await roster.load_async()
+    return roster.stats
+
+
+@router.post("/roster/reload")
+async def reload_roster(request: Request):
+    """Re-reads the roster sheet now instead of waiting for the watcher; returns the diff."""
+    roster = request.app.state.orchestrator.roster
+    await roster.load_async()
+    diff = await roster.reload_async()
+    if diff is None:
+        return {"status": "unchanged", "stats": roster.stats}
+    return {"status": "reloaded", "added": diff["added"], "changed": diff["changed"],
+            "removed": diff["removed"], "stats": roster.stats}
+
+
+async def _cohort_store(request: Request):
+    # One store for the whole request, even if a hot reload swaps the roster meanwhile
+    return await request.app.state.orchestrator.roster.load_async()
+
+
+@router.get("/cohort")
+async def query_cohort(request: Request, q: str = "", limit: int = 50, offset: int = 0):
+    """Patients matching a cohort query (see backend.services.cohort), paginated."""
+    if not 1 <= limit <= 1000 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be 1-1000 and offset >= 0")
+    store = await _cohort_store(request)
+    started = time.perf_counter()
+    try:
+        result = cohort.page(store, q, limit=limit, offset=offset)
+    except cohort.CohortQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return result
+
+
+@router.get("/cohort/count")
+async def count_cohort(request: Request, q: str = ""):
+    store = await _cohort_store(request)
+    try:
+        return {"query": q, "total": cohort.count(store, q)}
+    except cohort.CohortQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/cohort/stream")
+async def stream_cohort(request: Request, q: str = ""):
+    """Every matching patient as newline-delimited JSON, for exports and outreach batches."""
+    store = await _cohort_store(request)
+    try:
+        cohort.parse_query(q)  # fail with a 400 before the response starts
+    except cohort.CohortQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def lines():
+        for chunk in cohort.stream(store, q):
+            yield "".join(json.dumps(record) + "\n" for record in chunk)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/cohort/groups")
+async def group_cohort(request: Request, by: str, q: str = "", metrics: str = ""):
+    """Counts (and mean/min/max of the comma-separated `metrics`) per value of `by`."""
+    store = await _cohort_store(request)
+    started = time.perf_counter()
+    try:
+        result = cohort.group_by(store, q, by, [m.strip() for m in metrics.split(",") if m.strip()])
+    except cohort.CohortQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return result
@@ -1,8 +1,12 @@
+import json
+import os
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from backend.orchestrator.orchestrator import Orchestrator
 from backend.models.data_models import OrchestratorRequest, OrchestratorResponse, PatientProfile
+from backend.services import risk_scoring
 
 app = FastAPI()
 
@@ -23,6 +27,7 @@ app.add_middleware(
 )
 
 orchestrator = Orchestrator()
+app.state.orchestrator = orchestrator # Shared with routers (e.g. admin) via request.app.state
 
 @app.on_event("startup")
 async def startup_event():
@@ -35,6 +40,17 @@ async def startup_event():
     # Initialize Database
     await orchestrator.persistence.init_db()
     print("Backend: Persistence database initialized.")
+    await orchestrator.prewarm_sessions()
+    await orchestrator.roster.load_async() # Off the event loop, before the first chat needs it
+    orchestrator.roster.start_watching() # Hot reload when the sheet is edited
+    orchestrator.maintenance.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Drain buffered state saves and release pooled SQLite connections
+    await orchestrator.roster.stop_watching()
+    await orchestrator.shutdown()
+    print("Backend: Pending state saves flushed, persistence connections closed.")
 
 # --- System Configuration Endpoints ---
 
@@ -87,15 +103,44 @@ async def get_config_info():
     Observability Endpoint: Returns currently active LLM stack and configuration.
     Use this to verify which API keys/Providers are enabled and their priority order.
     """
-    lms = orchestrator.mcp_server.lms
+    mcp = orchestrator.mcp_server
+    lms = mcp.lms
     stack_info = [f"{getattr(lm, 'provider_name', 'Unknown')} ({getattr(lm, 'model', 'Unknown')})" for lm in lms]
+    providers = [getattr(lm, 'provider_name', f'Provider_{i}') for i, lm in enumerate(lms)]
     
     return {
         "status": "active",
         "llm_priority_stack": stack_info,
         "primary_provider": stack_info[0] if stack_info else "None",
         "failover_enabled": len(stack_info) > 1,
-        "brain_connectivity": "Online" if stack_info else "Offline"
+        "brain_connectivity": "Online" if stack_info else "Offline",
+        # Circuit breaker state and EWMA latency per provider, and the order the next call would try
+        "provider_health": mcp.health.snapshot(),
+        "routing_order": mcp.health.route(providers) if providers else [],
+    }
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """
+    Observability Endpoint: Cache, write-behind and connection pool counters.
+    """
+    return {
+        "session_cache": orchestrator.states.stats,
+        "turn_locks": orchestrator.turn_locks.stats,
+        "write_behind": {**orchestrator.write_buffer.stats, "pending": len(orchestrator.write_buffer)},
+        "audit_sink": {**orchestrator.mcp_server.audit.stats, "pending": len(orchestrator.mcp_server.audit)},
+        "response_cache": {**orchestrator.mcp_server.response_cache.stats, "size": len(orchestrator.mcp_server.response_cache)},
+        "llm_providers": orchestrator.mcp_server.provider_limits.stats,
+        # Client-side quota per key: queue depth and time spent waiting for quota
+        "llm_quota": orchestrator.mcp_server.rate_limits.stats,
+        # Extra upstream calls spent on hedging, and how often they paid off
+        "hedging": {**orchestrator.mcp_server.hedging.stats, "hedge_rate": round(orchestrator.mcp_server.hedging.hedge_rate, 3)},
+        "persistence_pool": orchestrator.persistence.pool_stats(),
+        "roster": orchestrator.roster.stats,
+        "chat_stream": orchestrator.stream_stats.stats,
+        "context": orchestrator.mcp_server.context.stats,
+        "profile_context": orchestrator.mcp_server.profiles.stats,
+        "maintenance": {**orchestrator.maintenance.stats, "last_report": orchestrator.maintenance.last_report},
     }
 
 # --- Chat Endpoints ---
@@ -124,42 +169,75 @@ async def chat(request: OrchestratorRequest):
             suggested_actions=[] # TODO: Add actions support
         )
     except Exception as e:
-        import traceback
-        full_trace = traceback.format_exc()
-        error_type = type(e).__name__
-        error_msg = str(e) or "No message"
-        print(f"\n--- CHAT ERROR ---\nType: {error_type}\nMessage: {error_msg}\n{full_trace}\n-------------------")
-        
-        # Friendly error handling for Rate Limits
-        if "429" in error_msg or "RateLimitError" in error_type or "Quota exceeded" in error_msg:
-            detail_msg = "I'm currently experiencing high traffic (Rate Limit Exceeded). Please try again in a minute."
-            raise HTTPException(status_code=429, detail=detail_msg)
-            
-        # Ensure detail is a string to avoid "Error: None" or similar serializations
-        detail_msg = f"{error_type}: {error_msg}"
-        raise HTTPException(status_code=500, detail=detail_msg)
+        status_code, detail_msg = _chat_error(e)
+        raise HTTPException(status_code=status_code, detail=detail_msg)
 
-from backend.services.data_loader import DataLoader
-import os
+@app.post("/api/chat/stream")
+async def chat_stream(request: OrchestratorRequest):
+    """
+    /api/chat as Server-Sent Events, so the reply shows while it is generated:
+    - token: {"text"} the next piece of the response
+    - reset: {} drop the text so far, a fallback provider is answering afresh
+    - done:  {"response", "current_agent", "ttft_ms", "total_ms"} the turn is saved
+    - error: {"status_code", "detail"} the turn failed
+    """
+    async def events():
+        try:
+            async for event in orchestrator.stream_request(request.user_id, request.user_input):
+                kind = event.pop("type")
+                yield f"event: {kind}\ndata: {json.dumps(event, default=str)}\n\n"
+        except Exception as e:
+            status_code, detail_msg = _chat_error(e)
+            yield f"event: error\ndata: {json.dumps({'status_code': status_code, 'detail': detail_msg})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
-# Initialize data loader (assuming file is in data/ or root)
-# Adjust path as necessary. For now, using a relative path assuming execution from root
-# Adjust path as necessary. Now in backend/data/
-# Using absolute path logic similar to orchestrator or relative to this file
-data_path = os.path.join(os.path.dirname(__file__), "data", "PREVENT_Inform_Table_V2 (2).xlsx")
-# Fallback hardcoded if needed, but relative is safer now
-EXCEL_PATH = data_path 
-data_loader = DataLoader(EXCEL_PATH)
+def _chat_error(e: Exception):
+    """Logs a failed chat turn; returns the (status_code, detail) to report."""
+    import traceback
+    full_trace = traceback.format_exc()
+    error_type = type(e).__name__
+    error_msg = str(e) or "No message"
+    print(f"\n--- CHAT ERROR ---\nType: {error_type}\nMessage: {error_msg}\n{full_trace}\n-------------------")
+    
+    # Friendly error handling for Rate Limits
+    if "429" in error_msg or "RateLimitError" in error_type or "Quota exceeded" in error_msg:
+        return 429, "I'm currently experiencing high traffic (Rate Limit Exceeded). Please try again in a minute."
+        
+    # Ensure detail is a string to avoid "Error: None" or similar serializations
+    return 500, f"{error_type}: {error_msg}"
+
+# The roster is shared with the orchestrator (one load per process)
+roster = orchestrator.roster
 
 @app.get("/api/patient/lookup", response_model=PatientProfile)
 async def lookup_patient(name: str):
-    profile = data_loader.get_patient_by_name(name)
+    await roster.load_async()
+    profile = roster.get_patient_by_name(name)
     if not profile:
         raise HTTPException(status_code=404, detail="Patient not found")
     
     # Returning profile directly
     return profile
 
+@app.get("/api/patient/search")
+async def search_patients(q: str, limit: int = 20, offset: int = 0):
+    """Ranked patient candidates for type-ahead / typo-tolerant name search."""
+    if not 1 <= limit <= 100 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be 1-100 and offset >= 0")
+    await roster.load_async()
+    return roster.search_patients(q, limit=limit, offset=offset)
+
+@app.get("/api/patient/{user_id}/risk")
+async def patient_risk(user_id: str):
+    """Risk score breakdown; uses the live session's profile when there is one, else the roster's."""
+    state = orchestrator.states.peek(user_id) or orchestrator.write_buffer.pending(user_id)
+    profile = state.patient_profile if state is not None else (await roster.load_async()).get(user_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return risk_scoring.breakdown(profile)
+
 from backend.api.admin import router as admin_router
 app.include_router(admin_router)
 
@@ -174,7 +252,7 @@ async def get_state_debug(user_id: str):
         "user_id": user_id,
         "current_agent": state.current_agent,
         "current_stage": state.patient_profile.current_stage,
-        "history_count": len(state.conversation_history)
+        "history_count": state.total_messages
     }
 
 @app.get("/health")
@@ -1,6 +1,8 @@
+import asyncio
 import dspy
 import json
 import logging
+import os
 import time
 from typing import Any, Dict, List, Type
 
@@ -12,7 +14,16 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("MCPServer")
 
 from backend.services.persistence import AsyncPersistence
+from backend.services.audit_sink import AuditSink
+from backend.services.chat_stream import TokenStream
+from backend.services.context_builder import ContextBuilder
+from backend.services.context_projection import PROFILE_INPUTS, ProfileProjector
+from backend.services.hedging import HedgePolicy
 from backend.services.llm_config import get_lm_stack
+from backend.services.provider_health import ProviderHealth
+from backend.services.provider_limits import ProviderLimits
+from backend.services.rate_limits import ClientRateLimitError, RateLimits
+from backend.services.response_cache import ResponseCache
 
 class MCPServer:
     """
@@ -20,50 +31,240 @@ class MCPServer:
     Acts as a centralized interface for LLM calls with automated context injection and resilience.
     """
 
-    def __init__(self):
-        self.persistence = AsyncPersistence()
+    def __init__(self, persistence: AsyncPersistence = None):
+        self.persistence = persistence or AsyncPersistence()
+        self.audit = AuditSink(self.persistence) # "The Receipt": every LLM call is logged
         self.lms = get_lm_stack()
         self.predictor_cache = {} # Cache for dspy.Predict instances
+        self.response_cache = ResponseCache() # Opt-in: identical requests skip the LLM round-trip
+        self.provider_limits = ProviderLimits() # Max concurrent calls per provider
+        self.rate_limits = RateLimits() # Requests/tokens per minute per provider key, queued within quota
+        self.health = ProviderHealth() # Circuit breakers + latency-aware routing
+        self.hedging = HedgePolicy() # Opt-in: race a slow call against the next healthy provider
+        self.context = ContextBuilder(load_messages=self.persistence.load_message_range,
+                                      load_summary=self.persistence.load_summary) # History within a token budget + rolling summary of older turns
+        self.profiles = ProfileProjector() # Per-signature profile fields, serialized once per profile change
+        self.call_timeout = float(os.getenv("ANTIGRAVITY_LLM_TIMEOUT_S", "60"))
         logger.info(f"MCP Server initialized with {len(self.lms)} LMs available for failover.")
         logger.info("MCP Server initialized with Research Auditing.")
 
-    async def predict(self, signature: Type[dspy.Signature], state: AgentState, **kwargs) -> Any:
+    async def predict(self, signature: Type[dspy.Signature], state: AgentState, stream: TokenStream = None, **kwargs) -> Any:
         """
         Resilient Prediction: Loops through the LM stack until success.
         Handles RateLimits by failing over to secondary/tertiary/OpenAI keys.
+        With a `stream`, the `response` field's tokens are pushed to it as they arrive.
         """
-        history_str = "\n".join([f"{m.role}: {m.content}" for m in state.conversation_history[-8:]])
-        profile_json = state.patient_profile.model_dump_json()
-        
         inputs = kwargs.copy()
-        if "history" in signature.input_fields: inputs["history"] = history_str
-        if "user_profile" in signature.input_fields: inputs["user_profile"] = profile_json
+        if "history" in signature.input_fields: inputs["history"] = self.context.build(signature.__name__, state)
+        for field in PROFILE_INPUTS:
+            if field in signature.input_fields: inputs[field] = self.profiles.project(signature.__name__, state.patient_profile)
 
         if not self.lms:
             print("MCP: No LMs in cache. Fetching from config...")
             self.lms = get_lm_stack()
 
+        if not self.response_cache.enabled_for(signature.__name__):
+            return await self._predict_upstream(signature, state, inputs, stream)
+
+        model = ",".join(str(getattr(lm, 'model', 'Unknown')) for lm in self.lms)
+        key = self.response_cache.key(signature.__name__, getattr(signature, "instructions", ""), model, inputs)
+        started = time.perf_counter()
+        result, how = await self.response_cache.get_or_call(
+            key, lambda: self._predict_upstream(signature, state, inputs, stream)
+        )
+        if how != "miss":
+            # Still one receipt per answered turn; the upstream call that produced it was audited already
+            print(f"MCP CACHE {how.upper()}: {signature.__name__}")
+            await self.audit.record(
+                user_id=state.patient_profile.user_id,
+                agent_name=state.current_agent,
+                signature_name=signature.__name__,
+                prompt_input=inputs,
+                response_output=result,
+                model_name=model,
+                provider="Response Cache",
+                latency_ms=(time.perf_counter() - started) * 1000,
+            )
+        return result
+
+    async def _predict_upstream(self, signature: Type[dspy.Signature], state: AgentState, inputs: Dict[str, Any],
+                                stream: TokenStream = None) -> Any:
+        """
+        The failover loop (ordered and filtered by provider health, spilling
+        over to the next key when one is out of quota): one real LLM call, audited.
+        Streamed calls are never hedged: two providers can't write to one stream.
+        """
         print(f"MCP: Starting failover loop for {signature.__name__}. Active providers: {len(self.lms)}")
 
+        providers = {getattr(lm, 'provider_name', f'Provider_{i}'): lm for i, lm in enumerate(self.lms)}
+        order = self.health.route(list(providers))
+        hedge = stream is None and self.hedging.enabled_for(signature.__name__)
+        if hedge:
+            self.hedging.admit()
+        cost, deadline = self.rate_limits.cost(inputs), self.rate_limits.deadline()
         last_error = None
-        for i, lm in enumerate(self.lms):
-            provider = getattr(lm, 'provider_name', f'Provider_{i}')
-            print(f"MCP Attempt {i+1}: Trying {provider}...")
-            
+        attempt = 0
+        while order:
+            provider = self.rate_limits.choose(order, cost)
+            order.remove(provider)
+            if not self.health.begin(provider):
+                continue  # another request is already probing this provider
+            try:
+                await self.rate_limits.acquire(provider, cost, deadline)
+            except ClientRateLimitError as e:
+                self.health.release(provider)
+                print(f"MCP QUOTA: {e}")
+                last_error = e
+                continue
+            except asyncio.CancelledError:
+                self.health.release(provider)
+                raise
+            attempt += 1
+            print(f"MCP Attempt {attempt}: Trying {provider}...")
+            primary = asyncio.ensure_future(self._attempt(provider, providers[provider], signature, state, inputs, stream))
             try:
-                with dspy.context(lm=lm):
-                    if signature not in self.predictor_cache:
-                        self.predictor_cache[signature] = dspy.Predict(signature)
-                    
-                    predictor = self.predictor_cache[signature]
-                    result = predictor(**inputs)
-                    print(f"MCP SUCCESS: {provider} responded.")
-                    return result
+                if hedge and order:
+                    return await self._hedged(primary, provider, order, providers, signature, state, inputs, cost)
+                return await primary
             except Exception as e:
-                print(f"MCP FAILURE: {provider} failed with: {str(e)[:100]}")
                 last_error = e
+                if stream is not None:
+                    stream.reset()  # the next provider answers from the start
                 # Continue if it's a rate limit or transient error
-                continue 
-        
+                continue
+
         print("MCP FATAL: All providers failed.")
         raise last_error or RuntimeError("All LLM providers exhausted.")
+
+    async def _hedged(self, primary: asyncio.Future, provider: str, order: List[str], providers: Dict[str, Any],
+                      signature: Type[dspy.Signature], state: AgentState, inputs: Dict[str, Any], cost: int) -> Any:
+        """
+        Waits on `primary` up to the provider's hedge delay, then (budget
+        permitting) races it against the next healthy provider in `order`
+        that has quota to spare right now (hedges never queue for quota).
+        The first answer wins and the other call is cancelled; if both fail,
+        the last error is raised and the failover loop moves on. If the
+        caller is cancelled, both calls are cancelled with it.
+        """
+        delay = self.hedging.delay_for(self.health, provider)
+        backup = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self.hedging.acquire():
+                return await primary
+            backup_provider = next((p for p in order if self._claim_now(p, cost)), None)
+            if backup_provider is None:
+                self.hedging.release(refund=True)
+                return await primary
+            order.remove(backup_provider)  # the failover loop won't try it again
+
+            print(f"MCP HEDGE: {provider} slower than {delay * 1000:.0f}ms, also trying {backup_provider}...")
+            self.hedging.record_hedge(inputs)
+            backup = asyncio.ensure_future(self._attempt(backup_provider, providers[backup_provider], signature, state, inputs))
+            pending, winner, last_error = {primary, backup}, None, None
+            try:
+                while pending and winner is None:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            winner = task
+                            break
+                        last_error = task.exception()
+            finally:
+                for task in pending:
+                    task.cancel()  # a worker-thread call can't be interrupted; its answer is dropped
+                if pending:
+                    await asyncio.gather(*pending, return_exceptions=True)
+                self.hedging.release()
+                self.hedging.record_outcome(None if winner is None else winner is backup, len(pending))
+            if winner is None:
+                raise last_error
+            return winner.result()
+        except asyncio.CancelledError:
+            # The caller was cancelled (asyncio.wait doesn't cancel what it waits on): stop its calls too
+            for task in (primary, backup):
+                if task is not None:
+                    task.cancel()
+            raise
+
+    def _claim_now(self, provider: str, cost: int) -> bool:
+        """Claims an attempt on `provider` only if it is healthy and has quota now."""
+        if not self.health.begin(provider):
+            return False
+        if not self.rate_limits.try_acquire(provider, cost):
+            self.health.release(provider)
+            return False
+        return True
+
+    async def _attempt(self, provider: str, lm: Any, signature: Type[dspy.Signature], state: AgentState,
+                       inputs: Dict[str, Any], stream: TokenStream = None) -> Any:
+        """One call to one provider: health-tracked, concurrency-limited, timed out and audited."""
+        started = None
+        try:
+            with dspy.context(lm=lm):
+                if signature not in self.predictor_cache:
+                    self.predictor_cache[signature] = dspy.Predict(signature)
+
+                predictor = self.predictor_cache[signature]
+                async with self.provider_limits.slot(provider):
+                    started = time.perf_counter()
+                    call = self._call(predictor, inputs) if stream is None else self._stream_call(predictor, inputs, stream)
+                    result = await asyncio.wait_for(call, self.call_timeout or None)
+                    latency_ms = (time.perf_counter() - started) * 1000
+        except asyncio.CancelledError:
+            # Lost a hedge race (or the request went away): no verdict on the provider
+            self.health.release(provider, (time.perf_counter() - started) * 1000 if started is not None else None)
+            raise
+        except Exception as e:
+            kind = self.health.record_failure(provider, e)
+            print(f"MCP FAILURE: {provider} failed ({kind}) with: {str(e)[:100]}")
+            raise
+
+        self.health.record_success(provider, latency_ms)
+        print(f"MCP SUCCESS: {provider} responded.")
+        await self.audit.record(
+            user_id=state.patient_profile.user_id,
+            agent_name=state.current_agent,
+            signature_name=signature.__name__,
+            prompt_input=inputs,
+            response_output=result,
+            model_name=getattr(lm, 'model', 'Unknown'),
+            provider=provider,
+            latency_ms=latency_ms,
+        )
+        return result
+
+    @staticmethod
+    async def _call(predictor, inputs: Dict[str, Any]) -> Any:
+        """
+        Runs the predictor without blocking the event loop: DSPy's async path
+        when it has one, otherwise the sync call in a worker thread.
+        """
+        acall = getattr(type(predictor), "acall", None)
+        if acall is not None and asyncio.iscoroutinefunction(acall):
+            return await predictor.acall(**inputs)
+        return await asyncio.to_thread(predictor, **inputs)
+
+    @staticmethod
+    async def _stream_call(predictor, inputs: Dict[str, Any], stream: TokenStream) -> Any:
+        """
+        Like _call, but pushes the `response` field's tokens to `stream` as the
+        LM produces them (dspy.streamify). The other output fields are parsed
+        from the final prediction. Predictors that can't stream (or an LM cache
+        hit) push nothing; the caller then sends the response whole.
+        """
+        signature = getattr(predictor, "signature", None)
+        if not isinstance(predictor, dspy.Module) or "response" not in getattr(signature, "output_fields", {}):
+            return await MCPServer._call(predictor, inputs)
+        program = dspy.streamify(
+            predictor,
+            stream_listeners=[dspy.streaming.StreamListener(signature_field_name="response")],
+            is_async_program=True,
+        )
+        result = None
+        async for value in program(**inputs):
+            if isinstance(value, dspy.streaming.StreamResponse):
+                stream.push(value.chunk)
+            elif isinstance(value, dspy.Prediction):
+                result = value
+        return result
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from typing import List, Optional, Dict, Any
 from enum import Enum
 from backend.models.state_machine import PatientStage
@@ -18,6 +18,7 @@ class Biomarkers(BaseModel):
     total_cholesterol: float
     weight: float
     height: float # in cm
+    triglycerides: float = 0.0 # mmol/L; 0 = not measured
 
     @property
     def bmi(self) -> float:
@@ -41,6 +42,27 @@ class PatientProfile(BaseModel):
     facilitators: List[str] = []
     current_stage: PatientStage = PatientStage.EDUCATE_MOTIVATE # Default for new users
     physician_name: Optional[str] = "Dr. Smith"
+    sex: Optional[str] = None # "Female" / "Male" as on the roster
+    family_history: Optional[bool] = None # parental history of diabetes; None = not recorded
+    risk_source: Optional[str] = None # model behind diabetes_risk_score, e.g. the sheet's "PREVENT_Risk_V22"
+
+    # Bumped whenever a field is set to a different value, so serialized projections can be memoized (see ProfileProjector)
+    _revision: int = PrivateAttr(default=0)
+
+    def __setattr__(self, name: str, value: Any):
+        changed = name in type(self).model_fields and getattr(self, name) != value
+        super().__setattr__(name, value)
+        if changed:
+            self.touch()
+
+    @property
+    def revision(self) -> int:
+        # Read through __pydantic_private__: plain private attribute access goes through a slow __getattr__
+        return self.__pydantic_private__["_revision"]
+
+    def touch(self):
+        """Marks the profile changed after an in-place edit (e.g. of biomarkers or a list)."""
+        self.__pydantic_private__["_revision"] += 1
 
 class Message(BaseModel):
     role: str # 'user', 'assistant', 'system'
@@ -49,10 +71,21 @@ class Message(BaseModel):
 
 class AgentState(BaseModel):
     current_agent: str # 'intake', 'motivation', 'education', 'coaching'
-    conversation_history: List[Message]
+    conversation_history: List[Message] # Recent window only; older turns stay in the messages table
     patient_profile: PatientProfile
     context_variables: Dict[str, Any] = {}
 
+    # Persistence bookkeeping (never serialized), maintained by AsyncPersistence
+    _history_offset: int = PrivateAttr(default=0)     # stored messages older than the in-memory window
+    _next_seq: int = PrivateAttr(default=0)           # sequence number for the next appended message
+    _persisted_count: int = PrivateAttr(default=0)    # leading messages of the window already stored
+    _persisted_history: Optional[list] = PrivateAttr(default=None)  # list object those counts refer to
+
+    @property
+    def total_messages(self) -> int:
+        """Length of the full conversation, including turns not loaded into memory."""
+        return self._history_offset + len(self.conversation_history)
+
 class OrchestratorRequest(BaseModel):
     user_id: str
     user_input: str
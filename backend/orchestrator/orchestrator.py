@@ -1,62 +1,84 @@
-from typing import Dict
+import asyncio
+from typing import AsyncIterator, Dict
 from backend.models.data_models import AgentState, PatientProfile, RiskLevel, Biomarkers, Message
 from backend.agents.intake_agent import IntakeAgent
 from backend.agents.motivation_agent import MotivationAgent
 from backend.agents.education_agent import EducationAgent
 from backend.agents.coaching_agent import CoachingAgent
 
-from backend.services.data_loader import DataLoader
+from backend.services.chat_stream import StreamStats, TokenStream
+from backend.services.risk_scoring import rescore
+from backend.services.roster_registry import get_roster_registry
 from backend.services.llm_config import configure_dspy
 import os
 
 from backend.services.persistence import AsyncPersistence
+from backend.services.write_behind import StateWriteBuffer
+from backend.services.session_cache import SessionCache
+from backend.services.turn_locks import UserTurnLocks
+from backend.services.maintenance import MaintenanceJob
 from backend.mcp_server.mcp_server import MCPServer
 
 class Orchestrator:
     def __init__(self):
         configure_dspy() # Initialize Gemini
-        self.mcp_server = MCPServer()
+        self.persistence = AsyncPersistence()
+        self.mcp_server = MCPServer(self.persistence) # Shares the connection pool for audit logging
         self.agents = {
             "intake": IntakeAgent(self.mcp_server),
             "motivation": MotivationAgent(self.mcp_server),
             "education": EducationAgent(self.mcp_server),
             "coaching": CoachingAgent(self.mcp_server)
         }
-        self.states: Dict[str, AgentState] = {}
-        self.persistence = AsyncPersistence()  
+        self.states = SessionCache()
+        self.write_buffer = StateWriteBuffer(self.persistence)
+        self.turn_locks = UserTurnLocks()
+        self.stream_stats = StreamStats() # Time-to-first-token vs total latency of /api/chat/stream
+        self._stream_turns = set() # Streamed turns run as tasks; strong refs until they finish
+        # Rolling history summaries are saved with the session
+        self.mcp_server.context.on_update = self._on_summary_update
+        self.maintenance = MaintenanceJob(
+            self.persistence,
+            is_active=lambda user_id: user_id in self.states or self.write_buffer.pending(user_id) is not None,
+        )
         # Note: self.persistence.init_db() needs to be awaited, can't be in __init__
         # We will check table existence on first access or use a startup event in main.py
         
-        # Initialize Data Loader
-        # Data is now in backend/data/
-        data_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "PREVENT_Inform_Table_V2 (2).xlsx")
-        print(f"Orchestrator: Loading database from {data_path}...")
-        self.data_loader = DataLoader(data_path)
-        self.user_database = self.data_loader.load_data()
-        
-        if self.user_database:
-            print(f"Orchestrator: Database loaded successfully with {len(self.user_database)} users.")
-            # Print first few IDs for verification
-            sample_ids = list(self.user_database.keys())[:5]
-            print(f"Orchestrator: Sample IDs: {sample_ids}")
-        else:
-            print("Orchestrator WARNING: Database is empty!")
+        # Patient roster (Excel), shared with the lookup and admin APIs; loaded lazily
+        self.roster = get_roster_registry()
+        self.roster.add_listener(self._on_roster_reload)
 
     async def get_or_create_state(self, user_id: str) -> AgentState:
-        # P1: Try to load from persistent DB
+        # Waits for any in-flight turn so callers never see a half-applied turn
+        async with self.turn_locks.hold(user_id):
+            return await self._load_or_create_state(user_id)
+
+    async def _load_or_create_state(self, user_id: str) -> AgentState:
+        # P0: Hot session served from memory (no DB read)
+        state = self.states.get(user_id)
+        if state is not None:
+            return state
+
+        # P1: A state still waiting in the write-behind buffer is newer than the DB copy
+        pending = self.write_buffer.pending(user_id)
+        if pending is not None:
+            self.states.put(user_id, pending)
+            return pending
+
+        # P2: Try to load from persistent DB
         persisted_state = await self.persistence.load_state(user_id)
         if persisted_state:
-            self.states[user_id] = persisted_state
+            if self.roster.patch_profile(user_id, persisted_state.patient_profile):
+                self.write_buffer.mark_dirty(user_id, persisted_state)
+            self.states.put(user_id, persisted_state)
             return persisted_state
 
-        # P2: If in-memory (fallback), return it
-        if user_id in self.states:
-             return self.states[user_id]
-
         # P3: Create New (and persist it immediately)
         # Check if user exists in loaded database (Excel)
-        if user_id in self.user_database:
-            profile = self.user_database[user_id]
+        roster = await self.roster.load_async()
+        if user_id in roster:
+            # Own copy: agents update the profile in place, the roster entry stays pristine
+            profile = roster[user_id].model_copy(deep=True)
         else:
             # Fallback for unknown users
             profile = PatientProfile(
@@ -70,6 +92,7 @@ class Orchestrator:
                     ldl=3.0, hdl=1.2, total_cholesterol=4.5, weight=70, height=170
                 )
             )
+            rescore(profile)
         
         new_state = AgentState(
             current_agent="intake",
@@ -77,12 +100,52 @@ class Orchestrator:
             patient_profile=profile
         )
         
-        self.states[user_id] = new_state
+        self.states.put(user_id, new_state)
         await self.persistence.save_state(user_id, new_state)
         return new_state
 
     async def process_request(self, user_id: str, user_input: str) -> Dict:
-        state = await self.get_or_create_state(user_id)
+        # Turns of one user run strictly in order; other users proceed in parallel
+        async with self.turn_locks.hold(user_id):
+            return await self._process_turn(user_id, user_input)
+
+    async def stream_request(self, user_id: str, user_input: str) -> AsyncIterator[Dict]:
+        """
+        process_request, streamed: yields the TokenStream events of the turn
+        (response tokens as the LLM produces them, then "done"). The turn runs
+        in its own task, so it completes and is saved exactly once even if the
+        client goes away mid-stream. Answers that didn't stream (static
+        replies, cache hits) arrive as a single token event.
+        """
+        stream = TokenStream()
+
+        async def run():
+            try:
+                async with self.turn_locks.hold(user_id):
+                    result = await self._process_turn(user_id, user_input, stream)
+            except Exception as e:
+                self.stream_stats.errors += 1
+                stream.finish(error=e)
+                return
+            if not stream.streamed:
+                stream.push(result["response"])
+            total_ms = stream.elapsed_ms()
+            self.stream_stats.record(stream, total_ms)
+            stream.finish({
+                "type": "done",
+                **result,
+                "ttft_ms": round(stream.first_token_ms, 1),
+                "total_ms": round(total_ms, 1),
+            })
+
+        task = asyncio.ensure_future(run())
+        self._stream_turns.add(task)
+        task.add_done_callback(self._stream_turns.discard)
+        async for event in stream.events():
+            yield event
+
+    async def _process_turn(self, user_id: str, user_input: str, stream: TokenStream = None) -> Dict:
+        state = await self._load_or_create_state(user_id)
         
         # Add user message to history
         state.conversation_history.append(Message(role="user", content=user_input))
@@ -92,7 +155,7 @@ class Orchestrator:
         agent = self.agents[current_agent_name]
         
         # Process with agent
-        result = await agent.process(user_input, state)
+        result = await agent.process(user_input, state, stream=stream)
         
         # Update state based on result
         response_text = result["response"]
@@ -107,12 +170,59 @@ class Orchestrator:
         else:
             print(f"Orchestrator: Staying at {state.current_agent}")
             
-        # Save state to DB (Fire-and-Forget for low latency)
-        import asyncio
-        asyncio.create_task(self.persistence.save_state(user_id, state))
-        # print("Orchestrator: Background save initiated.")
+        # Save state to DB (Write-Behind: coalesced and flushed in batches for low latency)
+        self.write_buffer.mark_dirty(user_id, state)
         
         return {
             "response": response_text,
             "current_agent": state.current_agent
         }
+
+    async def prewarm_sessions(self, limit: int = None) -> int:
+        """Loads the `limit` most recently active users into the session cache."""
+        limit = limit if limit is not None else int(os.getenv("ANTIGRAVITY_PREWARM_SESSIONS", "0"))
+        limit = min(limit, self.states.max_size)
+        if limit <= 0:
+            return 0
+        warmed = 0
+        for user_id in await self.persistence.recent_user_ids(limit):
+            if user_id in self.states:
+                continue
+            state = await self.persistence.load_state(user_id)
+            if state:
+                if self.roster.patch_profile(user_id, state.patient_profile):
+                    self.write_buffer.mark_dirty(user_id, state)
+                self.states.put(user_id, state)
+                warmed += 1
+        print(f"Orchestrator: Pre-warmed {warmed} sessions.")
+        return warmed
+
+    def _on_summary_update(self, state: AgentState):
+        user_id = state.patient_profile.user_id
+        if self.states.peek(user_id) is state or self.write_buffer.pending(user_id) is state:
+            self.write_buffer.mark_dirty(user_id, state)
+
+    def _on_roster_reload(self, diff: Dict):
+        """Applies a roster hot reload to the sessions currently in memory."""
+        roster = self.roster.load()
+        patched = 0
+        for user_id in diff["changed"]:
+            state = self.states.peek(user_id) or self.write_buffer.pending(user_id)
+            if state is None or user_id not in roster:
+                continue  # not in memory: patched when next loaded from the DB
+            self.roster.patch_profile(user_id, state.patient_profile)  # consumes the reload for this user
+            self.write_buffer.mark_dirty(user_id, state)
+            patched += 1
+        if patched:
+            print(f"Orchestrator: Patched {patched} active sessions after roster reload.")
+
+    async def shutdown(self):
+        """Finishes streamed turns and summary updates, drains buffered state saves and audit records, then closes the persistence pool."""
+        self.roster.remove_listener(self._on_roster_reload)
+        if self._stream_turns:  # let streamed turns whose client left finish and be saved
+            await asyncio.gather(*self._stream_turns, return_exceptions=True)
+        await self.mcp_server.context.drain()
+        await self.maintenance.close()
+        await self.write_buffer.close()
+        await self.mcp_server.audit.close()
+        await self.persistence.close()
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+
+class AuditSink:
+    """
+    Buffered, batched writer for the llm_interactions audit log ("The Receipt", PRD 10.1).
+
+    `record()` only appends to an in-memory buffer, so the chat path pays
+    microseconds instead of a SQLite round-trip. A background task serializes
+    the buffered records and bulk-inserts them with `executemany` once
+    `max_batch` records are waiting or `flush_interval` seconds have passed;
+    AsyncPersistence.log_interactions hash-chains each row inside the same
+    transaction so the log is tamper-evident.
+
+    The buffer is bounded: if SQLite falls `max_pending` records behind,
+    `record()` waits for a flush instead of dropping receipts.
+    """
+
+    def __init__(self, persistence, max_batch: int = None, flush_interval: float = None, max_pending: int = None):
+        self.persistence = persistence
+        self.max_batch = max_batch or int(os.getenv("ANTIGRAVITY_AUDIT_BATCH", "200"))
+        self.flush_interval = flush_interval or float(os.getenv("ANTIGRAVITY_AUDIT_FLUSH_MS", "1000")) / 1000
+        self.max_pending = max_pending or int(os.getenv("ANTIGRAVITY_AUDIT_MAX_PENDING", "10000"))
+
+        self._buffer: List[tuple] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        # Observability
+        self.stats = {"recorded": 0, "written": 0, "flushes": 0, "flush_errors": 0, "backpressure_waits": 0}
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    async def record(self, user_id: str, agent_name: str, signature_name: str, prompt_input: Dict[str, Any],
+                     response_output: Any, model_name: str, provider: str, latency_ms: float):
+        """
+        Queues one LLM interaction. `prompt_input` and `response_output` are kept
+        as-is and only serialized at flush time, off the chat path.
+        """
+        self._ensure_started()
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+        self._buffer.append((user_id, agent_name, signature_name, prompt_input, response_output,
+                             model_name, provider, latency_ms, timestamp))
+        self.stats["recorded"] += 1
+        if len(self._buffer) >= self.max_batch:
+            self._wakeup.set()
+        if len(self._buffer) >= self.max_pending:
+            self.stats["backpressure_waits"] += 1
+            await self.flush()
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is not None and self._loop is loop and not self._task.done():
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._closing = False
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._buffer:
+                await self.flush()
+
+    @staticmethod
+    def _serialize(value: Any) -> str:
+        if isinstance(value, str):
+            return value
+        if hasattr(value, "toDict"):  # dspy.Prediction
+            value = value.toDict()
+        return json.dumps(value, default=str, ensure_ascii=False)
+
+    async def flush(self):
+        """Writes every buffered record in one transaction."""
+        if self._flush_lock is None:
+            self._ensure_started()
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+            rows = [
+                (user_id, agent_name, signature_name, self._serialize(prompt), self._serialize(response),
+                 model_name, provider, latency_ms, timestamp)
+                for user_id, agent_name, signature_name, prompt, response, model_name, provider, latency_ms, timestamp in batch
+            ]
+            try:
+                await self.persistence.log_interactions(rows)
+            except Exception as e:
+                print(f"AuditSink: flush of {len(rows)} records failed, will retry: {e}")
+                self.stats["flush_errors"] += 1
+                self._buffer[:0] = batch  # keep original order ahead of newer records
+                return
+            self.stats["flushes"] += 1
+            self.stats["written"] += len(rows)
+
+    async def close(self):
+        """Stops the background flusher and writes everything still buffered."""
+        if self._task is None:
+            return
+        if self._loop is asyncio.get_running_loop():
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            await self.flush()
+        self._task = None
+        self._loop = None
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Optional
+
+
+class TokenStream:
+    """
+    One streamed chat turn: MCPServer pushes the `response` tokens as the LM
+    produces them and the /api/chat/stream response reads them as events:
+
+      {"type": "token", "text": ...}   a piece of the response
+      {"type": "reset"}                a provider failed mid-answer; the next one starts over
+      {"type": "done", ...}            the turn is complete and saved (final response, agent, timings)
+
+    A turn that fails ends the stream by re-raising its exception from events().
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_ms: Optional[float] = None
+        self.tokens = 0
+        self.resets = 0
+        self._sent = False
+        self._error: Optional[BaseException] = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    @property
+    def streamed(self) -> bool:
+        """Whether any response text has been sent since the last reset."""
+        return self._sent
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def push(self, text: str):
+        if not text:
+            return
+        if self.first_token_ms is None:
+            self.first_token_ms = self.elapsed_ms()
+        self.tokens += 1
+        self._sent = True
+        self._queue.put_nowait({"type": "token", "text": text})
+
+    def reset(self):
+        if self._sent:
+            self._sent = False
+            self.resets += 1
+            self._queue.put_nowait({"type": "reset"})
+
+    def finish(self, event: Dict = None, error: BaseException = None):
+        if event is not None:
+            self._queue.put_nowait(event)
+        self._error = error
+        self._queue.put_nowait(None)
+
+    async def events(self) -> AsyncIterator[Dict]:
+        while True:
+            event = await self._queue.get()
+            if event is None:
+                break
+            yield event
+        if self._error is not None:
+            raise self._error
+
+
+class StreamStats:
+    """Time-to-first-token and total latency of streamed turns, over the last `window` turns."""
+
+    def __init__(self, window: int = 500):
+        self.ttft_ms: Deque[float] = deque(maxlen=window)
+        self.total_ms: Deque[float] = deque(maxlen=window)
+        self.streams = 0
+        self.errors = 0
+        self.resets = 0
+
+    def record(self, stream: TokenStream, total_ms: float):
+        self.streams += 1
+        self.resets += stream.resets
+        self.ttft_ms.append(stream.first_token_ms if stream.first_token_ms is not None else total_ms)
+        self.total_ms.append(total_ms)
+
+    @staticmethod
+    def _percentiles(values: Deque[float]) -> Dict[str, Optional[float]]:
+        if not values:
+            return {"p50": None, "p95": None, "max": None}
+        ordered = sorted(values)
+        pick = lambda p: round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))], 1)
+        return {"p50": pick(50), "p95": pick(95), "max": round(ordered[-1], 1)}
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            "streams": self.streams,
+            "errors": self.errors,
+            "resets": self.resets,
+            "ttft_ms": self._percentiles(self.ttft_ms),
+            "total_ms": self._percentiles(self.total_ms),
+        }
@@ -0,0 +1,289 @@
+"""
+Cohort queries over the roster, for IDENTIFY / INFORM outreach targeting.
+
+A query is a small filter expression compiled to numpy boolean masks over the
+RosterStore columns, e.g.
+
+    a1c >= 6.0 and risk == High
+    systolic between 130 and 160 and not physician in ("Dr. Wei Zhang", "Dr. Maria Garcia")
+    (ldl > 4 or hdl < 1) and age >= 40
+
+Numeric fields take ==, !=, <, <=, >, >=, in and between; text fields (user_id,
+risk_level, motivation_level, physician_name) take ==, != and in, matched
+case-insensitively. No PatientProfiles are built to answer a query.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from backend.services.roster_store import CATEGORICAL_COLUMNS, FLOAT_COLUMNS, INT_COLUMNS, RosterStore
+
+NUMERIC_FIELDS = INT_COLUMNS + FLOAT_COLUMNS
+FIELDS = ("user_id",) + NUMERIC_FIELDS + CATEGORICAL_COLUMNS
+# Friendlier names accepted in queries and group_by
+FIELD_ALIASES = {
+    "risk": "risk_level", "segment": "motivation_level", "physician": "physician_name", "doctor": "physician_name",
+    "systolic": "systolic_bp", "diastolic": "diastolic_bp", "cholesterol": "total_cholesterol", "id": "user_id",
+}
+# Fields returned for each matching patient
+RESULT_FIELDS = ("user_id", "name") + FIELDS[1:]
+
+_TOKEN = re.compile(r"""\s*(?:(?P<num>-?\d+(?:\.\d+)?)|(?P<str>'[^']*'|"[^"]*")|(?P<op>>=|<=|!=|==|=|<|>)"""
+                    r"""|(?P<punct>[(),])|(?P<word>[A-Za-z_][\w.\-]*))""")
+_KEYWORDS = {"and", "or", "not", "in", "between"}
+
+
+class CohortQueryError(ValueError):
+    """Raised for a query that does not parse or names an unknown field."""
+    pass
+
+
+def resolve_field(name: str) -> str:
+    field = FIELD_ALIASES.get(name.lower(), name.lower())
+    if field not in FIELDS:
+        raise CohortQueryError(f"Unknown field '{name}'. Fields: {', '.join(FIELDS)}")
+    return field
+
+
+def _tokenize(text: str) -> List[Tuple[str, object]]:
+    tokens, position = [], 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise CohortQueryError(f"Unexpected input at position {position}: {text[position:position + 10]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "num":
+            tokens.append(("value", float(value)))
+        elif kind == "str":
+            tokens.append(("value", value[1:-1]))
+        elif kind == "word" and value.lower() in _KEYWORDS:
+            tokens.append((value.lower(), value))
+        elif kind == "word":
+            tokens.append(("word", value))
+        else:
+            tokens.append((value, value))
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent over:
+        expr  := term ("or" term)*
+        term  := factor ("and" factor)*
+        factor:= "not" factor | "(" expr ")" | field op value
+               | field "in" "(" value ("," value)* ")" | field "between" value "and" value
+    Bare words are values too, so `risk == High` needs no quotes.
+    """
+
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def peek(self) -> str:
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else "end"
+
+    def take(self, *kinds: str):
+        kind, value = self.tokens[self.position] if self.position < len(self.tokens) else ("end", None)
+        if kind not in kinds:
+            raise CohortQueryError(f"Expected {' or '.join(kinds)}, got {value if value is not None else 'end of query'!r}")
+        self.position += 1
+        return value
+
+    def parse(self) -> tuple:
+        node = self.expr()
+        self.take("end")
+        return node
+
+    def expr(self) -> tuple:
+        node = self.term()
+        while self.peek() == "or":
+            self.take("or")
+            node = ("or", node, self.term())
+        return node
+
+    def term(self) -> tuple:
+        node = self.factor()
+        while self.peek() == "and":
+            self.take("and")
+            node = ("and", node, self.factor())
+        return node
+
+    def value(self):
+        return self.take("value", "word")
+
+    def factor(self) -> tuple:
+        if self.peek() == "not":
+            self.take("not")
+            return ("not", self.factor())
+        if self.peek() == "(":
+            self.take("(")
+            node = self.expr()
+            self.take(")")
+            return node
+        field = resolve_field(self.take("word"))
+        if self.peek() == "in":
+            self.take("in")
+            self.take("(")
+            values = [self.value()]
+            while self.peek() == ",":
+                self.take(",")
+                values.append(self.value())
+            self.take(")")
+            return _check(("in", field, tuple(values)))
+        if self.peek() == "between":
+            self.take("between")
+            low = self.value()
+            self.take("and")
+            return _check(("between", field, low, self.value()))
+        op = self.take(">=", "<=", "!=", "==", "=", "<", ">")
+        return _check(("cmp", field, "==" if op == "=" else op, self.value()))
+
+
+def _check(node: tuple) -> tuple:
+    kind, field, *values = node
+    if kind == "cmp":
+        values = values[1:]
+    elif kind == "in":
+        values = list(values[0])
+    if field in NUMERIC_FIELDS:
+        bad = [value for value in values if not isinstance(value, float)]
+        if bad:
+            raise CohortQueryError(f"'{field}' is numeric; got {bad[0]!r}")
+    elif kind == "between" or (kind == "cmp" and node[2] not in ("==", "!=")):
+        raise CohortQueryError(f"'{field}' only supports ==, != and in")
+    return node
+
+
+@lru_cache(maxsize=256)
+def parse_query(text: str) -> tuple:
+    """The query's syntax tree; an empty query matches everyone. Cached, so repeated queries skip parsing."""
+    if not text or not text.strip():
+        return ("all",)
+    return _Parser(text).parse()
+
+
+def _as_text(value) -> str:
+    # Numbers are tokenized as floats; `user_id == 1001` means "1001"
+    return str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
+
+
+def _text_mask(store: RosterStore, field: str, values: Sequence) -> np.ndarray:
+    if field == "user_id":
+        return np.isin(store.user_ids, [_as_text(value) for value in values])
+    wanted = {_as_text(value).casefold() for value in values}
+    codes, categories = store.categorical(field)
+    matching = [code for code, category in enumerate(categories) if category.casefold() in wanted]
+    if not matching:
+        return np.zeros(len(store), dtype=bool)
+    return codes == matching[0] if len(matching) == 1 else np.isin(codes, matching)
+
+
+def _mask(store: RosterStore, node: tuple) -> np.ndarray:
+    kind = node[0]
+    if kind == "all":
+        return np.ones(len(store), dtype=bool)
+    if kind == "and":
+        return _mask(store, node[1]) & _mask(store, node[2])
+    if kind == "or":
+        return _mask(store, node[1]) | _mask(store, node[2])
+    if kind == "not":
+        return ~_mask(store, node[1])
+    field = node[1]
+    if kind == "in":
+        if field in NUMERIC_FIELDS:
+            return np.isin(store.numeric(field), node[2])
+        return _text_mask(store, field, node[2])
+    if kind == "between":
+        values = store.numeric(field)
+        return (values >= node[2]) & (values <= node[3])
+    op, value = node[2], node[3]
+    if field not in NUMERIC_FIELDS:
+        mask = _text_mask(store, field, [value])
+        return ~mask if op == "!=" else mask
+    values = store.numeric(field)
+    return {"==": np.equal, "!=": np.not_equal, "<": np.less, "<=": np.less_equal,
+            ">": np.greater, ">=": np.greater_equal}[op](values, value)
+
+
+def select(store: RosterStore, query: str) -> np.ndarray:
+    """Row numbers (roster order) of the patients matching `query`."""
+    return np.flatnonzero(_mask(store, parse_query(query)))
+
+
+def rows_to_dicts(store: RosterStore, rows: np.ndarray) -> List[Dict]:
+    """Result records for `rows`, gathered column-wise (no PatientProfiles are built)."""
+    columns = {"user_id": store.user_ids[rows].tolist(), "name": store.names(rows)}
+    for field in NUMERIC_FIELDS:
+        columns[field] = store.numeric(field)[rows].tolist()
+    for field in CATEGORICAL_COLUMNS:
+        codes, categories = store.categorical(field)
+        columns[field] = [categories[code] for code in codes[rows].tolist()]
+    return [dict(zip(RESULT_FIELDS, values)) for values in zip(*(columns[field] for field in RESULT_FIELDS))]
+
+
+def count(store: RosterStore, query: str) -> int:
+    return int(np.count_nonzero(_mask(store, parse_query(query))))
+
+
+def page(store: RosterStore, query: str, limit: int = 50, offset: int = 0) -> Dict:
+    rows = select(store, query)
+    return {
+        "query": query,
+        "total": len(rows),
+        "offset": offset,
+        "limit": limit,
+        "results": rows_to_dicts(store, rows[offset:offset + limit]),
+    }
+
+
+def stream(store: RosterStore, query: str, chunk_size: int = 1000) -> Iterator[List[Dict]]:
+    """Every match, `chunk_size` records at a time, so large cohorts are never held as one list."""
+    rows = select(store, query)
+    for start in range(0, len(rows), chunk_size):
+        yield rows_to_dicts(store, rows[start:start + chunk_size])
+
+
+def group_by(store: RosterStore, query: str, by: str, metrics: Sequence[str] = ()) -> Dict:
+    """
+    Per-group count plus mean/min/max of each numeric field in `metrics`, over
+    the patients matching `query`. Groups are sorted by count, largest first.
+    """
+    by = resolve_field(by)
+    metrics = [resolve_field(metric) for metric in metrics]
+    for metric in metrics:
+        if metric not in NUMERIC_FIELDS:
+            raise CohortQueryError(f"Metric '{metric}' is not numeric")
+    rows = select(store, query)
+    if by in CATEGORICAL_COLUMNS:
+        codes, categories = store.categorical(by)
+        group_of, labels = codes[rows], list(categories)
+    else:
+        values = store.user_ids[rows] if by == "user_id" else store.numeric(by)[rows]
+        uniques, group_of = np.unique(values, return_inverse=True)
+        labels = uniques.tolist()
+    counts = np.bincount(group_of, minlength=len(labels))
+    present = np.flatnonzero(counts)
+
+    stats = {}
+    for metric in metrics:
+        values = store.numeric(metric)[rows].astype(np.float64)
+        sums = np.bincount(group_of, weights=values, minlength=len(labels))
+        minimums = np.full(len(labels), np.inf)
+        maximums = np.full(len(labels), -np.inf)
+        np.minimum.at(minimums, group_of, values)
+        np.maximum.at(maximums, group_of, values)
+        stats[metric] = (sums, minimums, maximums)
+
+    groups = []
+    for group in present[np.argsort(-counts[present], kind="stable")].tolist():
+        entry = {"group": labels[group], "count": int(counts[group])}
+        for metric, (sums, minimums, maximums) in stats.items():
+            entry[metric] = {"mean": round(sums[group] / counts[group], 4),
+                             "min": float(minimums[group]), "max": float(maximums[group])}
+        groups.append(entry)
+    return {"query": query, "by": by, "total": len(rows), "groups": groups}
@@ -0,0 +1,241 @@
+import asyncio
+import inspect
+import os
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from backend.models.data_models import AgentState, Message
+from backend.services.maintenance import SUMMARY_LINE_CHARS
+
+# context_variables entry holding the rolling summary: {"through": n, "text": ...}, where
+# n is the number of messages (from the start of the conversation) it covers
+SUMMARY_KEY = "history_summary"
+CHARS_PER_TOKEN = 4
+SUMMARY_HEADER = "Summary of the earlier conversation:\n"
+KEY_POINTS, EARLIER = "Key points:", "Earlier turns:"
+# Patient statements worth keeping longest: ratings ("8 out of 10", "6/10"), importance, confidence, readiness
+KEY_FACT = re.compile(r"\b(?:\d+\s*(?:out of|/)\s*10\b|importan|confiden|ready|readiness)", re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: ~4 characters per token for English text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def format_message(message: Message) -> str:
+    return f"{message.role}: {message.content}"
+
+
+def _summary_sections(summary: Optional[str]):
+    key, earlier, section = [], [], None
+    for line in (summary or "").splitlines():
+        if line in (KEY_POINTS, EARLIER):
+            section = key if line == KEY_POINTS else earlier
+        elif section is not None and line:
+            section.append(line)
+    return key, earlier
+
+
+def rolling_summary(messages: List[Message], previous: Optional[str] = None, max_chars: int = 1200) -> str:
+    """
+    Default rolling summary: one clipped line per message, in two sections.
+    The patient's key facts (ratings, importance, confidence, readiness) go under "Key
+    points" and the rest under "Earlier turns". To stay within `max_chars`
+    the oldest earlier turns are dropped first, then the oldest key points,
+    so a rating given at the start outlives the small talk after it.
+    """
+    key, earlier = _summary_sections(previous)
+    for message in messages:
+        text = " ".join(message.content.split())
+        if len(text) > SUMMARY_LINE_CHARS:
+            text = text[:SUMMARY_LINE_CHARS - 3] + "..."
+        line = f"{message.role}: {text}"
+        (key if message.role == "user" and KEY_FACT.search(text) else earlier).append(line)
+
+    def render():
+        parts = ([KEY_POINTS] + key if key else []) + ([EARLIER] + earlier if earlier else [])
+        return "\n".join(parts)
+
+    summary = render()
+    while len(summary) > max_chars and (earlier or len(key) > 1):
+        (earlier or key).pop(0)
+        summary = render()
+    return summary[:max_chars]
+
+
+def _compacted_messages(summary: str, previous: Optional[str]) -> List[Message]:
+    """
+    MaintenanceJob's summary as messages to fold: its "role: text" lines
+    (other lines become "summary" messages), minus lines `previous` already has.
+    """
+    known = set(sum(_summary_sections(previous), []))
+    messages = []
+    for line in summary.splitlines():
+        line = line.strip()
+        if not line or line in known:
+            continue
+        role, sep, text = line.lstrip(".").partition(": ")
+        messages.append(Message(role=role, content=text) if sep and role.isalpha() else Message(role="summary", content=line))
+    return messages
+
+
+def _env_name(signature_name: str) -> str:
+    # IntakeSignature -> ANTIGRAVITY_CONTEXT_TOKENS_INTAKE_SIGNATURE
+    return "ANTIGRAVITY_CONTEXT_TOKENS_" + re.sub(r"(?<!^)(?=[A-Z])", "_", signature_name).upper()
+
+
+class ContextBuilder:
+    """
+    Builds the `history` input of MCPServer.predict within a token budget.
+
+    The newest messages are packed, newest first, into
+    ANTIGRAVITY_CONTEXT_TOKENS (default 1000) estimated tokens, overridable per
+    signature with ANTIGRAVITY_CONTEXT_TOKENS_<SIGNATURE>, e.g.
+    ANTIGRAVITY_CONTEXT_TOKENS_MOTIVATION_SIGNATURE=1500. The newest message is
+    always included, clipped if it alone is over budget.
+
+    Older messages are represented by a rolling summary kept in the session's
+    context_variables, so it is saved with the state. When messages fall out
+    of the budget, a background task folds them into the summary after the
+    prompt has been built, so summarizing never delays a turn; the next turn
+    sees the updated summary. `summarize(messages, previous)` may be sync or
+    async; the default is rolling_summary, capped at ANTIGRAVITY_SUMMARY_TOKENS
+    (300). `on_update(state)` is called after a summary changed, e.g. to
+    queue the session's save.
+
+    A session loaded from the database holds only its most recent messages.
+    Older ones the summary does not cover yet are read back with
+    `load_messages(user_id, start, end)` (AsyncPersistence.load_message_range)
+    and folded first, so no turn is skipped; without it only the messages in
+    memory can be folded. Turns MaintenanceJob compacted away are no longer
+    stored: `load_summary(user_id)` (AsyncPersistence.load_summary) supplies
+    its summary of them, whose lines are folded in their place.
+    """
+
+    def __init__(self, default_budget: int = None, summary_tokens: int = None,
+                 summarize: Callable[[List[Message], Optional[str]], Any] = None,
+                 on_update: Callable[[AgentState], None] = None,
+                 load_messages: Callable[[str, int, int], Awaitable[List[Message]]] = None,
+                 load_summary: Callable[[str], Awaitable[Optional[Dict]]] = None):
+        self.default_budget = default_budget or int(os.getenv("ANTIGRAVITY_CONTEXT_TOKENS", "1000"))
+        self.summary_tokens = summary_tokens or int(os.getenv("ANTIGRAVITY_SUMMARY_TOKENS", "300"))
+        self.summarize = summarize or (
+            lambda messages, previous: rolling_summary(messages, previous, max_chars=self.summary_tokens * CHARS_PER_TOKEN)
+        )
+        self.on_update = on_update
+        self.load_messages = load_messages
+        self.load_summary = load_summary
+        self._folding: Dict[str, asyncio.Task] = {}  # user_id -> summary update in progress
+
+        # Observability
+        self.stats = {
+            "builds": 0,
+            "trimmed": 0,            # builds where the full history didn't fit
+            "tokens_sent": 0,        # history tokens actually put in prompts
+            "tokens_full": 0,        # what the whole in-memory history would have cost
+            "tokens_saved": 0,
+            "max_tokens_sent": 0,
+            "summary_updates": 0,
+            "summarized_messages": 0,
+            "summary_errors": 0,
+        }
+
+    def budget_for(self, signature_name: str) -> int:
+        return int(os.getenv(_env_name(signature_name), self.default_budget))
+
+    def build(self, signature_name: str, state: AgentState) -> str:
+        """The history string for this turn; schedules a summary update if messages fell out."""
+        budget = self.budget_for(signature_name)
+        history = state.conversation_history
+        offset = state._history_offset  # absolute index of history[0]
+        summary = state.context_variables.get(SUMMARY_KEY) or {}
+        through = summary.get("through", 0)
+
+        summary_text = summary.get("text") or ""
+        if estimate_tokens(summary_text) > budget // 2:
+            summary_text = "..." + summary_text[-(budget // 2) * CHARS_PER_TOKEN:]
+        prefix = SUMMARY_HEADER + summary_text + "\n\n" if summary_text else ""
+        remaining = budget - estimate_tokens(prefix)
+
+        lines: List[str] = []
+        full = used = 0
+        first_kept = len(history)
+        for i in range(len(history) - 1, -1, -1):
+            line = format_message(history[i])
+            tokens = estimate_tokens(line)
+            full += tokens
+            if first_kept != i + 1 or offset + i < through:
+                continue  # already out of the window, or covered by the summary
+            if used + tokens > remaining:
+                if lines:
+                    continue
+                line = line[:max(0, remaining) * CHARS_PER_TOKEN]
+                tokens = estimate_tokens(line)
+            lines.append(line)
+            used += tokens
+            first_kept = i
+
+        sent = estimate_tokens(prefix) + used
+        self.stats["builds"] += 1
+        self.stats["tokens_sent"] += sent
+        self.stats["tokens_full"] += full
+        self.stats["tokens_saved"] += max(0, full - sent)
+        self.stats["max_tokens_sent"] = max(self.stats["max_tokens_sent"], sent)
+
+        # Messages that no longer fit and aren't in the summary yet (any before history[0] are read back in _fold)
+        start = max(through - offset, 0)
+        if start < first_kept:
+            self.stats["trimmed"] += 1
+            self._schedule_fold(state, start, first_kept, through)
+
+        lines.reverse()
+        return prefix + "\n".join(lines)
+
+    def _schedule_fold(self, state: AgentState, start: int, end: int, through: int):
+        user_id = state.patient_profile.user_id
+        if user_id in self._folding:
+            return  # one update at a time per user; the next turn picks up the rest
+        history = state.conversation_history
+        messages = history[start:end]
+        previous = (state.context_variables.get(SUMMARY_KEY) or {}).get("text")
+        offset = state._history_offset
+        new_through = offset + end
+        task = asyncio.ensure_future(self._fold(state, history, messages, previous, through, new_through, offset))
+        self._folding[user_id] = task
+        task.add_done_callback(lambda _: self._folding.pop(user_id, None))
+
+    async def _fold(self, state: AgentState, history: list, messages: List[Message], previous: Optional[str],
+                    through: int, new_through: int, offset: int):
+        try:
+            user_id = state.patient_profile.user_id
+            start, compacted = through, []
+            if through < offset and self.load_summary is not None:
+                summary = await self.load_summary(user_id)
+                if summary and through < summary["summarized_count"]:
+                    # Turns before summarized_count only survive in MaintenanceJob's summary
+                    start = summary["summarized_count"]
+                    compacted = _compacted_messages(summary["summary"], previous)
+            if start < offset and self.load_messages is not None:
+                # Loaded with only the recent messages: fold the stored ones between the summary and history[0] too
+                messages = await self.load_messages(user_id, start, offset) + messages
+            messages = compacted + messages
+            text = self.summarize(messages, previous)
+            if inspect.isawaitable(text):
+                text = await text
+        except Exception as e:
+            print(f"ContextBuilder: summary update failed: {e}")
+            self.stats["summary_errors"] += 1
+            return
+        current = state.context_variables.get(SUMMARY_KEY) or {}
+        if state.conversation_history is not history or current.get("through", 0) != through:
+            return  # history was reset (fresh start) or summarized meanwhile
+        state.context_variables[SUMMARY_KEY] = {"through": new_through, "text": text}
+        self.stats["summary_updates"] += 1
+        self.stats["summarized_messages"] += len(messages)
+        if self.on_update is not None:
+            self.on_update(state)
+
+    async def drain(self):
+        """Waits for the summary updates in progress (e.g. before the final save at shutdown)."""
+        if self._folding:
+            await asyncio.gather(*list(self._folding.values()), return_exceptions=True)
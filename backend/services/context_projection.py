@@ -0,0 +1,79 @@
+import weakref
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from backend.models.data_models import PatientProfile
+from backend.services.context_builder import estimate_tokens
+
+# Signature inputs filled with the patient's profile
+PROFILE_INPUTS = ("user_profile", "user_context")
+
+# The profile fields each signature's instructions actually use. Signatures not
+# listed here get the whole profile, as before.
+PROJECTIONS: Dict[str, Tuple[str, ...]] = {
+    "IntakeSignature": ("name",),
+    "MotivationSignature": ("name", "importance_rating", "confidence_rating", "readiness_stage",
+                            "motivation_level", "barriers", "facilitators"),
+    "EducationSignature": ("name", "age", "diabetes_risk_score", "biomarkers", "readiness_stage", "barriers"),
+    "CoachingSignature": ("name", "age", "diabetes_risk_score", "biomarkers", "importance_rating",
+                          "confidence_rating", "readiness_stage", "barriers", "facilitators"),
+    "OutreachSignature": ("name", "age", "diabetes_risk_score", "biomarkers", "physician_name"),
+}
+
+
+def project(profile: PatientProfile, fields: Iterable[str]) -> str:
+    """Compact JSON of just `fields` of the profile (in model field order)."""
+    return profile.model_dump_json(include=set(fields))
+
+
+class ProfileProjector:
+    """
+    Serializes the profile for MCPServer.predict, per signature.
+
+    Each signature gets only the fields in PROJECTIONS, as compact JSON; others
+    get the full model_dump_json(). Results are memoized per profile object
+    and signature, and reused until the profile's revision changes (a field
+    set to a different value, or PatientProfile.touch() after an in-place
+    edit), so an unchanged profile is serialized once rather than on every
+    call. Entries go away with their profile.
+    """
+
+    def __init__(self, projections: Optional[Dict[str, Tuple[str, ...]]] = None):
+        self.projections = dict(PROJECTIONS if projections is None else projections)
+        self._memo: Dict[int, Dict[str, Any]] = {}  # id(profile) -> {"revision", "texts"}
+
+        # Observability
+        self.stats = {
+            "projections": 0,
+            "hits": 0,
+            "serializations": 0,
+            "invalidations": 0,      # memo entries dropped because the profile changed
+            "tokens_sent": 0,
+        }
+
+    def register(self, signature_name: str, fields: Iterable[str]):
+        """Sets the profile fields sent to one signature."""
+        self.projections[signature_name] = tuple(fields)
+        for entry in self._memo.values():
+            entry["texts"].pop(signature_name, None)
+
+    def project(self, signature_name: str, profile: PatientProfile) -> str:
+        key = id(profile)
+        entry = self._memo.get(key)
+        if entry is None:
+            entry = self._memo[key] = {"revision": profile.revision, "texts": {}}
+            weakref.finalize(profile, self._memo.pop, key, None)
+        elif entry["revision"] != profile.revision:
+            entry.update(revision=profile.revision, texts={})
+            self.stats["invalidations"] += 1
+
+        text = entry["texts"].get(signature_name)
+        if text is None:
+            fields = self.projections.get(signature_name)
+            text = profile.model_dump_json() if fields is None else project(profile, fields)
+            entry["texts"][signature_name] = text
+            self.stats["serializations"] += 1
+        else:
+            self.stats["hits"] += 1
+        self.stats["projections"] += 1
+        self.stats["tokens_sent"] += estimate_tokens(text)
+        return text
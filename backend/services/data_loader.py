@@ -1,83 +1,328 @@
-import pandas as pd
+import hashlib
 import os
 from typing import Dict, List, Optional
-from backend.models.data_models import PatientProfile, Biomarkers, RiskLevel
+
+import numpy as np
+import pandas as pd
+
+from backend.models.data_models import PatientProfile, RiskLevel
+from backend.services.name_index import NameIndex
+from backend.services.risk_scoring import MODEL_ID, SEX_INPUT, rescore, risk_levels, score_arrays, sex_inputs
+from backend.services.roster_store import DEFAULT_HEIGHT, RosterStore
+
+# Bump when the parsed column layout (ROSTER_COLUMNS or parsing rules) changes
+SNAPSHOT_VERSION = 6
+
+# Parsed roster, one numpy array per field
+ROSTER_COLUMNS = (
+    "user_id", "name", "age", "risk_level", "risk_score_numeric",
+    "a1c", "fbs", "systolic_bp", "diastolic_bp", "ldl", "hdl", "total_cholesterol", "weight",
+    "motivation_level", "physician_name", "triglycerides", "sex", "family_history", "risk_source",
+)
+# Where each roster column lands on a PatientProfile (dotted = nested model)
+PROFILE_FIELDS = {
+    "name": "name", "age": "age", "risk_level": "diabetes_risk_score", "risk_score_numeric": "risk_score_numeric",
+    "a1c": "biomarkers.a1c", "fbs": "biomarkers.fbs", "systolic_bp": "biomarkers.systolic_bp",
+    "diastolic_bp": "biomarkers.diastolic_bp", "ldl": "biomarkers.ldl", "hdl": "biomarkers.hdl",
+    "total_cholesterol": "biomarkers.total_cholesterol", "weight": "biomarkers.weight",
+    "motivation_level": "motivation_level", "physician_name": "physician_name",
+    "triglycerides": "biomarkers.triglycerides", "sex": "sex", "family_history": "family_history",
+    "risk_source": "risk_source",
+}
+
+# Sheet lab columns and the value used when a column is absent
+LAB_DEFAULTS = {"A1c": 0, "FBS": 0, "LDL": 0, "HDL": 0, "Total_Cholesterol": 0, "BMI": 25, "TG": 0}
+
+_BP_PATTERN = r"^\s*([+-]?\d+)\s*/\s*([+-]?\d+)\s*$"
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _text(series: pd.Series, default: str) -> pd.Series:
+    """Strings as str() would render them, with blanks/NaN replaced by `default`."""
+    if pd.api.types.is_float_dtype(series) and series.dropna().mod(1).eq(0).all():
+        series = series.astype("Int64")  # IDs read as float because of a blank cell: 1001.0 -> "1001"
+    return series.astype(object).where(series.notna(), default).astype(str)
+
+
+def parse_roster(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Column-wise parse of the PREVENT sheet into ROSTER_COLUMNS arrays.
+    Rows without an ID or with an unparseable Age / Years to DM / Blood Pressure
+    are dropped (and counted in the log line), as the row-by-row loader did.
+    risk_score_numeric is computed from the biomarkers (see risk_scoring).
+    The sheet's Diabetes Risk level is kept as given, with its
+    Risk_Model_Name_&_VersionDate as risk_source; rows without one get the
+    level of the computed score and risk_source MODEL_ID.
+    """
+    def column(name, default):
+        return df[name] if name in df.columns else pd.Series(default, index=df.index)
+
+    def numeric(name, default):
+        return pd.to_numeric(column(name, default), errors="coerce")
+
+    user_id = _text(column("PREVENT_ID", ""), "")
+
+    # "120/80"; anything without a slash falls back to 120/80, a malformed pair drops the row
+    bp = column("Blood Pressure", "120/80").astype(str)
+    bp_parts = bp.str.extract(_BP_PATTERN)
+    has_slash = bp.str.contains("/", regex=False)
+    systolic = pd.to_numeric(bp_parts[0], errors="coerce").where(has_slash, 120)
+    diastolic = pd.to_numeric(bp_parts[1], errors="coerce").where(has_slash, 80)
+
+    # Text risk labels; anything that is not High/Low counts as Moderate, blanks are scored below
+    risk_cells = column("Diabetes Risk", None)
+    risk_text = risk_cells.astype(str)
+    risk_given = (risk_cells.notna() & (risk_text.str.strip() != "")).to_numpy()
+    risk_level = np.select(
+        [risk_text.str.contains("High", regex=False), risk_text.str.contains("Low", regex=False)],
+        [RiskLevel.HIGH.value, RiskLevel.LOW.value],
+        default=RiskLevel.MODERATE.value,
+    )
+
+    age = numeric("Age", 30)
+    years_to_dm = numeric("Years to DM", 5)
+
+    # Lab values: a blank cell stays NaN (it scores nothing), text that is not a number drops the row
+    lab_cells = {name: column(name, default) for name, default in LAB_DEFAULTS.items()}
+    labs = {name: pd.to_numeric(cells, errors="coerce") for name, cells in lab_cells.items()}
+    readable_labs = np.logical_and.reduce([lab_cells[name].isna() | labs[name].notna() for name in labs])
+
+    valid = (user_id != "") & age.notna() & years_to_dm.notna() & systolic.notna() & diastolic.notna() & readable_labs
+    dropped = int((~valid).sum())
+    if dropped:
+        print(f"DataLoader: Skipped {dropped} rows with a missing ID or unparseable Age / Years to DM / Blood Pressure "
+              f"/ lab value.")
+
+    # "Family History": yes/no, or free text that counts when it mentions diabetes; blank is unknown (NaN)
+    history_text = column("Family History", None).astype(str).str.strip().str.lower()
+    history = np.where(history_text.str.contains("diab|^(?:yes|y|true|1)$", regex=True), 1.0, 0.0)
+    history = np.where(column("Family History", None).isna() | (history_text == ""), np.nan, history)
+
+    mask = valid.to_numpy()
+    columns = {
+        "user_id": user_id.to_numpy(dtype=str),
+        "name": _text(column("Name", "User"), "User").to_numpy(dtype=str),
+        "age": age.to_numpy(dtype=np.float64),
+        "risk_level": risk_level.astype(str),
+        "a1c": labs["A1c"].to_numpy(dtype=np.float64),
+        "fbs": labs["FBS"].to_numpy(dtype=np.float64),
+        "systolic_bp": systolic.to_numpy(dtype=np.float64),
+        "diastolic_bp": diastolic.to_numpy(dtype=np.float64),
+        "ldl": labs["LDL"].to_numpy(dtype=np.float64),
+        "hdl": labs["HDL"].to_numpy(dtype=np.float64),
+        "total_cholesterol": labs["Total_Cholesterol"].to_numpy(dtype=np.float64),
+        # Only BMI is known: weight is the one that gives that BMI at DEFAULT_HEIGHT, so Biomarkers.bmi round-trips
+        "weight": (labs["BMI"] * (DEFAULT_HEIGHT / 100) ** 2).to_numpy(dtype=np.float64),
+        "motivation_level": _text(column("Behavioral Segment", "Unknown"), "Unknown").to_numpy(dtype=str),
+        # The PREVENT export calls it "Doctor Name"; older sheets used "Physician"
+        "physician_name": _text(column("Physician" if "Physician" in df.columns else "Doctor Name", "Dr. Smith"),
+                                "Dr. Smith").to_numpy(dtype=str),
+        "triglycerides": labs["TG"].to_numpy(dtype=np.float64),
+        "sex": _text(column("Sex", ""), "").str.strip().to_numpy(dtype=str),
+        "family_history": history,
+        "risk_source": np.where(risk_given, _text(column("Risk_Model_Name_&_VersionDate", "sheet"), "sheet"),
+                                MODEL_ID).astype(str),
+    }
+    columns = {name: values[mask] for name, values in columns.items()}
+    # Integer fields truncate like int() did, now that the unparseable rows are gone
+    for name in ("age", "systolic_bp", "diastolic_bp"):
+        columns[name] = columns[name].astype(np.int64)
+    scores = score_arrays({
+        "fbs": columns["fbs"], "bmi": columns["weight"] / (DEFAULT_HEIGHT / 100) ** 2, "hdl": columns["hdl"],
+        "family_history": columns["family_history"], "triglycerides": columns["triglycerides"],
+        "systolic_bp": columns["systolic_bp"], "diastolic_bp": columns["diastolic_bp"],
+        SEX_INPUT: sex_inputs(columns["sex"]),
+    })["score"]
+    columns["risk_score_numeric"] = scores
+    derived = ~risk_given[mask]
+    columns["risk_level"][derived] = risk_levels(scores[derived])
+    return {name: columns[name] for name in ROSTER_COLUMNS}
+
+
+def diff_rosters(old: Dict[str, np.ndarray], new: Dict[str, np.ndarray]) -> Dict:
+    """
+    Compares two parsed rosters by PREVENT_ID. Returns the added and removed
+    user_ids and, for changed ones, which ROSTER_COLUMNS differ. Column values
+    are compared as whole arrays, one column at a time.
+    """
+    old_rows = {user_id: i for i, user_id in enumerate(old["user_id"].tolist())} if old else {}
+    new_rows = {user_id: i for i, user_id in enumerate(new["user_id"].tolist())} if new else {}
+    common = [user_id for user_id in new_rows if user_id in old_rows]
+    changed: Dict[str, List[str]] = {}
+    if common:
+        old_index = np.fromiter((old_rows[user_id] for user_id in common), dtype=np.int64, count=len(common))
+        new_index = np.fromiter((new_rows[user_id] for user_id in common), dtype=np.int64, count=len(common))
+        for name in ROSTER_COLUMNS:
+            if name == "user_id":
+                continue
+            before, after = old[name][old_index], new[name][new_index]
+            differs = before != after
+            if before.dtype.kind == "f":
+                differs &= ~(np.isnan(before) & np.isnan(after))
+            for position in np.flatnonzero(differs).tolist():
+                changed.setdefault(common[position], []).append(name)
+    return {
+        "added": [user_id for user_id in new_rows if user_id not in old_rows],
+        "changed": changed,
+        "removed": [user_id for user_id in old_rows if user_id not in new_rows],
+    }
+
+
+def patch_profile(target: PatientProfile, source: PatientProfile, columns: List[str]):
+    """
+    Copies the fields backing `columns` from a roster profile onto a session's
+    profile, then rescores just that profile if a biomarker changed.
+    """
+    for column in columns:
+        path = PROFILE_FIELDS[column].split(".")
+        src, dst = source, target
+        for attr in path[:-1]:
+            src, dst = getattr(src, attr), getattr(dst, attr)
+        setattr(dst, path[-1], getattr(src, path[-1]))
+    if any(PROFILE_FIELDS[column].startswith("biomarkers.") for column in columns):
+        rescore(target)
+    target.touch()
+
 
 class DataLoader:
-    def __init__(self, file_path: str):
+    """
+    Loads the patient roster from the PREVENT xlsx.
+
+    Parsing is column-wise (see parse_roster). The parsed columns are cached in
+    an .npz snapshot under ANTIGRAVITY_ROSTER_CACHE_DIR (default: a .cache
+    folder next to the sheet), keyed by the sheet's path, mtime/size and
+    SHA-256, so later starts skip openpyxl entirely. Set the variable to an
+    empty string to disable the snapshot.
+
+    Once loaded, the roster lives in a RosterStore (compact columns; a
+    PatientProfile is built only when one is looked up).
+    """
+
+    def __init__(self, file_path: str, cache_dir: str = None):
         self.file_path = file_path
-        self._cache: Dict[str, PatientProfile] = {}
+        if cache_dir is None:
+            cache_dir = os.getenv("ANTIGRAVITY_ROSTER_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(file_path)), ".cache"))
+        self.cache_dir = cache_dir
+        self._cache: Optional[RosterStore] = None
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+        self._name_index: Optional[NameIndex] = None
+        # How the last load_columns() was served: "snapshot", "excel" or None
+        self.source: Optional[str] = None
 
-    def load_data(self) -> Dict[str, PatientProfile]:
-        if self._cache:
-            return self._cache
+    @property
+    def snapshot_path(self) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        key = hashlib.sha256(os.path.abspath(self.file_path).encode("utf-8")).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(self.file_path))[0]
+        return os.path.join(self.cache_dir, f"{stem}.{key}.roster.npz")
+
+    def _read_snapshot(self, stat: os.stat_result) -> Optional[Dict[str, np.ndarray]]:
+        path = self.snapshot_path
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as snapshot:
+                meta = snapshot["__meta__"].tolist()
+                if int(meta[0]) != SNAPSHOT_VERSION:
+                    return None
+                same_file = (int(meta[1]), int(meta[2])) == (stat.st_mtime_ns, stat.st_size)
+                # mtime changed (copy, touch, checkout): still valid if the content is identical
+                if not same_file and meta[3] != _file_sha256(self.file_path):
+                    return None
+                columns = {name: snapshot[name] for name in ROSTER_COLUMNS}
+            if not same_file:
+                self._write_snapshot(columns, stat, meta[3])
+            return columns
+        except Exception as e:
+            print(f"DataLoader: Ignoring unreadable roster snapshot {path}: {e}")
+            return None
+
+    def _write_snapshot(self, columns: Dict[str, np.ndarray], stat: os.stat_result, sha256: str):
+        path = self.snapshot_path
+        if not path:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            meta = np.array([str(SNAPSHOT_VERSION), str(stat.st_mtime_ns), str(stat.st_size), sha256])
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, __meta__=meta, **columns)
+            os.replace(tmp_path, path)  # atomic: concurrent workers never read a partial file
+        except OSError as e:
+            print(f"DataLoader: Could not write roster snapshot {path}: {e}")
+
+    def load_columns(self) -> Dict[str, np.ndarray]:
+        """The parsed roster as ROSTER_COLUMNS arrays (empty if the sheet is missing or unreadable)."""
+        if self._columns is not None:
+            return self._columns
+        if self._cache is not None:
+            return self._cache.columns()  # decoded on demand; only the compact store stays resident
 
         if not os.path.exists(self.file_path):
             print(f"Warning: Data file {self.file_path} not found.")
             return {}
 
-        try:
-            df = pd.read_excel(self.file_path)
-            # Map columns to schema
-            for _, row in df.iterrows():
-                try:
-                    # Parse BP (e.g., "120/80")
-                    bp = str(row.get('Blood Pressure', '120/80'))
-                    if '/' in bp:
-                        systolic, diastolic = map(int, bp.split('/'))
-                    else:
-                        systolic, diastolic = 120, 80
-
-                    # Parse Risk Level (1-High, 2-Moderate, 3-Low) or text
-                    risk_val = row.get('Diabetes Risk', 'Moderate')
-                    risk_enum = RiskLevel.MODERATE
-                    if isinstance(risk_val, str):
-                        if 'High' in risk_val: risk_enum = RiskLevel.HIGH
-                        elif 'Low' in risk_val: risk_enum = RiskLevel.LOW
-                    
-                    user_id = str(row.get('PREVENT_ID', ''))
-                    if not user_id: continue
-
-                    biomarkers = Biomarkers(
-                        a1c=float(row.get('A1c', 0)),
-                        fbs=float(row.get('FBS', 0)),
-                        systolic_bp=systolic,
-                        diastolic_bp=diastolic,
-                        ldl=float(row.get('LDL', 0)),
-                        hdl=float(row.get('HDL', 0)),
-                        total_cholesterol=float(row.get('Total_Cholesterol', 0)),
-                        weight=float(row.get('BMI', 25) * 2.5), # Rough est since we don't have weight, only BMI
-                        height=170 # Default
-                    )
-                    
-                    profile = PatientProfile(
-                        user_id=user_id,
-                        name=str(row.get('Name', 'User')),
-                        age=int(row.get('Age', 30)),
-                        diabetes_risk_score=risk_enum,
-                        risk_score_numeric=int(row.get('Years to DM', 5) * 10), # Mock mapping
-                        biomarkers=biomarkers,
-                        motivation_level=str(row.get('Behavioral Segment', 'Unknown')),
-                        physician_name=str(row.get('Physician', 'Dr. Smith'))
-                    )
-                    
-                    self._cache[user_id] = profile
-                except Exception as e:
-                    print(f"Error skipping row {row.get('PREVENT_ID')}: {e}")
-                    continue
-                    
-        except Exception as e:
-            print(f"Error loading excel: {e}")
-            return {}
+        stat = os.stat(self.file_path)
+        columns = self._read_snapshot(stat)
+        if columns is not None:
+            self.source = "snapshot"
+        else:
+            try:
+                columns = parse_roster(pd.read_excel(self.file_path))
+            except Exception as e:
+                print(f"Error loading excel: {e}")
+                return {}
+            self.source = "excel"
+            self._write_snapshot(columns, stat, _file_sha256(self.file_path))
+        self._columns = columns
+        return columns
 
+    def load_data(self) -> RosterStore:
+        """The roster as a user_id -> PatientProfile mapping; profiles are built on first access."""
+        if self._cache is not None:
+            return self._cache
+        columns = self.load_columns()
+        if not columns:
+            return RosterStore({})  # not cached: a later call retries the sheet
+        self._cache = RosterStore(columns)
+        self._columns = None
         return self._cache
 
+    @property
+    def name_index(self) -> Optional[NameIndex]:
+        """
+        Built on first access. RosterRegistry.load()/reload() build it in their
+        worker thread, so API name lookups find it ready.
+        """
+        if self._name_index is None:
+            store = self.load_data()
+            if len(store):
+                self._name_index = NameIndex(store.user_ids.tolist(), store.names())
+        return self._name_index
+
+    @name_index.setter
+    def name_index(self, index: Optional[NameIndex]):
+        self._name_index = index
+
     def get_patient_by_name(self, name: str) -> Optional[PatientProfile]:
         """Case-insensitive search for patient by name."""
-        self.load_data() # Ensure data is loaded
-        name_lower = name.lower().strip()
-        for profile in self._cache.values():
-            if profile.name.lower() == name_lower:
-                return profile
-        return None
+        index = self.name_index # Loads the roster if needed
+        if index is None:
+            return None
+        matches = index.exact(name)
+        return self._cache.get(matches[0]) if matches else None
 
+    def search_patients(self, query: str, limit: int = 20, offset: int = 0) -> Dict:
+        """Ranked exact / prefix / fuzzy name matches (see NameIndex.search)."""
+        index = self.name_index
+        if index is None:
+            return {"query": query, "total": 0, "offset": offset, "limit": limit, "results": []}
+        return index.search(query, limit=limit, offset=offset)
@@ -0,0 +1,262 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+import aiosqlite
+
+# Applied once when a pooled connection is opened (not per query).
+CONNECTION_PRAGMAS = (
+    # Must precede journal_mode to take effect on a new file; existing files
+    # switch over on their next full VACUUM (see MaintenanceJob).
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    # NORMAL is durable across app crashes in WAL mode; FULL also survives power loss (fsync per commit)
+    f"PRAGMA synchronous={os.getenv('ANTIGRAVITY_DB_SYNCHRONOUS', 'NORMAL')}",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+)
+READER_PRAGMAS = ("PRAGMA query_only=ON",)
+
+# sqlite3 keeps a per-connection LRU of prepared statements keyed by SQL text.
+# Long-lived connections + module-level SQL constants mean each statement is
+# compiled once per connection instead of once per request.
+STATEMENT_CACHE_SIZE = 256
+
+WriteOp = Callable[[aiosqlite.Connection], Awaitable[Any]]
+
+
+class _OpFailed(Exception):
+    """An operation failed during a batch's fast path (see SQLitePool._run_batch)."""
+
+
+class SQLitePool:
+    """
+    Long-lived connection pool for a single SQLite file.
+
+    - One dedicated writer connection fed by a queue. Whatever is queued when the
+      writer wakes up is committed as one transaction (group commit). If an
+      operation fails, the batch is replayed with every operation inside its own
+      SAVEPOINT, so a failing op never rolls back its neighbours.
+    - A pool of read-only connections that run concurrently under WAL, so reads
+      never wait behind writes.
+    """
+
+    def __init__(self, db_path: str, readers: int = 4, max_batch: int = 64):
+        self.db_path = db_path
+        self.reader_count = max(1, readers)
+        self.max_batch = max(1, max_batch)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle_readers: Optional[asyncio.Queue] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+        # Observability
+        self.stats = {"write_ops": 0, "write_batches": 0, "write_errors": 0, "isolated_replays": 0, "reads": 0, "max_queue_depth": 0}
+
+    @property
+    def started(self) -> bool:
+        return self._writer_task is not None and not self._writer_task.done()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def _open(self, read_only: bool) -> aiosqlite.Connection:
+        # isolation_level=None: we issue BEGIN/COMMIT ourselves instead of relying
+        # on sqlite3's implicit transactions.
+        db = await aiosqlite.connect(self.db_path, isolation_level=None, cached_statements=STATEMENT_CACHE_SIZE)
+        for pragma in CONNECTION_PRAGMAS:
+            await db.execute(pragma)
+        if read_only:
+            for pragma in READER_PRAGMAS:
+                await db.execute(pragma)
+        return db
+
+    def _reset_if_stale(self):
+        """
+        Drops connections that were opened on an event loop that is no longer
+        running (e.g. a test fixture's loop). They cannot be awaited anymore, so
+        their worker threads are stopped synchronously.
+        """
+        if self._loop is None or self._loop is asyncio.get_running_loop():
+            return
+        for conn in [self._writer, *self._readers]:
+            if conn is not None:
+                conn.stop()
+        self._writer, self._readers = None, []
+        self._idle_readers = self._queue = self._writer_task = None
+        self._start_lock = None
+        self._loop = None
+
+    async def start(self):
+        self._reset_if_stale()
+        if self.started:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.started:
+                return
+            self._loop = asyncio.get_running_loop()
+            self._writer = await self._open(read_only=False)
+            self._readers = [await self._open(read_only=True) for _ in range(self.reader_count)]
+            self._idle_readers = asyncio.Queue()
+            for conn in self._readers:
+                self._idle_readers.put_nowait(conn)
+            self._queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer_loop())
+
+    async def close(self):
+        """Drains every queued write, then closes all connections."""
+        if self._loop is not None and self._loop is not asyncio.get_running_loop():
+            self._reset_if_stale()
+            return
+        if self._writer_task is not None:
+            if not self._writer_task.done():
+                self._queue.put_nowait(None)
+            await self._writer_task
+        for conn in [self._writer, *self._readers]:
+            if conn is not None:
+                await conn.close()
+        self._writer, self._readers = None, []
+        self._idle_readers = self._queue = self._writer_task = None
+        self._start_lock = None
+        self._loop = None
+
+    async def write(self, op: WriteOp, transaction: bool = True) -> Any:
+        """
+        Queues `op(db)` for the writer connection and waits until its
+        transaction is committed. `op` must not commit or roll back itself.
+
+        With `transaction=False`, `op` runs on its own between batches, outside
+        any transaction (for VACUUM, wal_checkpoint and similar statements).
+        """
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((op, future, transaction))
+        depth = self._queue.qsize()
+        if depth > self.stats["max_queue_depth"]:
+            self.stats["max_queue_depth"] = depth
+        return await future
+
+    @asynccontextmanager
+    async def reader(self):
+        """Borrows a read-only connection from the pool."""
+        await self.start()
+        idle = self._idle_readers
+        conn = await idle.get()
+        try:
+            self.stats["reads"] += 1
+            yield conn
+        finally:
+            idle.put_nowait(conn)
+
+    async def _writer_loop(self):
+        held = None
+        while True:
+            item, held = held or await self._queue.get(), None
+            if item is None:
+                return
+            if not item[2]:
+                await self._run_standalone(item[0], item[1])
+                continue
+            batch: List[Tuple[WriteOp, asyncio.Future]] = [item[:2]]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    nxt = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                if not nxt[2]:
+                    held = nxt  # runs right after this batch, keeping queue order
+                    break
+                batch.append(nxt[:2])
+            await self._run_batch(batch)
+            if stop:
+                return
+
+    async def _run_standalone(self, op: WriteOp, future: asyncio.Future):
+        if future.cancelled():
+            return
+        self.stats["write_ops"] += 1
+        try:
+            result = await op(self._writer)
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    async def _run_batch(self, batch: List[Tuple[WriteOp, asyncio.Future]]):
+        batch = [(op, future) for op, future in batch if not future.cancelled()]
+        if not batch:
+            return
+        try:
+            try:
+                # Fast path: the whole batch in one transaction, no per-op savepoints
+                outcomes = await self._run_transaction(batch, isolate=False)
+            except _OpFailed:
+                # Some op failed: replay the batch with every op isolated in a
+                # SAVEPOINT so the others still commit
+                self.stats["isolated_replays"] += 1
+                outcomes = await self._run_transaction(batch, isolate=True)
+        except Exception as e:
+            # The transaction itself failed (disk full, lock timeout...): nothing
+            # in this batch was committed.
+            print(f"SQLitePool: write batch of {len(batch)} failed: {e}")
+            self.stats["write_errors"] += len(batch)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats["write_batches"] += 1
+        for future, value, ok in outcomes:
+            self.stats["write_ops"] += 1
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                self.stats["write_errors"] += 1
+                future.set_exception(value)
+
+    async def _run_transaction(self, batch: List[Tuple[WriteOp, asyncio.Future]], isolate: bool) -> list:
+        db = self._writer
+        outcomes = []
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            for op, future in batch:
+                if isolate:
+                    await db.execute("SAVEPOINT op")
+                try:
+                    result = await op(db)
+                except Exception as e:
+                    if not isolate:
+                        raise _OpFailed() from e
+                    await db.execute("ROLLBACK TO op")
+                    await db.execute("RELEASE op")
+                    outcomes.append((future, e, False))
+                else:
+                    if isolate:
+                        await db.execute("RELEASE op")
+                    outcomes.append((future, result, True))
+            await db.execute("COMMIT")
+        except BaseException:
+            try:
+                await db.execute("ROLLBACK")
+            except Exception:
+                pass
+            raise
+        return outcomes
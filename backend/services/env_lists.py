@@ -0,0 +1,6 @@
+from typing import Optional, Set
+
+
+def parse_names(value: Optional[str]) -> Set[str]:
+    """Names in a comma-separated setting such as ANTIGRAVITY_RESPONSE_CACHE ("A, B,,C" -> {"A", "B", "C"})."""
+    return {name.strip() for name in (value or "").split(",") if name.strip()}
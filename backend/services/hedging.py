@@ -0,0 +1,110 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+from backend.services.env_lists import parse_names
+from backend.services.provider_health import ProviderHealth
+
+
+class HedgePolicy:
+    """
+    When and how often MCPServer hedges an LLM call.
+
+    For a hedged signature, if the first provider hasn't answered within its
+    ANTIGRAVITY_HEDGE_PERCENTILE (95th) latency, the same request is also
+    sent to the next healthy provider and whichever answers first wins; the
+    other call is cancelled (a sync predictor running in a worker thread
+    can't be interrupted, so its answer is just ignored). Until a provider has
+    ANTIGRAVITY_HEDGE_MIN_SAMPLES (20) latencies, ANTIGRAVITY_HEDGE_DELAY_MS
+    (2000) is used instead; the delay never drops below
+    ANTIGRAVITY_HEDGE_MIN_DELAY_MS (100).
+
+    Every hedge is an extra upstream call, so they are budgeted:
+    - each hedgeable request earns ANTIGRAVITY_HEDGE_MAX_RATE (0.1) of a hedge
+      and a hedge spends a whole one, so at most ~10% of requests hedge over
+      time, with bursts of up to ANTIGRAVITY_HEDGE_BURST (5);
+    - at most ANTIGRAVITY_HEDGE_MAX_IN_FLIGHT (4) hedges run at once.
+    The extra calls and their estimated prompt tokens (4 chars per token) are
+    counted in `stats`.
+
+    Which signatures are hedged:
+      ANTIGRAVITY_HEDGE_SIGNATURES  "" (off, default), "*" or "IntakeSignature,EducationSignature"
+    """
+
+    def __init__(self, signatures: str = None, percentile: float = None, max_rate: float = None,
+                 burst: float = None, max_in_flight: int = None):
+        self.signatures = parse_names(signatures if signatures is not None else os.getenv("ANTIGRAVITY_HEDGE_SIGNATURES", ""))
+        self.percentile = percentile or float(os.getenv("ANTIGRAVITY_HEDGE_PERCENTILE", "95"))
+        self.min_samples = int(os.getenv("ANTIGRAVITY_HEDGE_MIN_SAMPLES", "20"))
+        self.default_delay_ms = float(os.getenv("ANTIGRAVITY_HEDGE_DELAY_MS", "2000"))
+        self.min_delay_ms = float(os.getenv("ANTIGRAVITY_HEDGE_MIN_DELAY_MS", "100"))
+        self.max_rate = max_rate if max_rate is not None else float(os.getenv("ANTIGRAVITY_HEDGE_MAX_RATE", "0.1"))
+        self.burst = burst if burst is not None else float(os.getenv("ANTIGRAVITY_HEDGE_BURST", "5"))
+        self.max_in_flight = max_in_flight if max_in_flight is not None else int(os.getenv("ANTIGRAVITY_HEDGE_MAX_IN_FLIGHT", "4"))
+
+        self._tokens = min(1.0, self.burst)
+        self._in_flight = 0
+
+        # Observability
+        self.stats = {
+            "requests": 0,          # hedgeable requests seen
+            "hedges": 0,            # extra upstream calls sent
+            "hedge_wins": 0,        # ... that answered first
+            "primary_wins": 0,      # hedged, but the first provider still answered first
+            "cancelled": 0,         # losing calls cancelled (or left to be ignored)
+            "over_budget": 0,       # hedge wanted but the rate / in-flight cap said no
+            "no_backup": 0,         # hedge wanted but no other healthy provider
+            "extra_prompt_tokens_est": 0,
+        }
+
+    def enabled_for(self, signature_name: str) -> bool:
+        return "*" in self.signatures or signature_name in self.signatures
+
+    def configure(self, signature_name: str, enabled: bool):
+        """Turns hedging on or off for one signature at runtime."""
+        if enabled:
+            self.signatures.add(signature_name)
+        else:
+            self.signatures.discard(signature_name)
+
+    def admit(self):
+        """Counts a hedgeable request and earns its share of the hedge budget."""
+        self.stats["requests"] += 1
+        self._tokens = min(self.burst, self._tokens + self.max_rate)
+
+    def delay_for(self, health: ProviderHealth, provider: str) -> float:
+        """Seconds to wait on `provider` before hedging: its latency percentile, or the default."""
+        latency_ms = health.latency_percentile(provider, self.percentile, self.min_samples)
+        if latency_ms is None:
+            latency_ms = self.default_delay_ms
+        return max(self.min_delay_ms, latency_ms) / 1000
+
+    def acquire(self) -> bool:
+        """Claims budget for one hedge; False (and counted) when over the rate or in-flight cap."""
+        if self._tokens < 1 or self._in_flight >= self.max_in_flight:
+            self.stats["over_budget"] += 1
+            return False
+        self._tokens -= 1
+        self._in_flight += 1
+        return True
+
+    def release(self, refund: bool = False):
+        """Ends a hedge; `refund` returns its budget when no backup provider was available after all."""
+        self._in_flight -= 1
+        if refund:
+            self.stats["no_backup"] += 1
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def record_hedge(self, inputs: Dict[str, Any]):
+        self.stats["hedges"] += 1
+        self.stats["extra_prompt_tokens_est"] += len(json.dumps(inputs, default=str)) // 4
+
+    def record_outcome(self, hedge_won: Optional[bool], cancelled: int):
+        """hedge_won is None when neither call succeeded."""
+        if hedge_won is not None:
+            self.stats["hedge_wins" if hedge_won else "primary_wins"] += 1
+        self.stats["cancelled"] += cancelled
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.stats["hedges"] / self.stats["requests"] if self.stats["requests"] else 0.0
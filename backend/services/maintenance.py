@@ -0,0 +1,391 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+import aiosqlite
+
+from backend.models.data_models import Message
+from backend.services import state_codec
+from backend.services.db_pool import SQLitePool
+from backend.services.persistence import (
+    CREATE_ARCHIVED_SESSIONS, DELETE_ARCHIVED, DELETE_MESSAGES, DELETE_SUMMARY, SELECT_SUMMARY,
+    UPSERT_SUMMARY, archive_path,
+)
+
+SELECT_IDLE_USERS = """
+    SELECT user_id, updated_at FROM user_states
+    WHERE updated_at < ? AND (updated_at, user_id) > (?, ?)
+    ORDER BY updated_at, user_id LIMIT ?
+"""
+SELECT_STATE_FOR_ARCHIVE = """
+    SELECT current_agent, patient_profile, context_variables, message_count, updated_at
+    FROM user_states WHERE user_id = ?
+"""
+SELECT_ALL_MESSAGES = "SELECT seq, role, content, timestamp FROM messages WHERE user_id = ? ORDER BY seq"
+ARCHIVE_SESSION = """
+    INSERT OR REPLACE INTO archived_sessions
+    (user_id, current_agent, patient_profile, context_variables, message_count, messages,
+     summary_through_seq, summarized_count, summary, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# Only removes the hot row if nobody touched the session since it was copied
+DELETE_UNCHANGED_STATE = "DELETE FROM user_states WHERE user_id = ? AND updated_at = ? AND message_count IS ?"
+
+SELECT_LONG_CONVERSATIONS = "SELECT user_id FROM user_states WHERE message_count > ? AND user_id > ? ORDER BY user_id LIMIT ?"
+# seq of the newest message that falls outside the `keep` most recent ones
+SELECT_COMPACTION_CUTOFF = "SELECT seq FROM messages WHERE user_id = ? ORDER BY seq DESC LIMIT 1 OFFSET ?"
+SELECT_MESSAGES_THROUGH = "SELECT seq, role, content, timestamp FROM messages WHERE user_id = ? AND seq <= ? ORDER BY seq"
+COUNT_MESSAGES_THROUGH = "SELECT COUNT(*) FROM messages WHERE user_id = ? AND seq <= ?"
+DELETE_MESSAGES_THROUGH = "DELETE FROM messages WHERE user_id = ? AND seq <= ?"
+
+PURGE_INTERACTIONS = """
+    DELETE FROM llm_interactions WHERE id IN
+    (SELECT id FROM llm_interactions WHERE timestamp < ? ORDER BY id LIMIT ?)
+"""
+
+SUMMARY_MAX_CHARS = 4000
+SUMMARY_LINE_CHARS = 160
+
+
+def extractive_summary(messages: List[Message], previous: Optional[str] = None) -> str:
+    """
+    Default compaction summary: the previous summary followed by one clipped
+    line per compacted message, trimmed from the front to SUMMARY_MAX_CHARS.
+    Cheap and deterministic; pass an LLM-backed `summarize` to MaintenanceJob
+    for abstractive summaries.
+    """
+    lines = [previous] if previous else []
+    for message in messages:
+        text = " ".join(message.content.split())
+        if len(text) > SUMMARY_LINE_CHARS:
+            text = text[:SUMMARY_LINE_CHARS - 3] + "..."
+        lines.append(f"{message.role}: {text}")
+    summary = "\n".join(lines)
+    if len(summary) > SUMMARY_MAX_CHARS:
+        summary = "..." + summary[-(SUMMARY_MAX_CHARS - 3):]
+    return summary
+
+
+def _utc_cutoff(days: float) -> str:
+    # Same format as CURRENT_TIMESTAMP / audit timestamps, so plain string comparison works
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _files_size(paths: List[str]) -> int:
+    total = 0
+    for path in paths:
+        for suffix in ("", "-wal"):
+            if os.path.exists(path + suffix):
+                total += os.path.getsize(path + suffix)
+    return total
+
+
+class MaintenanceJob:
+    """
+    Background retention and compaction for the SQLite shards.
+
+    Each pass, per shard:
+    1. Archive: sessions idle for ANTIGRAVITY_ARCHIVE_AFTER_DAYS move (state,
+       messages, summary) to the shard's cold archive file. AsyncPersistence
+       restores them transparently on the user's next load.
+    2. Compact: conversations with more than ANTIGRAVITY_COMPACT_KEEP_MESSAGES
+       stored messages have their oldest turns folded into message_summaries.
+    3. Audit retention: llm_interactions older than
+       ANTIGRAVITY_AUDIT_RETENTION_DAYS are deleted (0 keeps them forever).
+    4. Vacuum: free pages are returned to the OS with incremental_vacuum and the
+       WAL is checkpointed and truncated.
+
+    All work is done in small batches queued on the shard's writer like any
+    other write, with a pause between batches; while the chat path has writes
+    queued the job backs off, so it never holds the write lock for long.
+    Every pass returns (and keeps in `last_report`) the rows, bytes and time
+    each step reclaimed.
+    """
+
+    def __init__(self, persistence, is_active: Callable[[str], bool] = None,
+                 summarize: Callable[[List[Message], Optional[str]], str] = None):
+        self.persistence = persistence
+        # Sessions the app still holds in memory are never archived
+        self.is_active = is_active or (lambda user_id: False)
+        self.summarize = summarize or extractive_summary
+
+        self.interval = float(os.getenv("ANTIGRAVITY_MAINTENANCE_INTERVAL_S", "3600"))  # 0 disables the background loop
+        self.archive_after_days = float(os.getenv("ANTIGRAVITY_ARCHIVE_AFTER_DAYS", "30"))  # 0 disables archiving
+        self.compact_keep = int(os.getenv("ANTIGRAVITY_COMPACT_KEEP_MESSAGES", "500"))  # 0 disables compaction
+        self.audit_retention_days = float(os.getenv("ANTIGRAVITY_AUDIT_RETENTION_DAYS", "0"))
+        self.batch_size = int(os.getenv("ANTIGRAVITY_MAINTENANCE_BATCH", "100"))
+        self.pause = float(os.getenv("ANTIGRAVITY_MAINTENANCE_PAUSE_MS", "50")) / 1000
+        self.vacuum_pages = int(os.getenv("ANTIGRAVITY_VACUUM_PAGES", "256"))
+        self.busy_queue_depth = 8  # back off while this many writes are waiting on a shard
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._run_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.last_report: Optional[Dict] = None
+        # Observability
+        self.stats = {"passes": 0, "pass_errors": 0, "archived_sessions": 0, "compacted_messages": 0,
+                      "purged_interactions": 0, "bytes_reclaimed": 0, "throttle_waits": 0}
+
+    def start(self):
+        """Starts the periodic background pass (no-op if the interval is 0)."""
+        if self.interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is not None and self._loop is loop and not self._task.done():
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._closing:
+                return
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"MaintenanceJob: pass failed: {e}")
+                self.stats["pass_errors"] += 1
+
+    async def close(self):
+        """Stops the background loop; a pass in progress stops after its current batch."""
+        if self._task is None:
+            return
+        if self._loop is asyncio.get_running_loop():
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+        self._task = None
+        self._loop = None
+
+    async def _throttle(self, pool: SQLitePool):
+        await asyncio.sleep(self.pause)
+        while pool.queue_depth >= self.busy_queue_depth and not self._closing:
+            self.stats["throttle_waits"] += 1
+            await asyncio.sleep(self.pause or 0.01)
+
+    async def run_once(self, full_vacuum: bool = False) -> Dict:
+        """
+        Runs one maintenance pass over every shard and returns its report.
+        `full_vacuum` rewrites each file with VACUUM instead of incremental
+        vacuuming (blocks the shard's writes while it runs; also switches files
+        created before incremental auto-vacuum was enabled).
+        """
+        if self._run_lock is None:
+            self._run_lock = asyncio.Lock()
+        async with self._run_lock:
+            pools = self.persistence.pools
+            paths = [pool.db_path for pool in pools]
+            started = time.perf_counter()
+            report = {
+                "started_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+                "shards": len(pools),
+                "archived_sessions": 0, "compacted_users": 0, "compacted_messages": 0,
+                "purged_interactions": 0, "freed_pages": 0, "wal_checkpointed": True,
+                "step_seconds": {"archive": 0.0, "compact": 0.0, "audit_retention": 0.0, "vacuum": 0.0},
+                "bytes_before": _files_size(paths),
+            }
+            for pool in pools:
+                for step, run in (("archive", self._archive), ("compact", self._compact),
+                                  ("audit_retention", self._purge_interactions)):
+                    step_started = time.perf_counter()
+                    await run(pool, report)
+                    report["step_seconds"][step] += time.perf_counter() - step_started
+                step_started = time.perf_counter()
+                await self._vacuum(pool, report, full_vacuum)
+                report["step_seconds"]["vacuum"] += time.perf_counter() - step_started
+
+            report["step_seconds"] = {step: round(secs, 3) for step, secs in report["step_seconds"].items()}
+            report["bytes_after"] = _files_size(paths)
+            report["bytes_reclaimed"] = max(0, report["bytes_before"] - report["bytes_after"])
+            report["elapsed_s"] = round(time.perf_counter() - started, 3)
+
+            self.stats["passes"] += 1
+            for key in ("archived_sessions", "compacted_messages", "purged_interactions", "bytes_reclaimed"):
+                self.stats[key] += report[key]
+            self.last_report = report
+            print(f"MaintenanceJob: archived {report['archived_sessions']} sessions, compacted "
+                  f"{report['compacted_messages']} messages, purged {report['purged_interactions']} audit rows, "
+                  f"reclaimed {report['bytes_reclaimed']} bytes in {report['elapsed_s']}s.")
+            return report
+
+    async def _archive(self, pool: SQLitePool, report: Dict):
+        if self.archive_after_days <= 0:
+            return
+        cutoff = _utc_cutoff(self.archive_after_days)
+        archive = None
+        last = ("", "")
+        try:
+            while not self._closing:
+                async with pool.reader() as db:
+                    cursor = await db.execute(SELECT_IDLE_USERS, (cutoff, *last, self.batch_size))
+                    idle = await cursor.fetchall()
+                    await cursor.close()
+                    if not idle:
+                        break
+                    last = (idle[-1][1], idle[-1][0])
+                    rows = []
+                    for user_id, _ in idle:
+                        if self.is_active(user_id):
+                            continue
+                        rows.append(await self._snapshot(db, user_id))
+                rows = [row for row in rows if row is not None]
+                if not rows:
+                    continue
+
+                if archive is None:
+                    archive = await aiosqlite.connect(archive_path(pool.db_path))
+                    await archive.execute(CREATE_ARCHIVED_SESSIONS)
+                await archive.executemany(ARCHIVE_SESSION, rows)
+                await archive.commit()
+
+                async def drop_hot(db: aiosqlite.Connection, rows=rows) -> List[str]:
+                    dropped = []
+                    for row in rows:
+                        user_id, message_count, updated_at = row[0], row[4], row[9]
+                        cursor = await db.execute(DELETE_UNCHANGED_STATE, (user_id, updated_at, message_count))
+                        if cursor.rowcount:
+                            await db.execute(DELETE_MESSAGES, (user_id,))
+                            await db.execute(DELETE_SUMMARY, (user_id,))
+                            dropped.append(user_id)
+                    return dropped
+
+                dropped = set(await pool.write(drop_hot))
+                # Sessions that became active while being copied stay hot; drop their stale archive copy
+                stale = [(row[0],) for row in rows if row[0] not in dropped]
+                if stale:
+                    await archive.executemany(DELETE_ARCHIVED, stale)
+                    await archive.commit()
+                report["archived_sessions"] += len(dropped)
+                await self._throttle(pool)
+        finally:
+            if archive is not None:
+                await archive.close()
+
+    @staticmethod
+    async def _snapshot(db: aiosqlite.Connection, user_id: str) -> Optional[tuple]:
+        cursor = await db.execute(SELECT_STATE_FOR_ARCHIVE, (user_id,))
+        state = await cursor.fetchone()
+        await cursor.close()
+        if state is None:
+            return None
+        cursor = await db.execute(SELECT_ALL_MESSAGES, (user_id,))
+        messages = [list(row) for row in await cursor.fetchall()]
+        await cursor.close()
+        cursor = await db.execute(SELECT_SUMMARY, (user_id,))
+        summary = await cursor.fetchone() or (None, None, None)
+        await cursor.close()
+        current_agent, profile, context, message_count, updated_at = state
+        return (user_id, current_agent, profile, context, message_count, state_codec.encode(messages),
+                *summary, updated_at)
+
+    async def _compact(self, pool: SQLitePool, report: Dict):
+        if self.compact_keep <= 0:
+            return
+        # Never compact into the window load_state brings into memory
+        keep = max(self.compact_keep, self.persistence.history_window)
+        last_user = ""
+        while not self._closing:
+            async with pool.reader() as db:
+                cursor = await db.execute(SELECT_LONG_CONVERSATIONS, (keep, last_user, self.batch_size))
+                users = [row[0] for row in await cursor.fetchall()]
+                await cursor.close()
+                if not users:
+                    break
+                last_user = users[-1]
+                work = []
+                for user_id in users:
+                    cursor = await db.execute(SELECT_COMPACTION_CUTOFF, (user_id, keep))
+                    cutoff = await cursor.fetchone()
+                    await cursor.close()
+                    if cutoff is None:
+                        continue  # already within the limit
+                    cursor = await db.execute(SELECT_MESSAGES_THROUGH, (user_id, cutoff[0]))
+                    old = await cursor.fetchall()
+                    await cursor.close()
+                    cursor = await db.execute(SELECT_SUMMARY, (user_id,))
+                    previous = await cursor.fetchone()
+                    await cursor.close()
+                    messages = [Message(role=role, content=content, timestamp=timestamp) for _, role, content, timestamp in old]
+                    summary = self.summarize(messages, previous[2] if previous else None)
+                    summarized = (previous[1] if previous else 0) + len(old)
+                    work.append((user_id, cutoff[0], len(old), summarized, summary))
+            if not work:
+                continue
+
+            async def fold(db: aiosqlite.Connection, work=work) -> tuple:
+                users = messages = 0
+                for user_id, through_seq, count, summarized, summary in work:
+                    cursor = await db.execute(COUNT_MESSAGES_THROUGH, (user_id, through_seq))
+                    (current,) = await cursor.fetchone()
+                    await cursor.close()
+                    if current != count:
+                        continue  # history was rewritten meanwhile; retry next pass
+                    await db.execute(UPSERT_SUMMARY, (user_id, through_seq, summarized, summary))
+                    await db.execute(DELETE_MESSAGES_THROUGH, (user_id, through_seq))
+                    users += 1
+                    messages += count
+                return users, messages
+
+            users, messages = await pool.write(fold)
+            report["compacted_users"] += users
+            report["compacted_messages"] += messages
+            await self._throttle(pool)
+
+    async def _purge_interactions(self, pool: SQLitePool, report: Dict):
+        if self.audit_retention_days <= 0:
+            return
+        cutoff = _utc_cutoff(self.audit_retention_days)
+
+        async def purge(db: aiosqlite.Connection) -> int:
+            cursor = await db.execute(PURGE_INTERACTIONS, (cutoff, self.batch_size * 10))
+            return cursor.rowcount
+
+        while not self._closing:
+            purged = await pool.write(purge)
+            report["purged_interactions"] += purged
+            if purged < self.batch_size * 10:
+                break
+            await self._throttle(pool)
+
+    async def _vacuum(self, pool: SQLitePool, report: Dict, full_vacuum: bool):
+        async def pragma(db: aiosqlite.Connection, sql: str):
+            cursor = await db.execute(sql)
+            row = await cursor.fetchone()
+            await cursor.close()
+            return row
+
+        async def vacuum_step(db: aiosqlite.Connection) -> int:
+            before = (await pragma(db, "PRAGMA freelist_count"))[0]
+            if full_vacuum:
+                await db.execute("VACUUM")
+            elif before and (await pragma(db, "PRAGMA auto_vacuum"))[0] == 2:  # INCREMENTAL
+                # executescript steps the pragma to completion (execute() frees one page)
+                await db.executescript(f"PRAGMA incremental_vacuum({self.vacuum_pages})")
+            else:
+                return 0
+            return before - (await pragma(db, "PRAGMA freelist_count"))[0]
+
+        async def checkpoint(db: aiosqlite.Connection) -> bool:
+            busy, _, _ = await pragma(db, "PRAGMA wal_checkpoint(TRUNCATE)")
+            return busy == 0
+
+        while not self._closing:
+            freed = await pool.write(vacuum_step, transaction=False)
+            report["freed_pages"] += freed
+            if full_vacuum or freed < self.vacuum_pages:
+                break
+            await self._throttle(pool)
+        # Readers mid-query can make the checkpoint incomplete; the next pass retries
+        if not await pool.write(checkpoint, transaction=False):
+            report["wal_checkpointed"] = False
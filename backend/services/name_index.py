@@ -0,0 +1,188 @@
+import math
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Minimum Dice similarity (over character trigrams) for a fuzzy match
+FUZZY_THRESHOLD = 0.35
+# Match kinds reported by search(), best first
+MATCH_KINDS = ("exact", "prefix", "word_prefix", "fuzzy")
+# Highest code point, used as the upper bound of a prefix range
+_MAX_CHAR = "\U0010ffff"
+
+
+def normalize_name(name: str) -> str:
+    """Casefolded, accent-stripped, whitespace-collapsed form used by every index."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+def trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Name lookups over the roster, built once when it loads.
+
+    - exact:  casefold dict, O(1)
+    - prefix: sorted keys searched with bisect, O(log n + matches); every word
+              of a name is indexed, so "jon" finds "Benjamin Jones" too
+    - fuzzy:  trigram posting lists (numpy arrays); only rows sharing enough
+              of the query's trigrams to reach the Dice threshold are scored,
+              so typos ("Abishk") match without a pass over the roster
+    """
+
+    def __init__(self, user_ids: Sequence[str], names: Sequence[str]):
+        self.user_ids = list(user_ids)
+        self.names = list(names)
+        keys = [normalize_name(name) for name in self.names]
+
+        self._exact: Dict[str, List[int]] = {}
+        prefix_entries: List[Tuple[str, int, int]] = []
+        postings: Dict[str, List[int]] = {}
+        gram_counts = np.zeros(len(keys), dtype=np.int32)
+        for i, key in enumerate(keys):
+            if not key:
+                continue
+            self._exact.setdefault(key, []).append(i)
+            words = key.split(" ")
+            for w in range(len(words)):
+                prefix_entries.append((" ".join(words[w:]), w, i))
+            grams = trigrams(key)
+            gram_counts[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+
+        prefix_entries.sort()
+        self._prefix_keys = [key for key, _, _ in prefix_entries]
+        self._prefix_lengths = np.array([len(key) for key, _, _ in prefix_entries], dtype=np.int32)
+        self._prefix_is_word = np.array([word > 0 for _, word, _ in prefix_entries], dtype=bool)
+        self._prefix_rows = np.array([row for _, _, row in prefix_entries], dtype=np.int32)
+        self._postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+        self._gram_counts = gram_counts
+        # Position of each row in name order, for tie-breaking ranked results without string compares
+        self._name_rank = np.empty(len(keys), dtype=np.int32)
+        self._name_rank[np.argsort(np.array(keys, dtype=object), kind="stable")] = np.arange(len(keys), dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def exact(self, name: str) -> List[str]:
+        """user_ids whose name matches exactly (case/accent/spacing-insensitive), roster order."""
+        return [self.user_ids[i] for i in self._exact.get(normalize_name(name), ())]
+
+    def _prefix_range(self, key: str) -> Tuple[int, int]:
+        return bisect_left(self._prefix_keys, key), bisect_left(self._prefix_keys, key + _MAX_CHAR)
+
+    def prefix(self, text: str, limit: int = 10) -> List[str]:
+        """Type-ahead: up to `limit` user_ids with a name (or any word of it) starting with `text`."""
+        key = normalize_name(text)
+        if not key:
+            return []
+        start, end = self._prefix_range(key)
+        seen, result = set(), []
+        for row in self._prefix_rows[start:end].tolist():
+            if row not in seen:
+                seen.add(row)
+                result.append(self.user_ids[row])
+                if len(result) >= limit:
+                    break
+        return result
+
+    def _fuzzy_scores(self, key: str, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        query_grams = trigrams(key) if key else set()
+        postings = [self._postings[gram] for gram in query_grams if gram in self._postings]
+        # Dice = 2 * shared / (query grams + name grams) <= 2 * shared / (query grams + shared),
+        # so a match shares at least `needed` of the query's grams
+        needed = max(1, math.ceil(threshold * len(query_grams) / (2 - threshold) - 1e-9))
+        if len(postings) < needed:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        # Count each posted row's shared grams by sorting the lists together (nothing is sized by the roster),
+        # then score only the rows that can still reach the threshold
+        posted = np.sort(np.concatenate(postings))
+        starts = np.flatnonzero(np.concatenate(([True], posted[1:] != posted[:-1])))
+        shared = np.diff(np.append(starts, len(posted)))
+        candidates = posted[starts[shared >= needed]].astype(np.int64)
+        shared = shared[shared >= needed]
+        denominators = len(query_grams) + self._gram_counts[candidates]
+        keep = 2 * shared >= threshold * denominators
+        candidates, shared, denominators = candidates[keep], shared[keep], denominators[keep]
+        return candidates, 2.0 * shared / denominators
+
+    def fuzzy(self, text: str, threshold: float = FUZZY_THRESHOLD) -> List[Tuple[str, float]]:
+        """(user_id, similarity) for every name sharing enough trigrams with `text`, best first."""
+        rows, scores = self._fuzzy_scores(normalize_name(text), threshold)
+        order = np.argsort(-scores, kind="stable")
+        return [(self.user_ids[row], score) for row, score in zip(rows[order].tolist(), scores[order].tolist())]
+
+    def search(self, text: str, limit: int = 20, offset: int = 0) -> Dict:
+        """
+        Ranked candidates for a free-text query: exact matches first, then
+        full-name prefixes, then word prefixes, then fuzzy matches. Scores are
+        in (0, 1]; ties are broken by name.
+        """
+        key = normalize_name(text)
+        offers: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+
+        def offer(rows: np.ndarray, row_scores: np.ndarray, match: str, word_match: np.ndarray = None):
+            row_kinds = np.full(len(rows), MATCH_KINDS.index(match), dtype=np.int8)
+            if word_match is not None:
+                row_kinds[word_match] = MATCH_KINDS.index("word_prefix")
+            offers.append((np.asarray(rows, dtype=np.int64), row_scores, row_kinds))
+
+        if key:
+            exact_rows = np.array(self._exact.get(key, ()), dtype=np.int64)
+            offer(exact_rows, np.ones(len(exact_rows)), "exact")
+            start, end = self._prefix_range(key)
+            if end > start:
+                # Longer coverage of the name ranks higher; full-name prefixes beat word prefixes
+                is_word = self._prefix_is_word[start:end]
+                coverage = len(key) / self._prefix_lengths[start:end]
+                offer(self._prefix_rows[start:end], np.where(is_word, 0.6, 0.8) + 0.19 * coverage, "prefix", is_word)
+            if len(key) >= 3:
+                rows, similarity = self._fuzzy_scores(key, FUZZY_THRESHOLD)
+                offer(rows, 0.6 * similarity, "fuzzy")
+
+        # Only the offered rows are scored. Keep each row's best offer (the earliest one on a tie)
+        rows = np.concatenate([rows for rows, _, _ in offers]) if offers else np.empty(0, dtype=np.int64)
+        scores = np.concatenate([scores for _, scores, _ in offers]) if offers else np.empty(0)
+        kinds = np.concatenate([kinds for _, _, kinds in offers]) if offers else np.empty(0, dtype=np.int8)
+        # Group by row, offers in order within a row: one sort of row * n + position (faster than a stable argsort)
+        order = np.sort(rows * len(rows) + np.arange(len(rows))) % max(len(rows), 1)
+        rows, scores, kinds = rows[order], scores[order], kinds[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+        if not first.all():
+            group = np.cumsum(first) - 1
+            best = np.maximum.reduceat(scores, np.flatnonzero(first))
+            at_best = np.flatnonzero(scores == best[group])
+            keep = np.ones(len(at_best), dtype=bool)
+            keep[1:] = group[at_best[1:]] != group[at_best[:-1]]
+            first = at_best[keep]
+        rows, scores, kinds = rows[first], scores[first], kinds[first]
+
+        # Rank just enough rows for the page: those scoring at least the page's last score
+        total, wanted = len(rows), offset + limit
+        if wanted < total:
+            cutoff = -np.partition(-scores, wanted - 1)[wanted - 1]
+            contenders = np.flatnonzero(scores >= cutoff)
+            rows, scores, kinds = rows[contenders], scores[contenders], kinds[contenders]
+        ranking = np.lexsort((self._name_rank[rows], -scores))
+        ranked, scores, kinds = rows[ranking], scores[ranking], kinds[ranking]
+        page = slice(offset, offset + limit)
+        return {
+            "query": text,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "results": [
+                {"user_id": self.user_ids[row], "name": self.names[row],
+                 "score": round(score, 4), "match": MATCH_KINDS[kind]}
+                for row, score, kind in zip(ranked[page].tolist(), scores[page].tolist(), kinds[page].tolist())
+            ],
+        }
@@ -0,0 +1,216 @@
+"""
+Offline INFORM outreach: personalized first messages for a roster cohort,
+generated through the MCP layer and checkpointed in SQLite.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import aiosqlite
+
+from backend.models.data_models import AgentState
+from backend.models.signatures import OutreachSignature
+from backend.services import cohort
+from backend.services.roster_store import RosterStore
+
+CREATE_OUTREACH_RUNS = """
+    CREATE TABLE IF NOT EXISTS outreach_runs (
+        run_id TEXT PRIMARY KEY,
+        query TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completed_at TIMESTAMP,
+        last_report TEXT -- JSON
+    )
+"""
+CREATE_OUTREACH_MESSAGES = """
+    CREATE TABLE IF NOT EXISTS outreach_messages (
+        run_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        status TEXT NOT NULL, -- 'generated' or 'failed' (failed ones are retried on the next run)
+        subject TEXT,
+        message TEXT,
+        error TEXT,
+        attempts INTEGER NOT NULL DEFAULT 1,
+        generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (run_id, user_id)
+    )
+"""
+INSERT_RUN = "INSERT OR IGNORE INTO outreach_runs (run_id, query) VALUES (?, ?)"
+COMPLETE_RUN = "UPDATE outreach_runs SET completed_at = CURRENT_TIMESTAMP, last_report = ? WHERE run_id = ?"
+SELECT_GENERATED = "SELECT user_id FROM outreach_messages WHERE run_id = ? AND status = 'generated'"
+UPSERT_OUTREACH = """
+    INSERT INTO outreach_messages (run_id, user_id, status, subject, message, error) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(run_id, user_id) DO UPDATE SET
+        status = excluded.status, subject = excluded.subject, message = excluded.message, error = excluded.error,
+        attempts = outreach_messages.attempts + 1, generated_at = CURRENT_TIMESTAMP
+"""
+SELECT_OUTREACH = """
+    SELECT user_id, subject, message, generated_at FROM outreach_messages
+    WHERE run_id = ? AND status = 'generated' ORDER BY user_id
+"""
+
+
+def outreach_path(db_path: str) -> str:
+    """Outreach results next to the app database, e.g. antigravity.db -> antigravity.outreach.db."""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.outreach{ext or '.db'}"
+
+
+def run_id_for(query: str) -> str:
+    """Default run id: the same cohort query resumes the same run."""
+    return "inform-" + hashlib.sha256(" ".join(query.split()).encode("utf-8")).hexdigest()[:12]
+
+
+class OutreachJob:
+    """
+    Generates INFORM outreach messages for the patients matching a cohort
+    query (see backend/services/cohort.py), through MCPServer.predict, so
+    every message goes through the same failover, provider rate limits
+    and audit log as a chat turn.
+
+    ANTIGRAVITY_OUTREACH_WORKERS (8) patients are generated at a time, fed
+    from a bounded queue. Results are written in batches of
+    ANTIGRAVITY_OUTREACH_BATCH (50), or at least every
+    ANTIGRAVITY_OUTREACH_FLUSH_S (5s), to ANTIGRAVITY_OUTREACH_DB (default:
+    antigravity.outreach.db next to the app database). Each batch is a
+    checkpoint: a run started again with the same run id skips the patients
+    already generated and retries the ones that failed, so after a crash at
+    most one batch is generated twice.
+    """
+
+    def __init__(self, mcp_server, roster: RosterStore, db_path: str = None, workers: int = None,
+                 batch_size: int = None, flush_interval: float = None):
+        self.mcp_server = mcp_server
+        self.roster = roster
+        self.db_path = db_path or os.getenv("ANTIGRAVITY_OUTREACH_DB", outreach_path(mcp_server.persistence.db_path))
+        self.workers = workers or int(os.getenv("ANTIGRAVITY_OUTREACH_WORKERS", "8"))
+        self.batch_size = batch_size or int(os.getenv("ANTIGRAVITY_OUTREACH_BATCH", "50"))
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv("ANTIGRAVITY_OUTREACH_FLUSH_S", "5"))
+
+        self._db: Optional[aiosqlite.Connection] = None
+        self._buffer: List[tuple] = []
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._last_flush = 0.0
+
+        # Observability
+        self.stats = {"generated": 0, "failed": 0, "batches_written": 0}
+
+    async def _open(self):
+        self._db = await aiosqlite.connect(self.db_path)
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute(CREATE_OUTREACH_RUNS)
+        await self._db.execute(CREATE_OUTREACH_MESSAGES)
+        await self._db.commit()
+
+    async def run(self, query: str, run_id: str = None, limit: int = None) -> Dict:
+        """Generates the cohort's missing messages and returns the run's report."""
+        run_id = run_id or run_id_for(query)
+        started = time.perf_counter()
+        user_ids = self.roster.user_ids[cohort.select(self.roster, query)].tolist()
+        await self._open()
+        self._flush_lock = asyncio.Lock()
+        self._last_flush = time.monotonic()
+        try:
+            await self._db.execute(INSERT_RUN, (run_id, query))
+            await self._db.commit()
+            cursor = await self._db.execute(SELECT_GENERATED, (run_id,))
+            done = {row[0] for row in await cursor.fetchall()}
+            await cursor.close()
+            todo = [user_id for user_id in user_ids if user_id not in done]
+            skipped = len(user_ids) - len(todo)
+            if limit is not None:
+                todo = todo[:limit]
+            print(f"OutreachJob {run_id}: {len(user_ids)} patients match, {skipped} already generated, "
+                  f"{len(todo)} to go with {self.workers} workers.")
+
+            before = dict(self.stats)
+            queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+            workers = [asyncio.ensure_future(self._worker(run_id, queue, started)) for _ in range(self.workers)]
+            try:
+                for user_id in todo:
+                    await queue.put(user_id)
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                await self.flush()
+
+            elapsed = time.perf_counter() - started
+            generated = self.stats["generated"] - before["generated"]
+            report = {
+                "run_id": run_id,
+                "query": query,
+                "cohort": len(user_ids),
+                "skipped": skipped,
+                "generated": generated,
+                "failed": self.stats["failed"] - before["failed"],
+                "batches_written": self.stats["batches_written"] - before["batches_written"],
+                "elapsed_s": round(elapsed, 3),
+                "patients_per_minute": round(generated / elapsed * 60, 1) if elapsed > 0 else None,
+            }
+            await self._db.execute(COMPLETE_RUN, (json.dumps(report), run_id))
+            await self._db.commit()
+            print(f"OutreachJob {run_id}: generated {report['generated']}, failed {report['failed']} in "
+                  f"{report['elapsed_s']}s ({report['patients_per_minute']} patients/min).")
+            return report
+        finally:
+            await self._db.close()
+            self._db = None
+
+    async def _worker(self, run_id: str, queue: asyncio.Queue, started: float):
+        while True:
+            user_id = await queue.get()
+            if user_id is None:
+                return
+            try:
+                state = AgentState(current_agent="outreach", conversation_history=[], patient_profile=self.roster[user_id])
+                result = await self.mcp_server.predict(OutreachSignature, state)
+                subject, message = getattr(result, "subject", None), getattr(result, "message", None)
+                if not message:
+                    raise ValueError("LLM returned an empty message")
+                row = (run_id, user_id, "generated", str(subject or ""), str(message), None)
+                self.stats["generated"] += 1
+            except Exception as e:
+                print(f"OutreachJob: {user_id} failed: {str(e)[:100]}")
+                row = (run_id, user_id, "failed", None, None, f"{type(e).__name__}: {e}"[:500])
+                self.stats["failed"] += 1
+            self._buffer.append(row)
+            if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                await self.flush()
+                elapsed = time.perf_counter() - started
+                print(f"OutreachJob {run_id}: {self.stats['generated']} generated, {self.stats['failed']} failed "
+                      f"({self.stats['generated'] / elapsed * 60:.0f} patients/min).")
+
+    async def flush(self):
+        """Writes the buffered results in one transaction: the run's checkpoint."""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+            await self._db.executemany(UPSERT_OUTREACH, batch)
+            await self._db.commit()
+            self._last_flush = time.monotonic()
+            self.stats["batches_written"] += 1
+
+    async def export(self, run_id: str, path: str) -> int:
+        """Writes a run's generated messages to `path` as JSON lines; returns how many."""
+        written = 0
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute(SELECT_OUTREACH, (run_id,))
+            with open(path, "w", encoding="utf-8") as f:
+                while True:
+                    rows = await cursor.fetchmany(1000)
+                    if not rows:
+                        break
+                    for user_id, subject, message, generated_at in rows:
+                        f.write(json.dumps({"user_id": user_id, "subject": subject, "message": message,
+                                            "generated_at": generated_at}) + "\n")
+                    written += len(rows)
+            await cursor.close()
+        return written
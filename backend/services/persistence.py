@@ -1,89 +1,623 @@
 import aiosqlite
+import asyncio
+import hashlib
 import json
 import os
-import asyncio
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List, Set, Tuple
 from backend.models.data_models import AgentState, PatientProfile, Message, RiskLevel, Biomarkers
+from backend.services.db_pool import SQLitePool
+from backend.services import state_codec
+
+# Bump when adding a migration to AsyncPersistence._migrate
+SCHEMA_VERSION = 4
+
+CREATE_USER_STATES = """
+    CREATE TABLE IF NOT EXISTS user_states (
+        user_id TEXT PRIMARY KEY,
+        current_agent TEXT,
+        conversation_history TEXT, -- legacy (pre-v1) JSON history, NULL once migrated to messages
+        patient_profile BLOB, -- state_codec payload (legacy rows: JSON TEXT)
+        context_variables BLOB,
+        message_count INTEGER DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+CREATE_MESSAGES = """
+    CREATE TABLE IF NOT EXISTS messages (
+        user_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL,
+        timestamp TEXT,
+        PRIMARY KEY (user_id, seq)
+    ) WITHOUT ROWID
+"""
+
+CREATE_LLM_INTERACTIONS = """
+    CREATE TABLE IF NOT EXISTS llm_interactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT,
+        agent_name TEXT,
+        signature_name TEXT,
+        prompt_input TEXT,
+        response_output TEXT,
+        model_name TEXT,
+        provider TEXT,
+        latency_ms FLOAT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        prev_hash TEXT,
+        record_hash TEXT
+    )
+"""
+
+CREATE_MESSAGE_SUMMARIES = """
+    CREATE TABLE IF NOT EXISTS message_summaries (
+        user_id TEXT PRIMARY KEY,
+        through_seq INTEGER NOT NULL, -- messages up to this seq were compacted into `summary`
+        summarized_count INTEGER NOT NULL,
+        summary TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Cold storage for idle sessions, one archive file next to each shard (see archive_path)
+CREATE_ARCHIVED_SESSIONS = """
+    CREATE TABLE IF NOT EXISTS archived_sessions (
+        user_id TEXT PRIMARY KEY,
+        current_agent TEXT,
+        patient_profile BLOB,
+        context_variables BLOB,
+        message_count INTEGER,
+        messages BLOB, -- state_codec payload: [[seq, role, content, timestamp], ...]
+        summary_through_seq INTEGER,
+        summarized_count INTEGER,
+        summary TEXT,
+        updated_at TIMESTAMP,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+UPSERT_STATE = """
+    INSERT INTO user_states
+    (user_id, current_agent, conversation_history, patient_profile, context_variables, message_count)
+    VALUES (?, ?, NULL, ?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        current_agent = excluded.current_agent,
+        conversation_history = NULL,
+        patient_profile = excluded.patient_profile,
+        context_variables = excluded.context_variables,
+        message_count = excluded.message_count,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# OR REPLACE keeps appends idempotent when a save is retried
+INSERT_MESSAGE = "INSERT OR REPLACE INTO messages (user_id, seq, role, content, timestamp) VALUES (?, ?, ?, ?, ?)"
+DELETE_MESSAGES = "DELETE FROM messages WHERE user_id = ?"
+DELETE_SUMMARY = "DELETE FROM message_summaries WHERE user_id = ?"
+UPSERT_SUMMARY = """
+    INSERT INTO message_summaries (user_id, through_seq, summarized_count, summary) VALUES (?, ?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        through_seq = excluded.through_seq,
+        summarized_count = excluded.summarized_count,
+        summary = excluded.summary,
+        updated_at = CURRENT_TIMESTAMP
+"""
+SELECT_SUMMARY = "SELECT through_seq, summarized_count, summary FROM message_summaries WHERE user_id = ?"
+
+SELECT_ARCHIVED = """
+    SELECT current_agent, patient_profile, context_variables, message_count, messages, summary_through_seq, summarized_count, summary
+    FROM archived_sessions WHERE user_id = ?
+"""
+RESTORE_STATE = """
+    INSERT OR IGNORE INTO user_states (user_id, current_agent, patient_profile, context_variables, message_count)
+    VALUES (?, ?, ?, ?, ?)
+"""
+DELETE_ARCHIVED = "DELETE FROM archived_sessions WHERE user_id = ?"
+SELECT_ARCHIVED_IDS = "SELECT user_id FROM archived_sessions"
+
+SELECT_STATE = "SELECT current_agent, patient_profile, context_variables, message_count FROM user_states WHERE user_id = ?"
+SELECT_RECENT_MESSAGES = "SELECT seq, role, content, timestamp FROM messages WHERE user_id = ? ORDER BY seq DESC LIMIT ?"
+SELECT_MESSAGE_COUNTS = """
+    SELECT message_count, (SELECT COUNT(*) FROM messages WHERE user_id = ?) FROM user_states WHERE user_id = ?
+"""
+SELECT_MESSAGES_FROM = "SELECT role, content, timestamp FROM messages WHERE user_id = ? ORDER BY seq LIMIT ? OFFSET ?"
+SELECT_RECENT_USERS = "SELECT user_id, updated_at FROM user_states ORDER BY updated_at DESC LIMIT ?"
+SELECT_CONVERSATIONS = "SELECT user_id, message_count, updated_at FROM user_states ORDER BY updated_at DESC LIMIT ?"
+
+INSERT_INTERACTION = """
+    INSERT INTO llm_interactions
+    (user_id, agent_name, signature_name, prompt_input, response_output, model_name, provider, latency_ms, timestamp, prev_hash, record_hash)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SELECT_CHAIN_HEAD = "SELECT record_hash FROM llm_interactions WHERE record_hash IS NOT NULL ORDER BY id DESC LIMIT 1"
+SELECT_CHAIN = """
+    SELECT id, user_id, agent_name, signature_name, prompt_input, response_output, model_name, provider, latency_ms, timestamp, prev_hash, record_hash
+    FROM llm_interactions WHERE record_hash IS NOT NULL ORDER BY id
+"""
+
+# prev_hash of the very first chained audit record
+GENESIS_HASH = "0" * 64
+
+
+def shard_paths(db_path: str, shards: int) -> List[str]:
+    """File layout for `shards` shards. A single shard is just `db_path`."""
+    if shards <= 1:
+        return [db_path]
+    root, ext = os.path.splitext(db_path)
+    return [f"{root}.shard{i}-of-{shards}{ext or '.db'}" for i in range(shards)]
+
+
+def archive_path(shard_path: str) -> str:
+    """Cold archive file for a shard, e.g. antigravity.db -> antigravity.archive.db."""
+    root, ext = os.path.splitext(shard_path)
+    return f"{root}.archive{ext or '.db'}"
+
+
+def shard_index(user_id: str, shards: int) -> int:
+    """Stable (cross-process, cross-restart) shard choice for a user."""
+    if shards <= 1:
+        return 0
+    return zlib.crc32(user_id.encode("utf-8")) % shards
+
+
+def chain_hash(prev_hash: str, row: tuple) -> str:
+    """SHA-256 over the previous record's hash and this record's fields (user_id .. timestamp)."""
+    payload = json.dumps([prev_hash, *row], default=str, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _StateWrite:
+    """
+    Rows for one user's save, captured synchronously so they reflect the state
+    at call time. Only messages appended since the last successful save are
+    included, unless the history list was replaced (e.g. a fresh start), in
+    which case the user's stored messages are rewritten.
+    """
+
+    def __init__(self, user_id: str, state: AgentState):
+        history = state.conversation_history
+        self.state = state
+        self.history = history
+        self.rewrite = state._persisted_history is not history or len(history) < state._persisted_count
+        self.history_offset = 0 if self.rewrite else state._history_offset
+        new_messages = history if self.rewrite else history[state._persisted_count:]
+        self.message_rows = [
+            (user_id, state._next_seq + i, m.role, m.content, m.timestamp)
+            for i, m in enumerate(new_messages)
+        ]
+        self.next_seq = state._next_seq + len(new_messages)
+        self.persisted_count = len(history)
+        self.state_row = (
+            user_id,
+            state.current_agent,
+            state_codec.encode(state.patient_profile, PatientProfile),
+            state_codec.encode(state.context_variables),
+            self.history_offset + len(history),
+        )
+
+    async def apply(self, db: aiosqlite.Connection):
+        if self.rewrite:
+            await db.execute(DELETE_MESSAGES, (self.state_row[0],))
+            await db.execute(DELETE_SUMMARY, (self.state_row[0],))
+        if self.message_rows:
+            await db.executemany(INSERT_MESSAGE, self.message_rows)
+
+    def committed(self):
+        state = self.state
+        state._history_offset = self.history_offset
+        state._next_seq = self.next_seq
+        state._persisted_count = self.persisted_count
+        state._persisted_history = self.history
+
 
 class AsyncPersistence:
+    """
+    SQLite persistence for sessions, messages and the audit log.
+
+    Users are spread over ANTIGRAVITY_DB_SHARDS files (default 1) by a stable
+    hash of user_id; each shard has its own writer connection, so write
+    throughput scales with the shard count. A user's state, messages and audit
+    records always live on the same shard. Cross-user queries fan out to every
+    shard and merge the results.
+    """
+
     def __init__(self):
         # Default path logic
         default_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "antigravity.db")
         self.db_path = os.getenv("ANTIGRAVITY_DB", default_path)
-        self._lock = asyncio.Lock()
+        self.shards = int(os.getenv("ANTIGRAVITY_DB_SHARDS", "1"))
+        self.read_pool_size = int(os.getenv("ANTIGRAVITY_DB_READERS", "4"))
+        # How many recent messages load_state brings into memory
+        self.history_window = int(os.getenv("ANTIGRAVITY_HISTORY_WINDOW", "50"))
+        self._pools: List[SQLitePool] = []
+        self._layout = None
+        # archive path -> (file signature, archived user_ids), so load_state misses don't open the archive
+        self._archived_ids: Dict[str, Tuple[Tuple[int, int], Set[str]]] = {}
+
+    @property
+    def pools(self) -> List[SQLitePool]:
+        # Created lazily so callers (e.g. tests) can still repoint db_path after construction.
+        layout = (self.db_path, max(1, self.shards))
+        if self._layout != layout:
+            readers = max(1, self.read_pool_size // layout[1])
+            self._pools = [SQLitePool(path, readers=readers) for path in shard_paths(*layout)]
+            self._layout = layout
+        return self._pools
+
+    @property
+    def pool(self) -> SQLitePool:
+        """The first shard's pool (the only one unless sharding is enabled)."""
+        return self.pools[0]
+
+    def pool_for(self, user_id: str) -> SQLitePool:
+        pools = self.pools
+        return pools[shard_index(user_id, len(pools))]
+
+    def _group_by_shard(self, items, user_id_of) -> Dict[int, list]:
+        groups: Dict[int, list] = {}
+        shards = len(self.pools)
+        for item in items:
+            groups.setdefault(shard_index(user_id_of(item), shards), []).append(item)
+        return groups
+
+    def pool_stats(self) -> Dict:
+        """Connection pool counters summed over all shards."""
+        totals = {"shards": len(self.pools), "queue_depth": 0}
+        for pool in self.pools:
+            totals["queue_depth"] += pool.queue_depth
+            for key, value in pool.stats.items():
+                totals[key] = max(totals.get(key, 0), value) if key == "max_queue_depth" else totals.get(key, 0) + value
+        return totals
 
     async def init_db(self):
-        async with self._lock:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("PRAGMA journal_mode=WAL")
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS user_states (
-                        user_id TEXT PRIMARY KEY,
-                        current_agent TEXT,
-                        conversation_history TEXT,
-                        patient_profile TEXT,
-                        context_variables TEXT,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS llm_interactions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id TEXT,
-                        agent_name TEXT,
-                        signature_name TEXT,
-                        prompt_input TEXT,
-                        response_output TEXT,
-                        model_name TEXT,
-                        provider TEXT,
-                        latency_ms FLOAT,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        async def create_schema(db: aiosqlite.Connection):
+            await db.execute(CREATE_USER_STATES)
+            await db.execute(CREATE_MESSAGES)
+            await db.execute(CREATE_LLM_INTERACTIONS)
+            await db.execute(CREATE_MESSAGE_SUMMARIES)
+            await self._migrate(db)
+
+        await asyncio.gather(*[pool.write(create_schema) for pool in self.pools])
+
+    async def _migrate(self, db: aiosqlite.Connection):
+        cursor = await db.execute("PRAGMA user_version")
+        version = (await cursor.fetchone())[0]
+        await cursor.close()
+
+        if version < 1:
+            # v1: conversation_history JSON column -> append-only messages table
+            cursor = await db.execute("PRAGMA table_info(user_states)")
+            columns = {row[1] for row in await cursor.fetchall()}
+            await cursor.close()
+            if "message_count" not in columns:
+                await db.execute("ALTER TABLE user_states ADD COLUMN message_count INTEGER DEFAULT 0")
+
+            cursor = await db.execute("SELECT user_id, conversation_history FROM user_states WHERE conversation_history IS NOT NULL")
+            migrated = 0
+            while True:
+                rows = await cursor.fetchmany(500)
+                if not rows:
+                    break
+                for user_id, history_raw in rows:
+                    history = state_codec.decode(history_raw) or []
+                    await db.executemany(INSERT_MESSAGE, [
+                        (user_id, seq, m.get("role"), m.get("content"), m.get("timestamp"))
+                        for seq, m in enumerate(history)
+                    ])
+                    await db.execute(
+                        "UPDATE user_states SET conversation_history = NULL, message_count = ? WHERE user_id = ?",
+                        (len(history), user_id),
                     )
-                """)
-                await db.commit()
+                    migrated += 1
+            await cursor.close()
+            if migrated:
+                print(f"AsyncPersistence: Migrated {migrated} conversation histories to the messages table.")
+
+        if version < 2:
+            # v2: lets session pre-warming find the most recently active users cheaply
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_user_states_updated_at ON user_states(updated_at)")
+
+        if version < 3:
+            # v3: hash chain over the audit log
+            cursor = await db.execute("PRAGMA table_info(llm_interactions)")
+            columns = {row[1] for row in await cursor.fetchall()}
+            await cursor.close()
+            for column in ("prev_hash", "record_hash"):
+                if column not in columns:
+                    await db.execute(f"ALTER TABLE llm_interactions ADD COLUMN {column} TEXT")
+
+        if version < 4:
+            # v4: audit retention deletes by age
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_llm_interactions_timestamp ON llm_interactions(timestamp)")
+
+        if version < SCHEMA_VERSION:
+            await db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    async def close(self):
+        """Flushes pending writes and releases the pooled connections."""
+        await asyncio.gather(*[pool.close() for pool in self._pools])
 
     async def save_state(self, user_id: str, state: AgentState):
-        async with self._lock:
-            async with aiosqlite.connect(self.db_path) as db:
-                history_json = json.dumps([m.model_dump() for m in state.conversation_history])
-                profile_json = state.patient_profile.model_dump_json()
-                context_json = json.dumps(state.context_variables)
-                
-                await db.execute("""
-                    INSERT OR REPLACE INTO user_states 
-                    (user_id, current_agent, conversation_history, patient_profile, context_variables)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (user_id, state.current_agent, history_json, profile_json, context_json))
-                await db.commit()
+        await self.save_states({user_id: state})
+
+    async def save_states(self, states: Dict[str, AgentState]):
+        """Persists many users' states with one transaction per shard, shards in parallel."""
+        # Capture rows now (synchronously) so they reflect the states at call time
+        writes = [_StateWrite(user_id, state) for user_id, state in states.items()]
+
+        def shard_write(shard_writes: List[_StateWrite]):
+            async def write(db: aiosqlite.Connection):
+                await db.executemany(UPSERT_STATE, [w.state_row for w in shard_writes])
+                for w in shard_writes:
+                    await w.apply(db)
+            return write
+
+        groups = self._group_by_shard(writes, lambda w: w.state_row[0])
+        results = await asyncio.gather(
+            *[self.pools[shard].write(shard_write(group)) for shard, group in groups.items()],
+            return_exceptions=True,
+        )
+        failed = None
+        for (shard, group), result in zip(groups.items(), results):
+            if isinstance(result, Exception):
+                failed = failed or result
+                continue
+            for w in group:
+                w.committed()
+        if failed:
+            raise failed
 
     async def load_state(self, user_id: str) -> AgentState:
-        async with self._lock:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute("SELECT current_agent, conversation_history, patient_profile, context_variables FROM user_states WHERE user_id = ?", (user_id,))
+        state = await self._load_hot_state(user_id)
+        if state is None and await self.restore_archived(user_id):
+            state = await self._load_hot_state(user_id)
+        return state
+
+    async def _load_hot_state(self, user_id: str) -> AgentState:
+        async with self.pool_for(user_id).reader() as db:
+            # One read transaction so the state row and its messages come from the same snapshot
+            await db.execute("BEGIN")
+            try:
+                cursor = await db.execute(SELECT_STATE, (user_id,))
+                row = await cursor.fetchone()
+                await cursor.close()
+                message_rows = []
+                if row:
+                    cursor = await db.execute(SELECT_RECENT_MESSAGES, (user_id, self.history_window))
+                    message_rows = await cursor.fetchall()
+                    await cursor.close()
+            finally:
+                await db.execute("COMMIT")
+
+        if not row:
+            return None
+
+        current_agent, profile_raw, context_raw, message_count = row
+        if not current_agent: current_agent = "intake"
+
+        message_rows.reverse()
+        history = [Message(role=role, content=content, timestamp=timestamp) for _, role, content, timestamp in message_rows]
+        # Versioned codec payloads; legacy JSON TEXT rows decode transparently
+        profile = state_codec.decode(profile_raw, PatientProfile)
+        context = state_codec.decode(context_raw) or {}
+
+        state = AgentState(
+            current_agent=current_agent,
+            conversation_history=history,
+            patient_profile=profile,
+            context_variables=context
+        )
+        state._history_offset = max(0, (message_count or 0) - len(history))
+        state._next_seq = message_rows[-1][0] + 1 if message_rows else 0
+        state._persisted_count = len(history)
+        state._persisted_history = state.conversation_history
+        return state
+
+    async def restore_archived(self, user_id: str) -> bool:
+        """
+        Moves a session archived by MaintenanceJob back into the hot tables.
+        Returns False if the user has no archived session.
+        """
+        pool = self.pool_for(user_id)
+        path = archive_path(pool.db_path)
+        if user_id not in await self._archived_users(path):
+            return False
+        async with aiosqlite.connect(path) as archive:
+            cursor = await archive.execute(SELECT_ARCHIVED, (user_id,))
+            row = await cursor.fetchone()
+            await cursor.close()
+        if not row:
+            return False
+
+        current_agent, profile, context, message_count, messages_raw, through_seq, summarized_count, summary = row
+
+        async def restore(db: aiosqlite.Connection) -> bool:
+            cursor = await db.execute(RESTORE_STATE, (user_id, current_agent, profile, context, message_count))
+            if cursor.rowcount == 0:
+                return False  # a new session was created meanwhile; leave the archive untouched
+            messages = state_codec.decode(messages_raw) or []
+            await db.executemany(INSERT_MESSAGE, [(user_id, *m) for m in messages])
+            if summary is not None:
+                await db.execute(UPSERT_SUMMARY, (user_id, through_seq, summarized_count, summary))
+            return True
+
+        restored = await pool.write(restore)
+        if restored:
+            async with aiosqlite.connect(path) as archive:
+                await archive.execute(DELETE_ARCHIVED, (user_id,))
+                await archive.commit()
+            print(f"AsyncPersistence: Restored archived session for {user_id}.")
+        return restored
+
+    async def _archived_users(self, path: str) -> Set[str]:
+        """
+        user_ids in an archive file. The ids are re-read only when the file's
+        mtime/size changed (MaintenanceJob may archive from another process),
+        so a lookup is normally one stat() and a set membership test.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return set()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._archived_ids.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        async with aiosqlite.connect(path) as archive:
+            cursor = await archive.execute(SELECT_ARCHIVED_IDS)
+            user_ids = {row[0] for row in await cursor.fetchall()}
+            await cursor.close()
+        self._archived_ids[path] = (signature, user_ids)
+        return user_ids
+
+    async def load_summary(self, user_id: str) -> Dict:
+        """Summary of the turns compacted away by MaintenanceJob, or None."""
+        async with self.pool_for(user_id).reader() as db:
+            cursor = await db.execute(SELECT_SUMMARY, (user_id,))
+            row = await cursor.fetchone()
+            await cursor.close()
+        if not row:
+            return None
+        return {"through_seq": row[0], "summarized_count": row[1], "summary": row[2]}
+
+    async def load_messages(self, user_id: str, limit: int = None) -> List[Message]:
+        """Most recent `limit` messages (default: the whole conversation), oldest first."""
+        async with self.pool_for(user_id).reader() as db:
+            cursor = await db.execute(SELECT_RECENT_MESSAGES, (user_id, -1 if limit is None else limit))
+            rows = await cursor.fetchall()
+            await cursor.close()
+        return [Message(role=role, content=content, timestamp=timestamp) for _, role, content, timestamp in reversed(rows)]
+
+    async def load_message_range(self, user_id: str, start: int, end: int) -> List[Message]:
+        """
+        Messages at positions [start, end) of the whole conversation (as in
+        AgentState._history_offset), oldest first. Turns MaintenanceJob has
+        already compacted away are not returned.
+        """
+        async with self.pool_for(user_id).reader() as db:
+            await db.execute("BEGIN")
+            try:
+                cursor = await db.execute(SELECT_MESSAGE_COUNTS, (user_id, user_id))
                 row = await cursor.fetchone()
-                
-                if not row:
-                    return None
-                    
-                current_agent, history_raw, profile_raw, context_raw = row
-                if not current_agent: current_agent = "intake"
-                
-                history = [Message(**m) for m in json.loads(history_raw)]
-                profile = PatientProfile.model_validate_json(profile_raw)
-                context = json.loads(context_raw)
-                
-                return AgentState(
-                    current_agent=current_agent,
-                    conversation_history=history,
-                    patient_profile=profile,
-                    context_variables=context
-                )
+                await cursor.close()
+                rows = []
+                if row:
+                    first_stored = (row[0] or 0) - row[1]  # position of the oldest message still stored
+                    skip = max(start - first_stored, 0)
+                    limit = end - max(start, first_stored)
+                    if limit > 0:
+                        cursor = await db.execute(SELECT_MESSAGES_FROM, (user_id, limit, skip))
+                        rows = await cursor.fetchall()
+                        await cursor.close()
+            finally:
+                await db.execute("COMMIT")
+        return [Message(role=role, content=content, timestamp=timestamp) for role, content, timestamp in rows]
+
+    async def _fan_out(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Runs a read query on every shard concurrently and concatenates the rows."""
+        async def query(pool: SQLitePool):
+            async with pool.reader() as db:
+                cursor = await db.execute(sql, params)
+                rows = await cursor.fetchall()
+                await cursor.close()
+            return rows
+
+        results = await asyncio.gather(*[query(pool) for pool in self.pools])
+        return [row for rows in results for row in rows]
+
+    async def recent_user_ids(self, limit: int) -> List[str]:
+        """The `limit` most recently active users, newest first."""
+        rows = await self._fan_out(SELECT_RECENT_USERS, (limit,))
+        rows.sort(key=lambda row: row[1] or "", reverse=True)
+        return [row[0] for row in rows[:limit]]
+
+    async def list_conversations(self, limit: int = 50) -> List[Dict]:
+        """Most recently active conversations across all shards (admin view)."""
+        rows = await self._fan_out(SELECT_CONVERSATIONS, (limit,))
+        rows.sort(key=lambda row: row[2] or "", reverse=True)
+        return [
+            {"user_id": user_id, "message_count": message_count or 0, "last_active": str(updated_at)}
+            for user_id, message_count, updated_at in rows[:limit]
+        ]
+
+    async def shard_summary(self) -> List[Dict]:
+        """Per-shard row counts and file size (admin view)."""
+        async def summarize(index: int, pool: SQLitePool):
+            async with pool.reader() as db:
+                counts = []
+                for table in ("user_states", "messages", "llm_interactions"):
+                    cursor = await db.execute(f"SELECT COUNT(*) FROM {table}")
+                    counts.append((await cursor.fetchone())[0])
+                    await cursor.close()
+            size = os.path.getsize(pool.db_path) if os.path.exists(pool.db_path) else 0
+            return {"shard": index, "path": pool.db_path, "users": counts[0], "messages": counts[1],
+                    "llm_interactions": counts[2], "size_bytes": size}
+
+        return list(await asyncio.gather(*[summarize(i, pool) for i, pool in enumerate(self.pools)]))
 
     async def log_interaction(self, user_id: str, agent_name: str, signature_name: str, prompt_input: str, response_output: str, model_name: str, provider: str, latency_ms: float):
-        async with self._lock:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT INTO llm_interactions 
-                    (user_id, agent_name, signature_name, prompt_input, response_output, model_name, provider, latency_ms)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (user_id, agent_name, signature_name, prompt_input, response_output, model_name, provider, latency_ms))
-                await db.commit()
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+        await self.log_interactions([(user_id, agent_name, signature_name, prompt_input, response_output, model_name, provider, latency_ms, timestamp)])
+
+    async def log_interactions(self, rows: List[tuple]):
+        """
+        Bulk-inserts audit rows (user_id, agent_name, signature_name, prompt_input,
+        response_output, model_name, provider, latency_ms, timestamp) on each
+        user's shard, extending that shard's hash chain inside the same transaction.
+        """
+        def shard_write(shard_rows: List[tuple]):
+            async def write(db: aiosqlite.Connection):
+                cursor = await db.execute(SELECT_CHAIN_HEAD)
+                head = await cursor.fetchone()
+                await cursor.close()
+                prev_hash = head[0] if head else GENESIS_HASH
+                chained = []
+                for row in shard_rows:
+                    record_hash = chain_hash(prev_hash, row)
+                    chained.append((*row, prev_hash, record_hash))
+                    prev_hash = record_hash
+                await db.executemany(INSERT_INTERACTION, chained)
+            return write
+
+        groups = self._group_by_shard(rows, lambda row: row[0] or "")
+        await asyncio.gather(*[self.pools[shard].write(shard_write(group)) for shard, group in groups.items()])
+
+    async def verify_interaction_chain(self) -> Dict:
+        """
+        Recomputes the audit hash chain of every shard. Returns how many records
+        verified and, if a chain is broken, the id of the first record whose
+        contents or link do not match and the shard it lives on.
+        Retention may delete the oldest rows, so each chain is anchored at its
+        first remaining record's prev_hash.
+        """
+        async def verify(pool: SQLitePool):
+            verified, broken_at, expected_prev = 0, None, None
+            async with pool.reader() as db:
+                cursor = await db.execute(SELECT_CHAIN)
+                while broken_at is None:
+                    rows = await cursor.fetchmany(1000)
+                    if not rows:
+                        break
+                    for row in rows:
+                        record_id, fields, prev_hash, record_hash = row[0], row[1:10], row[10], row[11]
+                        if expected_prev is not None and prev_hash != expected_prev:
+                            broken_at = record_id
+                            break
+                        if chain_hash(prev_hash, fields) != record_hash:
+                            broken_at = record_id
+                            break
+                        expected_prev = record_hash
+                        verified += 1
+                await cursor.close()
+            return verified, broken_at
+
+        results = await asyncio.gather(*[verify(pool) for pool in self.pools])
+        report = {"verified": sum(verified for verified, _ in results), "broken_at": None, "broken_shard": None}
+        for shard, (_, broken_at) in enumerate(results):
+            if broken_at is not None:
+                report["broken_at"], report["broken_shard"] = broken_at, shard
+                break
+        return report
@@ -0,0 +1,177 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def classify_error(error: BaseException) -> str:
+    """'rate_limit', 'timeout' or 'error' (same markers main.py uses for friendly 429s)."""
+    text, kind = str(error), type(error).__name__
+    if "429" in text or "RateLimit" in kind or "Quota exceeded" in text or "rate limit" in text.lower():
+        return "rate_limit"
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)) or "Timeout" in kind or "timed out" in text.lower():
+        return "timeout"
+    return "error"
+
+
+class _Circuit:
+    def __init__(self, provider: str, priority: int, window: int):
+        self.provider = provider
+        self.priority = priority  # position in the configured LM stack
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.cooldown = 0.0
+        self.probe_in_flight = False
+        self.ewma_latency_ms: Optional[float] = None
+        self.latencies: Deque[float] = deque(maxlen=window)  # recent successful calls, for percentiles
+        self.successes = 0
+        self.failures = 0
+        self.trips = 0
+        self.last_error: Optional[str] = None
+
+
+class ProviderHealth:
+    """
+    Per-provider circuit breakers and latency tracking for the MCP failover loop.
+
+    - A 429 / quota error or a timeout opens the provider's circuit at once;
+      other errors open it after ANTIGRAVITY_BREAKER_FAILURES (3) in a row.
+    - An open circuit is skipped for ANTIGRAVITY_BREAKER_COOLDOWN_S (30s),
+      doubling on every failed probe up to ANTIGRAVITY_BREAKER_MAX_COOLDOWN_S
+      (300s). After the cooldown it is half-open: one request probes it, and
+      a success closes the circuit again.
+    - Latency is an EWMA (ANTIGRAVITY_LATENCY_EWMA_ALPHA, 0.2) of successful
+      calls. Healthy providers are tried fastest first; providers without a
+      measurement keep their configured priority behind measured ones. The
+      last ANTIGRAVITY_LATENCY_WINDOW (200) latencies are kept for percentiles.
+    - If every circuit is open, all providers are tried in configured order
+      rather than failing without a single attempt.
+    """
+
+    def __init__(self, failure_threshold: int = None, cooldown: float = None, max_cooldown: float = None,
+                 alpha: float = None):
+        self.failure_threshold = failure_threshold or int(os.getenv("ANTIGRAVITY_BREAKER_FAILURES", "3"))
+        self.base_cooldown = cooldown if cooldown is not None else float(os.getenv("ANTIGRAVITY_BREAKER_COOLDOWN_S", "30"))
+        self.max_cooldown = max_cooldown if max_cooldown is not None else float(os.getenv("ANTIGRAVITY_BREAKER_MAX_COOLDOWN_S", "300"))
+        self.alpha = alpha if alpha is not None else float(os.getenv("ANTIGRAVITY_LATENCY_EWMA_ALPHA", "0.2"))
+        self.window = int(os.getenv("ANTIGRAVITY_LATENCY_WINDOW", "200"))
+        self._circuits: Dict[str, _Circuit] = {}
+
+    def _circuit(self, provider: str, priority: int = None) -> _Circuit:
+        circuit = self._circuits.get(provider)
+        if circuit is None:
+            circuit = self._circuits[provider] = _Circuit(provider, priority if priority is not None else len(self._circuits), self.window)
+        elif priority is not None:
+            circuit.priority = priority
+        return circuit
+
+    def _refresh(self, circuit: _Circuit, now: float):
+        if circuit.state == OPEN and now >= circuit.open_until:
+            circuit.state = HALF_OPEN
+            circuit.probe_in_flight = False
+
+    def route(self, providers: List[str]) -> List[str]:
+        """
+        The providers to try, in order: half-open ones (probe) first, then
+        closed ones by EWMA latency. Open circuits are left out.
+        """
+        now = time.monotonic()
+        probes, healthy = [], []
+        for priority, provider in enumerate(providers):
+            circuit = self._circuit(provider, priority)
+            self._refresh(circuit, now)
+            if circuit.state == HALF_OPEN and not circuit.probe_in_flight:
+                probes.append(circuit)
+            elif circuit.state == CLOSED:
+                healthy.append(circuit)
+        if not probes and not healthy:
+            return list(providers)
+        healthy.sort(key=lambda c: (c.ewma_latency_ms if c.ewma_latency_ms is not None else math.inf, c.priority))
+        return [c.provider for c in probes] + [c.provider for c in healthy]
+
+    def begin(self, provider: str) -> bool:
+        """Claims the attempt; False if another request is already probing this half-open provider."""
+        circuit = self._circuit(provider)
+        if circuit.state == HALF_OPEN:
+            if circuit.probe_in_flight:
+                return False
+            circuit.probe_in_flight = True
+        return True
+
+    def release(self, provider: str, elapsed_ms: float = None):
+        """
+        An attempt was abandoned (e.g. the losing half of a hedge) without an
+        outcome: frees a half-open probe, and keeps the time it had already
+        taken as a latency sample so slow calls aren't dropped from the
+        percentiles.
+        """
+        circuit = self._circuit(provider)
+        if elapsed_ms is not None:
+            circuit.latencies.append(elapsed_ms)
+        if circuit.state == HALF_OPEN:
+            circuit.probe_in_flight = False
+
+    def latency_percentile(self, provider: str, percentile: float, min_samples: int = 20) -> Optional[float]:
+        """The provider's `percentile` latency (ms) over its recent successes; None until `min_samples`."""
+        circuit = self._circuits.get(provider)
+        if circuit is None or len(circuit.latencies) < min_samples:
+            return None
+        ordered = sorted(circuit.latencies)
+        return ordered[min(len(ordered) - 1, int(math.ceil(percentile / 100 * len(ordered))) - 1)]
+
+    def record_success(self, provider: str, latency_ms: float):
+        circuit = self._circuit(provider)
+        if circuit.state != CLOSED:
+            print(f"ProviderHealth: {provider} recovered, closing circuit.")
+        circuit.state = CLOSED
+        circuit.probe_in_flight = False
+        circuit.consecutive_failures = 0
+        circuit.cooldown = 0.0
+        circuit.successes += 1
+        circuit.latencies.append(latency_ms)
+        circuit.ewma_latency_ms = (
+            latency_ms if circuit.ewma_latency_ms is None
+            else self.alpha * latency_ms + (1 - self.alpha) * circuit.ewma_latency_ms
+        )
+
+    def record_failure(self, provider: str, error: BaseException) -> str:
+        """Counts a failed attempt; returns its classification."""
+        kind = classify_error(error)
+        circuit = self._circuit(provider)
+        circuit.failures += 1
+        circuit.consecutive_failures += 1
+        circuit.last_error = f"{kind}: {str(error)[:100]}"
+        if circuit.state == HALF_OPEN or kind != "error" or circuit.consecutive_failures >= self.failure_threshold:
+            self._trip(circuit, failed_probe=circuit.state == HALF_OPEN)
+        return kind
+
+    def _trip(self, circuit: _Circuit, failed_probe: bool):
+        circuit.cooldown = min(self.max_cooldown, circuit.cooldown * 2 if failed_probe and circuit.cooldown else self.base_cooldown)
+        circuit.state = OPEN
+        circuit.probe_in_flight = False
+        circuit.open_until = time.monotonic() + circuit.cooldown
+        circuit.trips += 1
+        print(f"ProviderHealth: Opening circuit for {circuit.provider} for {circuit.cooldown:.0f}s ({circuit.last_error}).")
+
+    def snapshot(self) -> List[Dict]:
+        now = time.monotonic()
+        result = []
+        for circuit in sorted(self._circuits.values(), key=lambda c: c.priority):
+            self._refresh(circuit, now)
+            result.append({
+                "provider": circuit.provider,
+                "state": circuit.state,
+                "ewma_latency_ms": round(circuit.ewma_latency_ms, 1) if circuit.ewma_latency_ms is not None else None,
+                "consecutive_failures": circuit.consecutive_failures,
+                "retry_in_s": round(max(0.0, circuit.open_until - now), 1) if circuit.state == OPEN else 0.0,
+                "successes": circuit.successes,
+                "failures": circuit.failures,
+                "trips": circuit.trips,
+                "last_error": circuit.last_error,
+            })
+        return result
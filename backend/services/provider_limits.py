@@ -0,0 +1,60 @@
+import asyncio
+import os
+import re
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+
+def _env_name(provider: str) -> str:
+    return "ANTIGRAVITY_LLM_CONCURRENCY_" + re.sub(r"[^A-Z0-9]+", "_", provider.upper()).strip("_")
+
+
+class ProviderLimits:
+    """
+    Caps the number of in-flight LLM calls per provider.
+
+    The limit is ANTIGRAVITY_LLM_CONCURRENCY (default 8), overridable per
+    provider with ANTIGRAVITY_LLM_CONCURRENCY_<PROVIDER NAME>, e.g.
+    ANTIGRAVITY_LLM_CONCURRENCY_GEMINI_PRIMARY=4. 0 means unlimited. Callers
+    over the limit wait for a slot; the event loop keeps running meanwhile.
+    """
+
+    def __init__(self, default_limit: int = None):
+        self.default_limit = default_limit if default_limit is not None else int(os.getenv("ANTIGRAVITY_LLM_CONCURRENCY", "8"))
+        self._semaphores: Dict[str, Optional[asyncio.Semaphore]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Observability, per provider
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def limit_for(self, provider: str) -> int:
+        return int(os.getenv(_env_name(provider), self.default_limit))
+
+    def _semaphore(self, provider: str) -> Optional[asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:  # semaphores belong to one event loop
+            self._loop = loop
+            self._semaphores.clear()
+        if provider not in self._semaphores:
+            limit = self.limit_for(provider)
+            self._semaphores[provider] = asyncio.Semaphore(limit) if limit > 0 else None
+            self.stats.setdefault(provider, {"limit": limit, "calls": 0, "in_flight": 0, "peak_in_flight": 0, "waits": 0})
+        return self._semaphores[provider]
+
+    @asynccontextmanager
+    async def slot(self, provider: str):
+        semaphore = self._semaphore(provider)
+        stats = self.stats[provider]
+        if semaphore is not None:
+            if semaphore.locked():
+                stats["waits"] += 1
+            await semaphore.acquire()
+        stats["calls"] += 1
+        stats["in_flight"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+        try:
+            yield
+        finally:
+            stats["in_flight"] -= 1
+            if semaphore is not None:
+                semaphore.release()
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import os
+import re
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+def _env_name(prefix: str, provider: str) -> str:
+    return prefix + "_" + re.sub(r"[^A-Z0-9]+", "_", provider.upper()).strip("_")
+
+
+def _percentile(samples, fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 1)
+
+
+class ClientRateLimitError(RuntimeError):
+    """No provider key had quota left before the request's deadline (reported to the user as a 429)."""
+
+
+class _Bucket:
+    """Request and token buckets of one provider key, refilled continuously over a minute."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm, self.tpm = rpm, tpm
+        self.requests, self.tokens = float(rpm), float(tpm)  # start full
+        self.updated = time.monotonic()
+        self.waiters: Deque[Tuple[asyncio.Future, int]] = deque()  # FIFO of (future, tokens)
+        self.pump: Optional[asyncio.Task] = None
+
+    def refill(self, now: float):
+        elapsed, self.updated = now - self.updated, now
+        if self.rpm:
+            self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+
+    def wait_time(self, cost: int) -> float:
+        """Seconds until a request of `cost` tokens fits (0 if it fits now)."""
+        waits = [0.0]
+        if self.rpm:
+            waits.append(max(0.0, 1 - self.requests) * 60 / self.rpm)
+        if self.tpm:
+            waits.append(max(0.0, min(cost, self.tpm) - self.tokens) * 60 / self.tpm)
+        return max(waits)
+
+    def backlog(self, cost: int) -> float:
+        """Seconds until the queued requests and then one of `cost` tokens have all fit."""
+        queued = [c for future, c in self.waiters if not future.done()]
+        waits = [0.0]
+        if self.rpm:
+            waits.append(max(0.0, len(queued) + 1 - self.requests) * 60 / self.rpm)
+        if self.tpm:
+            waits.append(max(0.0, sum(queued) + min(cost, self.tpm) - self.tokens) * 60 / self.tpm)
+        return max(waits)
+
+    def depth(self) -> int:
+        return sum(1 for future, _ in self.waiters if not future.done())
+
+    def take(self, cost: int):
+        if self.rpm:
+            self.requests -= 1
+        if self.tpm:
+            self.tokens -= min(cost, self.tpm)  # a prompt bigger than the whole bucket waits for a full one
+
+    def give_back(self, cost: int):
+        if self.rpm:
+            self.requests = min(self.rpm, self.requests + 1)
+        if self.tpm:
+            self.tokens = min(self.tpm, self.tokens + min(cost, self.tpm))
+
+
+class RateLimits:
+    """
+    Client-side requests-per-minute and tokens-per-minute limits per provider
+    key, so calls stay within quota instead of being answered with a 429.
+
+    Limits are ANTIGRAVITY_LLM_RPM and ANTIGRAVITY_LLM_TPM (default 0:
+    unlimited), overridable per provider, e.g. ANTIGRAVITY_LLM_RPM_GEMINI_PRIMARY=15
+    and ANTIGRAVITY_LLM_TPM_GEMINI_PRIMARY=1000000. A request costs its
+    estimated prompt tokens plus ANTIGRAVITY_LLM_OUTPUT_TOKENS (400) for the
+    answer.
+
+    choose() keeps the health-ranked order and only spills over to a later
+    key when the earlier buckets are empty. When every bucket is empty, the
+    request queues (first come, first served) on the key that frees up
+    soonest, until its deadline, ANTIGRAVITY_LLM_QUEUE_TIMEOUT_S (10) after
+    the request started; then ClientRateLimitError is raised.
+    """
+
+    def __init__(self, default_rpm: int = None, default_tpm: int = None, queue_timeout: float = None,
+                 output_tokens: int = None, window: int = 500):
+        self.default_rpm = default_rpm if default_rpm is not None else int(os.getenv("ANTIGRAVITY_LLM_RPM", "0"))
+        self.default_tpm = default_tpm if default_tpm is not None else int(os.getenv("ANTIGRAVITY_LLM_TPM", "0"))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv("ANTIGRAVITY_LLM_QUEUE_TIMEOUT_S", "10"))
+        self.output_tokens = output_tokens if output_tokens is not None else int(os.getenv("ANTIGRAVITY_LLM_OUTPUT_TOKENS", "400"))
+        self.window = window
+        self._buckets: Dict[str, Optional[_Bucket]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Observability, per provider (see `stats`)
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._waits: Dict[str, Deque[float]] = {}
+
+    def limits_for(self, provider: str) -> Tuple[int, int]:
+        return (int(os.getenv(_env_name("ANTIGRAVITY_LLM_RPM", provider), self.default_rpm)),
+                int(os.getenv(_env_name("ANTIGRAVITY_LLM_TPM", provider), self.default_tpm)))
+
+    def cost(self, inputs: Dict[str, Any]) -> int:
+        """Estimated tokens of one call: ~4 characters per prompt token, plus the answer."""
+        return len(json.dumps(inputs, default=str)) // 4 + self.output_tokens
+
+    def deadline(self) -> float:
+        """The latest loop time a request starting now may wait for quota."""
+        return asyncio.get_running_loop().time() + self.queue_timeout
+
+    def _bucket(self, provider: str) -> Optional[_Bucket]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:  # queues belong to one event loop
+            self._loop = loop
+            self._buckets.clear()
+        if provider not in self._buckets:
+            rpm, tpm = self.limits_for(provider)
+            self._buckets[provider] = _Bucket(rpm, tpm) if rpm > 0 or tpm > 0 else None
+            self._counters.setdefault(provider, {"rpm": rpm, "tpm": tpm, "requests": 0, "tokens": 0, "queued": 0,
+                                                 "spilled": 0, "timeouts": 0, "peak_queue_depth": 0})
+            self._waits.setdefault(provider, deque(maxlen=self.window))
+        return self._buckets[provider]
+
+    def _available(self, provider: str, cost: int) -> bool:
+        bucket = self._bucket(provider)
+        if bucket is None:
+            return True
+        bucket.refill(time.monotonic())
+        return not bucket.depth() and bucket.wait_time(cost) == 0
+
+    def choose(self, order: List[str], cost: int) -> str:
+        """
+        The provider to try next: the first one in `order` with quota for
+        `cost` right now, else the one whose queue should clear soonest.
+        """
+        for provider in order:
+            if self._available(provider, cost):
+                if provider != order[0]:
+                    self._counters[order[0]]["spilled"] += 1
+                return provider
+        return min(order, key=lambda provider: self._buckets[provider].backlog(cost))
+
+    def try_acquire(self, provider: str, cost: int) -> bool:
+        """Takes the quota for one request if it is there now; never waits (e.g. for hedges)."""
+        if not self._available(provider, cost):
+            return False
+        self._record(provider, cost, 0.0)
+        bucket = self._buckets[provider]
+        if bucket is not None:
+            bucket.take(cost)
+        return True
+
+    async def acquire(self, provider: str, cost: int, deadline: float):
+        """Takes the quota for one request, queuing behind earlier requests until `deadline` (loop time)."""
+        if self.try_acquire(provider, cost):
+            return
+        bucket = self._buckets[provider]
+        counters = self._counters[provider]
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        if started >= deadline:
+            counters["timeouts"] += 1
+            raise ClientRateLimitError(f"{provider}: no quota left before the deadline")
+        future = loop.create_future()
+        bucket.waiters.append((future, cost))
+        counters["queued"] += 1
+        counters["peak_queue_depth"] = max(counters["peak_queue_depth"], bucket.depth())
+        if bucket.pump is None or bucket.pump.done():
+            bucket.pump = asyncio.ensure_future(self._pump(bucket))
+        try:
+            await asyncio.wait_for(future, max(0.0, deadline - started))
+        except asyncio.TimeoutError:
+            counters["timeouts"] += 1
+            raise ClientRateLimitError(f"{provider}: no quota within {deadline - started:.1f}s "
+                                       f"({bucket.depth()} requests queued)") from None
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                bucket.give_back(cost)  # granted just as the caller went away
+            raise
+        self._record(provider, cost, (loop.time() - started) * 1000)
+
+    async def _pump(self, bucket: _Bucket):
+        """Grants queued requests in arrival order as the buckets refill."""
+        while bucket.waiters:
+            future, cost = bucket.waiters[0]
+            if future.done():  # timed out or cancelled
+                bucket.waiters.popleft()
+                continue
+            bucket.refill(time.monotonic())
+            wait = bucket.wait_time(cost)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            bucket.waiters.popleft()
+            bucket.take(cost)
+            future.set_result(None)
+
+    def _record(self, provider: str, cost: int, wait_ms: float):
+        counters = self._counters[provider]
+        counters["requests"] += 1
+        counters["tokens"] += cost
+        self._waits[provider].append(wait_ms)
+
+    @property
+    def stats(self) -> Dict[str, Dict]:
+        result = {}
+        for provider, counters in self._counters.items():
+            bucket = self._buckets.get(provider)
+            waits = self._waits[provider]
+            result[provider] = {
+                **counters,
+                "queue_depth": bucket.depth() if bucket is not None else 0,
+                "wait_ms": {"p50": _percentile(waits, 0.5), "p95": _percentile(waits, 0.95),
+                            "max": round(max(waits), 1) if waits else None},
+            }
+        return result
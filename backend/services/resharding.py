@@ -0,0 +1,164 @@
+import asyncio
+import os
+import time
+from typing import Dict, List
+
+import aiosqlite
+
+from backend.services.persistence import AsyncPersistence, shard_index
+
+SELECT_STATES_PAGE = """
+    SELECT user_id, current_agent, conversation_history, patient_profile, context_variables, message_count, updated_at
+    FROM user_states WHERE user_id > ? ORDER BY user_id LIMIT ?
+"""
+COPY_STATE = """
+    INSERT OR REPLACE INTO user_states
+    (user_id, current_agent, conversation_history, patient_profile, context_variables, message_count, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+SELECT_USER_MESSAGES = "SELECT user_id, seq, role, content, timestamp FROM messages WHERE user_id = ? ORDER BY seq"
+COPY_MESSAGE = "INSERT OR REPLACE INTO messages (user_id, seq, role, content, timestamp) VALUES (?, ?, ?, ?, ?)"
+SELECT_USER_SUMMARY = "SELECT user_id, through_seq, summarized_count, summary, updated_at FROM message_summaries WHERE user_id = ?"
+COPY_SUMMARY = """
+    INSERT OR REPLACE INTO message_summaries (user_id, through_seq, summarized_count, summary, updated_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+SELECT_INTERACTIONS_PAGE = """
+    SELECT id, user_id, agent_name, signature_name, prompt_input, response_output, model_name, provider, latency_ms, timestamp
+    FROM llm_interactions WHERE id > ? ORDER BY id LIMIT ?
+"""
+
+
+def _layout(db_path: str, shards: int) -> AsyncPersistence:
+    persistence = AsyncPersistence()
+    persistence.db_path = db_path
+    persistence.shards = shards
+    return persistence
+
+
+async def _is_empty(persistence: AsyncPersistence) -> bool:
+    summary = await persistence.shard_summary()
+    return all(s["users"] == 0 and s["llm_interactions"] == 0 for s in summary)
+
+
+async def reshard(db_path: str, from_shards: int, to_shards: int, batch_size: int = 200,
+                  force: bool = False, delete_source: bool = False) -> Dict:
+    """
+    Copies every user (state + messages) and every audit record from the
+    `from_shards` layout of `db_path` to the `to_shards` layout.
+
+    Run it with the backend stopped, then restart with ANTIGRAVITY_DB_SHARDS=to_shards.
+    Audit records are re-chained on their new shard, so the source chains are
+    verified first: if one is broken (tampered or corrupted rows) nothing is
+    copied unless `force`, since the new chains would hide it. Source files are
+    kept unless `delete_source`, and always when a source chain is broken, as
+    they are then the only evidence. `force` also allows merging into a target
+    layout that already has data.
+    Cold archives written by MaintenanceJob are not moved: restore archived
+    sessions (or leave archiving off) before resharding.
+    """
+    if from_shards == to_shards:
+        raise ValueError("Source and target shard counts are the same.")
+    source, target = _layout(db_path, from_shards), _layout(db_path, to_shards)
+    source_paths = [pool.db_path for pool in source.pools]
+    target_paths = [pool.db_path for pool in target.pools]
+
+    started = time.perf_counter()
+    try:
+        await source.init_db()
+        # Checked before the target files are even created
+        source_chain = await source.verify_interaction_chain()
+        if source_chain["broken_at"] is not None and not force:
+            raise RuntimeError(
+                f"Source audit chain is broken at record {source_chain['broken_at']} "
+                f"(shard {source_chain['broken_shard']}). Re-chaining would hide it; use force to reshard anyway."
+            )
+        await target.init_db()
+        if not force and not await _is_empty(target):
+            raise RuntimeError(f"Target layout already contains data: {target_paths}. Use force to merge into it.")
+
+        users = messages = interactions = 0
+
+        # 1. Sessions: page through each source shard by user_id and bulk-copy per target shard
+        for pool in source.pools:
+            last_user = ""
+            while True:
+                async with pool.reader() as db:
+                    cursor = await db.execute(SELECT_STATES_PAGE, (last_user, batch_size))
+                    state_rows = await cursor.fetchall()
+                    await cursor.close()
+                    message_rows: List[tuple] = []
+                    summary_rows: List[tuple] = []
+                    for row in state_rows:
+                        cursor = await db.execute(SELECT_USER_MESSAGES, (row[0],))
+                        message_rows.extend(await cursor.fetchall())
+                        await cursor.close()
+                        cursor = await db.execute(SELECT_USER_SUMMARY, (row[0],))
+                        summary_rows.extend(await cursor.fetchall())
+                        await cursor.close()
+                if not state_rows:
+                    break
+                last_user = state_rows[-1][0]
+
+                groups: Dict[int, list] = {}
+                for row in state_rows:
+                    groups.setdefault(shard_index(row[0], to_shards), [[], [], []])[0].append(row)
+                for row in message_rows:
+                    groups.setdefault(shard_index(row[0], to_shards), [[], [], []])[1].append(row)
+                for row in summary_rows:
+                    groups.setdefault(shard_index(row[0], to_shards), [[], [], []])[2].append(row)
+
+                def copy(states, msgs, summaries):
+                    async def write(db: aiosqlite.Connection):
+                        if states:
+                            await db.executemany(COPY_STATE, states)
+                        if msgs:
+                            await db.executemany(COPY_MESSAGE, msgs)
+                        if summaries:
+                            await db.executemany(COPY_SUMMARY, summaries)
+                    return write
+
+                await asyncio.gather(*[
+                    target.pools[shard].write(copy(*rows)) for shard, rows in groups.items()
+                ])
+                users += len(state_rows)
+                messages += len(message_rows)
+
+        # 2. Audit log: re-inserted through log_interactions so each target shard gets a valid chain
+        for pool in source.pools:
+            last_id = 0
+            while True:
+                async with pool.reader() as db:
+                    cursor = await db.execute(SELECT_INTERACTIONS_PAGE, (last_id, batch_size))
+                    rows = await cursor.fetchall()
+                    await cursor.close()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                await target.log_interactions([row[1:] for row in rows])
+                interactions += len(rows)
+
+        target_chain = await target.verify_interaction_chain()
+    finally:
+        await source.close()
+        await target.close()
+
+    if delete_source and source_chain["broken_at"] is None:
+        for path in source_paths:
+            if path in target_paths:
+                continue
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    return {
+        "from_shards": from_shards,
+        "to_shards": to_shards,
+        "users": users,
+        "messages": messages,
+        "llm_interactions": interactions,
+        "source_chain": source_chain,
+        "target_chain": target_chain,
+        "target_paths": target_paths,
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,131 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from backend.services.env_lists import parse_names
+
+
+class _LeaderCancelled(Exception):
+    """The caller making a single-flighted call was cancelled; a waiter takes the call over."""
+
+
+class ResponseCache:
+    """
+    Opt-in cache of LLM responses for MCPServer.predict.
+
+    Keys are a SHA-256 over the signature (name and instructions), the model
+    stack and the fully resolved inputs (history window, profile JSON, user
+    input), so only a byte-identical request can be answered from cache.
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted beyond `max_size`.
+
+    Concurrent identical requests are single-flighted: the first caller makes
+    the upstream call and the others await its result (or its exception).
+    If that caller is cancelled (e.g. its client disconnected), one of the
+    waiters makes the call instead, so the others are not cancelled with it.
+    Failures are never cached.
+
+    Which signatures are cached:
+      ANTIGRAVITY_RESPONSE_CACHE          "" (off, default), "*" or "IntakeSignature,EducationSignature"
+      ANTIGRAVITY_RESPONSE_CACHE_EXCLUDE  signatures never cached, e.g. personalized turns
+    """
+
+    def __init__(self, signatures: str = None, exclude: str = None, ttl: float = None, max_size: int = None):
+        self.signatures = parse_names(signatures if signatures is not None else os.getenv("ANTIGRAVITY_RESPONSE_CACHE", ""))
+        self.exclude = parse_names(exclude if exclude is not None else os.getenv("ANTIGRAVITY_RESPONSE_CACHE_EXCLUDE", ""))
+        self.ttl = ttl if ttl is not None else float(os.getenv("ANTIGRAVITY_RESPONSE_CACHE_TTL_S", "300"))
+        self.max_size = max_size or int(os.getenv("ANTIGRAVITY_RESPONSE_CACHE_SIZE", "512"))
+
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        # Observability
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expirations": 0, "errors": 0, "cancelled_leaders": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def enabled_for(self, signature_name: str) -> bool:
+        if signature_name in self.exclude:
+            return False
+        return "*" in self.signatures or signature_name in self.signatures
+
+    def configure(self, signature_name: str, enabled: bool):
+        """Turns caching on or off for one signature at runtime."""
+        if enabled:
+            self.exclude.discard(signature_name)
+            self.signatures.add(signature_name)
+        else:
+            self.exclude.add(signature_name)
+
+    @staticmethod
+    def key(signature_name: str, instructions: str, model: str, inputs: Dict[str, Any]) -> str:
+        payload = json.dumps([signature_name, instructions, model, inputs], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if self.ttl and time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self.stats["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_call(self, key: str, call: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """
+        The cached value for `key`, or the result of `call()` (then cached).
+        Returns (value, how) where how is "hit", "coalesced" or "miss".
+        """
+        while True:
+            value = self.get(key)
+            if value is not None:
+                self.stats["hits"] += 1
+                return value, "hit"
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(in_flight), "coalesced"
+            except _LeaderCancelled:
+                pass  # the first waiter to get here makes the call; the rest coalesce onto it
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await call()
+        except asyncio.CancelledError:
+            self.stats["cancelled_leaders"] += 1
+            future.set_exception(_LeaderCancelled())  # hand the call to a waiter rather than cancelling them
+            future.exception()
+            raise
+        except Exception as e:
+            self.stats["errors"] += 1
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; mark it retrieved when there are none
+            raise
+        else:
+            self.put(key, value)
+            future.set_result(value)
+            return value, "miss"
+        finally:
+            self._in_flight.pop(key, None)
@@ -0,0 +1,185 @@
+"""
+Type 2 diabetes risk from a patient's roster data: the Framingham Offspring
+simple clinical model (Wilson et al., "Prediction of incident diabetes
+mellitus in middle-aged adults", Arch Intern Med 2007;167:1068-74).
+
+The model's point score maps to an 8-year risk of type 2 diabetes, which is
+what risk_score_numeric holds (in %). All six factors are scored: fasting
+glucose 5.6-6.9 mmol/L (100-125 mg/dL), BMI, low HDL (< 1.03 mmol/L for men,
+< 1.29 for women, i.e. 40 / 50 mg/dL), parental history of diabetes,
+triglycerides >= 1.7 mmol/L (150 mg/dL) and blood pressure >= 130/85 or
+treated. A factor whose input is missing (0 or NaN, as blank sheet cells
+arrive) scores nothing and is listed under "missing" in the breakdown, so
+the score is then a lower bound. Antihypertensive treatment is not on the
+roster, so blood pressure scores only from the readings. Unknown sex uses the
+men's HDL cut-off, which never awards points the model would not.
+
+A1c and age are not inputs of this model; breakdown() reports them next to
+the score. Adaptations beyond the paper:
+  - fasting glucose in the diabetes range (>= 7.0) scores like 5.6-6.9; the
+    model was derived on people without diabetes
+  - LEVEL_CUTOFFS, the Low / Moderate / High triage, are this app's own
+
+The model score never replaces a risk level the sheet provides: the level
+stays as given and PatientProfile.risk_source records which model set it
+(MODEL_ID when it was derived here, see parse_roster).
+
+The whole roster is scored in one pass: every band lookup is a
+np.searchsorted over a column. Single patients go through the same code with
+one-element arrays, so a breakdown always agrees with the batch result.
+"""
+from typing import Dict
+
+import numpy as np
+
+from backend.models.data_models import PatientProfile, RiskLevel
+
+MODEL = "Framingham Offspring simple clinical model (Wilson et al. 2007)"
+# PatientProfile.risk_source of levels derived from this model
+MODEL_ID = "Framingham_Offspring_2007"
+
+# factor -> [(input, ascending cut-offs, points below the first cut-off, then at/above each)]
+# Cut-offs given per sex ({"female": ..., "male": ...}) use the men's for anyone not recorded as female
+RISK_FACTORS = {
+    "fasting_glucose": [("fbs", (5.6,), (0, 10))],                                 # mmol/L
+    "bmi": [("bmi", (25, 30), (0, 2, 5))],
+    "low_hdl": [("hdl", {"female": (1.29,), "male": (1.03,)}, (5, 0))],            # mmol/L
+    "parental_history": [("family_history", (1,), (0, 3))],                        # 1 = yes, 0 = no
+    "triglycerides": [("triglycerides", (1.7,), (0, 3))],                          # mmol/L
+    "blood_pressure": [("systolic_bp", (130,), (0, 2)), ("diastolic_bp", (85,), (0, 2))],
+}
+# 1 for female, 0 for male, NaN if unknown
+SEX_INPUT = "female"
+# Yes/no inputs, where 0 is an answer rather than a blank cell
+BINARY_INPUTS = ("family_history",)
+INPUTS = ("fbs", "bmi", "hdl", "family_history", "triglycerides", "systolic_bp", "diastolic_bp", SEX_INPUT)
+MAX_POINTS = sum(max(max(points) for _, _, points in bands) for bands in RISK_FACTORS.values())
+
+# 8-year risk (%) by point total, from the paper: <= 10 points is 3%, >= 25 is 35%
+RISK_FLOOR_POINTS = 10
+RISK_BY_POINTS = np.array([3, 4, 4, 5, 6, 7, 9, 11, 13, 15, 18, 21, 25, 29, 33, 35], dtype=np.int64)
+# 8-year risk (%) from which a patient counts as Moderate / High
+LEVEL_CUTOFFS = (4, 11)
+
+
+def _table(cutoffs) -> np.ndarray:
+    return np.asarray(cutoffs, dtype=np.float64)
+
+
+_TABLES = {
+    factor: [(name, {sex: _table(c) for sex, c in cutoffs.items()} if isinstance(cutoffs, dict) else _table(cutoffs),
+              np.asarray(points, dtype=np.int16))
+             for name, cutoffs, points in bands]
+    for factor, bands in RISK_FACTORS.items()
+}
+
+
+def _is_missing(name: str, values: np.ndarray) -> np.ndarray:
+    return np.isnan(values) if name in BINARY_INPUTS else np.isnan(values) | (values <= 0)
+
+
+def score_arrays(inputs: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Scores every row of the INPUTS arrays at once. Returns the points per
+    factor, the total `points` and the 8-year risk `score` in % (int arrays).
+    """
+    female = np.asarray(inputs[SEX_INPUT], dtype=np.float64) == 1
+    result: Dict[str, np.ndarray] = {}
+    total = None
+    for factor, bands in _TABLES.items():
+        factor_points = None
+        for name, cutoffs, points in bands:
+            values = np.asarray(inputs[name], dtype=np.float64)
+            if isinstance(cutoffs, dict):
+                band_points = np.where(female, points[np.searchsorted(cutoffs["female"], values, side="right")],
+                                       points[np.searchsorted(cutoffs["male"], values, side="right")])
+            else:
+                band_points = points[np.searchsorted(cutoffs, values, side="right")]
+            band_points = np.where(_is_missing(name, values), 0, band_points)
+            factor_points = band_points if factor_points is None else np.maximum(factor_points, band_points)
+        result[factor] = factor_points
+        total = factor_points.astype(np.int32) if total is None else total + factor_points
+    result["points"] = total
+    result["score"] = RISK_BY_POINTS[np.clip(total - RISK_FLOOR_POINTS, 0, len(RISK_BY_POINTS) - 1)]
+    return result
+
+
+def risk_level(score: int) -> RiskLevel:
+    if score >= LEVEL_CUTOFFS[1]:
+        return RiskLevel.HIGH
+    return RiskLevel.MODERATE if score >= LEVEL_CUTOFFS[0] else RiskLevel.LOW
+
+
+def risk_levels(scores: np.ndarray) -> np.ndarray:
+    """risk_level() of every score, as RiskLevel values."""
+    levels = np.array([RiskLevel.LOW.value, RiskLevel.MODERATE.value, RiskLevel.HIGH.value])
+    return levels[np.searchsorted(np.asarray(LEVEL_CUTOFFS), scores, side="right")]
+
+
+def sex_inputs(sexes: np.ndarray) -> np.ndarray:
+    """SEX_INPUT values for recorded sexes ("Female", "M", ...): 1, 0 or NaN."""
+    keys = np.char.lower(np.char.strip(np.asarray(sexes, dtype=str)))
+    return np.where(np.isin(keys, ("female", "f")), 1.0, np.where(np.isin(keys, ("male", "m")), 0.0, np.nan))
+
+
+def profile_inputs(profile: PatientProfile) -> Dict[str, float]:
+    biomarkers = profile.biomarkers
+    family_history = np.nan if profile.family_history is None else float(profile.family_history)
+    return {
+        "fbs": biomarkers.fbs, "bmi": biomarkers.bmi, "hdl": biomarkers.hdl,
+        "family_history": family_history, "triglycerides": biomarkers.triglycerides,
+        "systolic_bp": biomarkers.systolic_bp, "diastolic_bp": biomarkers.diastolic_bp,
+        SEX_INPUT: float(sex_inputs(np.array([profile.sex or ""]))[0]),
+    }
+
+
+def _value(value: float):
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def breakdown(profile: PatientProfile) -> Dict:
+    """One patient's score with the value and points behind each factor, and what was missing."""
+    inputs = profile_inputs(profile)
+    scored = score_arrays({name: np.array([value]) for name, value in inputs.items()})
+    score = int(scored["score"][0])
+    factors, missing = {}, []
+    for factor, bands in RISK_FACTORS.items():
+        values = {name: _value(inputs[name]) for name, _, _ in bands}
+        if any(isinstance(cutoffs, dict) for _, cutoffs, _ in bands):
+            values["sex"] = profile.sex
+        factors[factor] = {
+            "values": values,
+            "points": int(scored[factor][0]),
+            "max_points": max(max(points) for _, _, points in bands),
+        }
+        if all(_is_missing(name, np.array([inputs[name]]))[0] for name, _, _ in bands):
+            missing.append(factor)
+    if np.isnan(inputs[SEX_INPUT]):
+        missing.append("sex")  # low HDL used the men's cut-off
+    return {
+        "user_id": profile.user_id,
+        "model": MODEL,
+        "score": score,
+        "score_unit": "8-year type 2 diabetes risk, %",
+        "points": int(scored["points"][0]),
+        "max_points": MAX_POINTS,
+        "factors": factors,
+        "missing": missing,  # scored as absent, so the score is a lower bound when this is not empty
+        "model_level": risk_level(score).value,
+        # The level the app acts on, and which model set it (the sheet's, or MODEL_ID)
+        "level": profile.diabetes_risk_score.value,
+        "level_source": profile.risk_source,
+        "not_in_model": {"a1c": _value(profile.biomarkers.a1c), "age": profile.age},
+    }
+
+
+def rescore(profile: PatientProfile) -> int:
+    """
+    Recomputes just this patient's risk_score_numeric (e.g. after their
+    biomarkers changed). The level follows only if this model set it.
+    """
+    score = breakdown(profile)["score"]
+    profile.risk_score_numeric = score
+    if profile.risk_source == MODEL_ID:
+        profile.diabetes_risk_score = risk_level(score)
+    return score
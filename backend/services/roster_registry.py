@@ -0,0 +1,241 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from backend.models.data_models import PatientProfile
+from backend.services.data_loader import DataLoader, diff_rosters, patch_profile
+from backend.services.roster_store import RosterStore
+
+DEFAULT_ROSTER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "PREVENT_Inform_Table_V2 (2).xlsx")
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux /proc only; None elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class RosterRegistry:
+    """
+    The process-wide patient roster, shared by the orchestrator, the lookup
+    API and the admin API (see get_roster_registry).
+
+    The sheet is loaded lazily on first use. Concurrent first callers, sync or
+    async, share a single load: async callers run it in a worker thread so the
+    event loop keeps serving requests meanwhile.
+
+    Hot reload: `start_watching()` polls the sheet's mtime/size and, once a
+    change has settled, reparses it in a worker thread, diffs it by PREVENT_ID
+    and swaps in a new loader that reuses every unchanged cached profile. The
+    swap is a single attribute assignment, so readers see either the old or
+    the new roster, never a mix. Listeners (the orchestrator) then patch the
+    live sessions whose rows changed.
+    """
+
+    def __init__(self, file_path: str = None):
+        self.file_path = file_path or os.getenv("ANTIGRAVITY_ROSTER_PATH", DEFAULT_ROSTER_PATH)
+        self.loader = DataLoader(self.file_path)
+        self.watch_interval = float(os.getenv("ANTIGRAVITY_ROSTER_WATCH_INTERVAL_S", "5"))  # 0 disables hot reload
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._signature: Optional[Tuple[int, int]] = None
+        # Columns changed by reloads and not yet applied to the user's session; consumed by patch_profile().
+        # Guarded by its own lock: reload() holds _lock while it re-reads the sheet, and sessions load meanwhile
+        self._reloaded_columns: Dict[str, Set[str]] = {}
+        self._reloaded_lock = threading.Lock()
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._watch_task: Optional[asyncio.Task] = None
+
+        # Observability
+        self.stats = {"loaded": False, "source": None, "patients": 0, "load_seconds": None,
+                      "columns_bytes": None, "rss_delta_bytes": None, "loads": 0, "profiles": None,
+                      "reloads": 0, "reload_errors": 0, "last_reload": None}
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> RosterStore:
+        """The roster keyed by user_id, loading it on first call."""
+        if self._loaded:
+            return self.loader.load_data()
+        with self._lock:
+            if not self._loaded:
+                rss_before = _rss_bytes()
+                started = time.perf_counter()
+                self._signature = self._file_signature()
+                profiles = self.loader.load_data()
+                self.loader.name_index  # built here, off the event loop, rather than on the first name lookup
+                elapsed = time.perf_counter() - started
+                rss_after = _rss_bytes()
+                self.stats.update({
+                    "loaded": True,
+                    "source": self.loader.source,
+                    "patients": len(profiles),
+                    "load_seconds": round(elapsed, 4),
+                    "columns_bytes": profiles.nbytes,
+                    "profiles": profiles.stats,
+                    "rss_delta_bytes": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+                    "loads": self.stats["loads"] + 1,
+                })
+                print(f"RosterRegistry: Loaded {len(profiles)} patients from {self.loader.source or 'nowhere'} in {elapsed:.3f}s.")
+                self._loaded = True
+        return self.loader.load_data()
+
+    async def load_async(self) -> RosterStore:
+        """Like load(), but a cold load runs in a worker thread instead of blocking the event loop."""
+        if self._loaded:
+            return self.loader.load_data()
+        return await asyncio.to_thread(self.load)
+
+    def get_profile(self, user_id: str) -> Optional[PatientProfile]:
+        return self.load().get(user_id)
+
+    def get_patient_by_name(self, name: str) -> Optional[PatientProfile]:
+        self.load()
+        return self.loader.get_patient_by_name(name)
+
+    def search_patients(self, query: str, limit: int = 20, offset: int = 0) -> Dict:
+        self.load()
+        return self.loader.search_patients(query, limit=limit, offset=offset)
+
+    # --- Hot reload ---
+
+    def add_listener(self, listener: Callable[[Dict], None]):
+        """`listener(diff)` is called on the event loop after every reload that changed something."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def patch_profile(self, user_id: str, profile: PatientProfile) -> bool:
+        """
+        Brings a session profile persisted before a reload up to date with the
+        roster columns that reload changed. Returns True if anything was patched.
+
+        Each reload is applied to a user's session once: the pending columns are
+        consumed here, so the caller must keep the patched state (mark it dirty)
+        and later loads of the saved state do not overwrite session edits again.
+        """
+        with self._reloaded_lock:
+            columns = self._reloaded_columns.pop(user_id, None)
+        source = self.loader.load_data().get(user_id) if columns else None
+        if source is None:
+            return False
+        patch_profile(profile, source, sorted(columns))
+        return True
+
+    def reload(self) -> Optional[Dict]:
+        """
+        Re-reads the sheet and atomically swaps in the added, changed and
+        removed profiles. Blocking: call it from a worker thread. Returns the
+        diff, or None if the sheet is unchanged or could not be read.
+        """
+        if not self._loaded:
+            self.load()  # nothing to diff against yet; the first load reads the current sheet
+            return None
+        with self._lock:
+            signature = self._file_signature()
+            if signature is None or signature == self._signature:
+                return None
+            started = time.perf_counter()
+            current = self.loader
+            fresh = DataLoader(self.file_path, cache_dir=current.cache_dir)
+            new_columns = fresh.load_columns()  # the .npz snapshot is keyed by content, so only real edits reparse
+            if not new_columns:
+                self.stats["reload_errors"] += 1
+                return None
+            diff = diff_rosters(current.load_columns(), new_columns)
+
+            # Unchanged profiles already handed out are reused as-is; only added/changed rows get new objects
+            profiles = fresh.load_data()
+            profiles.adopt(current.load_data(), exclude=set(diff["changed"]) | set(diff["removed"]))
+            names_changed = diff["added"] or diff["removed"] or any("name" in cols for cols in diff["changed"].values())
+            if not names_changed:
+                fresh.name_index = current._name_index
+            fresh.name_index  # (re)built before the swap, so lookups never build it on the event loop
+
+            self.loader = fresh  # the atomic swap
+            self._signature = signature
+            with self._reloaded_lock:
+                for user_id, columns in diff["changed"].items():
+                    self._reloaded_columns.setdefault(user_id, set()).update(columns)
+                for user_id in diff["removed"]:
+                    self._reloaded_columns.pop(user_id, None)
+
+            elapsed = time.perf_counter() - started
+            summary = {"added": len(diff["added"]), "changed": len(diff["changed"]), "removed": len(diff["removed"]),
+                       "source": fresh.source, "seconds": round(elapsed, 4)}
+            self.stats.update({"patients": len(profiles), "source": fresh.source, "columns_bytes": profiles.nbytes,
+                               "profiles": profiles.stats, "reloads": self.stats["reloads"] + 1,
+                               "last_reload": summary})
+            print(f"RosterRegistry: Reloaded roster: +{summary['added']} ~{summary['changed']} "
+                  f"-{summary['removed']} in {elapsed:.3f}s.")
+            return diff
+
+    async def reload_async(self) -> Optional[Dict]:
+        """Runs reload() in a worker thread, then notifies listeners on the event loop."""
+        try:
+            diff = await asyncio.to_thread(self.reload)
+        except Exception as e:
+            print(f"RosterRegistry: Reload failed, keeping the current roster: {e}")
+            self.stats["reload_errors"] += 1
+            return None
+        if diff and (diff["added"] or diff["changed"] or diff["removed"]):
+            for listener in self._listeners:
+                listener(diff)
+        return diff
+
+    def start_watching(self):
+        """Polls the sheet every ANTIGRAVITY_ROSTER_WATCH_INTERVAL_S seconds (no-op if 0)."""
+        if self.watch_interval <= 0 or (self._watch_task is not None and not self._watch_task.done()):
+            return
+        self._watch_task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def stop_watching(self):
+        task, self._watch_task = self._watch_task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _watch(self):
+        seen = self._file_signature()
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            signature = self._file_signature()
+            if signature != seen:
+                seen = signature  # still being written; reload once it has been stable for a full interval
+                continue
+            if self._loaded and signature is not None and signature != self._signature:
+                await self.reload_async()
+
+
+_registry: Optional[RosterRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_roster_registry() -> RosterRegistry:
+    """The shared RosterRegistry for this process."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = RosterRegistry()
+    return _registry
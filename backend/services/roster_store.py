@@ -0,0 +1,206 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.models.data_models import PatientProfile, Biomarkers, RiskLevel
+
+DEFAULT_HEIGHT = 170.0  # the sheet has BMI but no height/weight
+
+# Low-cardinality text columns, stored as codes into a list of interned strings
+CATEGORICAL_COLUMNS = ("risk_level", "motivation_level", "physician_name", "sex", "risk_source")
+INT_COLUMNS = ("age", "risk_score_numeric", "systolic_bp", "diastolic_bp")
+# family_history: 1 / 0, NaN when not recorded
+FLOAT_COLUMNS = ("a1c", "fbs", "ldl", "hdl", "total_cholesterol", "weight", "triglycerides", "family_history")
+# Columns added to the layout later, and what a roster without them holds ("" reads back as None)
+DEFAULT_COLUMNS = {"triglycerides": 0.0, "family_history": np.nan, "sex": "", "risk_source": ""}
+
+_RISK_LEVELS = {level.value: level for level in RiskLevel}
+
+
+def _codes_dtype(size: int) -> np.dtype:
+    return np.dtype(np.uint8 if size <= 1 << 8 else np.uint16 if size <= 1 << 16 else np.uint32)
+
+
+class _Utf8Column:
+    """Variable-length strings as one UTF-8 buffer plus offsets (no per-row Python objects)."""
+
+    def __init__(self, values: np.ndarray):
+        encoded = [value.encode("utf-8") for value in values.tolist()]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=self.offsets[1:])
+        self.buffer = b"".join(encoded)
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + len(self.buffer)
+
+    def __getitem__(self, row: int) -> str:
+        return self.buffer[self.offsets[row]:self.offsets[row + 1]].decode("utf-8")
+
+    def tolist(self) -> List[str]:
+        bounds = self.offsets.tolist()
+        return [self.buffer[start:end].decode("utf-8") for start, end in zip(bounds, bounds[1:])]
+
+
+class RosterStore(Mapping[str, PatientProfile]):
+    """
+    The parsed roster kept as columns: numeric fields in narrow numpy arrays,
+    names in a single UTF-8 buffer, the CATEGORICAL_COLUMNS (risk level,
+    segment, physician...) as codes into interned strings. It is a read-only Mapping of user_id to
+    PatientProfile; a profile is only built when someone asks for it, and the
+    most recently used ones (ANTIGRAVITY_ROSTER_PROFILE_CACHE, default 1024)
+    are kept so repeated lookups return the same object.
+
+    user_id lookups binary-search a sorted copy of the IDs. A user_id listed
+    twice in the sheet resolves to its last row, as the dict it replaces did.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], profile_cache_size: int = None):
+        self.profile_cache_size = (
+            profile_cache_size if profile_cache_size is not None
+            else int(os.getenv("ANTIGRAVITY_ROSTER_PROFILE_CACHE", "1024"))
+        )
+        if not columns:  # missing or unreadable sheet
+            columns = {name: np.empty(0, dtype=np.int64 if name in INT_COLUMNS else np.float64 if name in FLOAT_COLUMNS else str)
+                       for name in ("user_id", "name", *INT_COLUMNS, *FLOAT_COLUMNS, *CATEGORICAL_COLUMNS)}
+        user_ids = columns["user_id"]
+        columns = {**{name: np.full(len(user_ids), value) for name, value in DEFAULT_COLUMNS.items()}, **columns}
+        # Keep the last row of each user_id, in sheet order
+        _, last_from_end = np.unique(user_ids[::-1], return_index=True)
+        rows = np.sort(len(user_ids) - 1 - last_from_end)
+
+        self.user_ids = user_ids[rows]
+        self._order = np.argsort(self.user_ids, kind="stable").astype(np.int32)
+        self._sorted_ids = self.user_ids[self._order]
+        self._names = _Utf8Column(columns["name"][rows])
+        self._ints: Dict[str, np.ndarray] = {}
+        self._floats: Dict[str, np.ndarray] = {}
+        self._codes: Dict[str, np.ndarray] = {}
+        self._categories: Dict[str, List[str]] = {}
+        for name in INT_COLUMNS:
+            values = columns[name][rows]
+            small = len(values) == 0 or (values.min() >= np.iinfo(np.int32).min and values.max() <= np.iinfo(np.int32).max)
+            self._ints[name] = values.astype(np.int32 if small else np.int64)
+        for name in FLOAT_COLUMNS:
+            # float64 on purpose: float32 would change the values profiles report
+            self._floats[name] = columns[name][rows].astype(np.float64)
+        for name in CATEGORICAL_COLUMNS:
+            categories, codes = np.unique(columns[name][rows], return_inverse=True)
+            self._categories[name] = [sys.intern(value) for value in categories.tolist()]
+            self._codes[name] = codes.astype(_codes_dtype(len(categories)))
+
+        self._profiles: "OrderedDict[str, PatientProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"materialized": 0, "hits": 0}
+
+    # --- Mapping ---
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.user_ids.tolist())
+
+    def __contains__(self, user_id) -> bool:
+        return self._row(user_id) is not None
+
+    def __getitem__(self, user_id: str) -> PatientProfile:
+        with self._lock:
+            profile = self._profiles.get(user_id)
+            if profile is not None:
+                self._profiles.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return profile
+        row = self._row(user_id)
+        if row is None:
+            raise KeyError(user_id)
+        profile = self._materialize(row)
+        self._remember(user_id, profile)
+        return profile
+
+    # --- Columns ---
+
+    def _row(self, user_id) -> Optional[int]:
+        if not isinstance(user_id, str) or not len(self._sorted_ids):
+            return None
+        i = int(np.searchsorted(self._sorted_ids, user_id))
+        if i < len(self._sorted_ids) and self._sorted_ids[i] == user_id:
+            return int(self._order[i])
+        return None
+
+    def _materialize(self, row: int) -> PatientProfile:
+        ints = {name: int(values[row]) for name, values in self._ints.items()}
+        floats = {name: float(values[row]) for name, values in self._floats.items()}
+        text = {name: self._categories[name][self._codes[name][row]] for name in CATEGORICAL_COLUMNS}
+        biomarkers = Biomarkers.model_construct(
+            a1c=floats["a1c"], fbs=floats["fbs"], systolic_bp=ints["systolic_bp"], diastolic_bp=ints["diastolic_bp"],
+            ldl=floats["ldl"], hdl=floats["hdl"], total_cholesterol=floats["total_cholesterol"],
+            weight=floats["weight"], height=DEFAULT_HEIGHT, triglycerides=floats["triglycerides"],
+        )
+        family_history = floats["family_history"]
+        self.stats["materialized"] += 1
+        # Values were typed column-wise at parse time, so no per-profile validation
+        return PatientProfile.model_construct(
+            user_id=str(self.user_ids[row]), name=self._names[row], age=ints["age"],
+            diabetes_risk_score=_RISK_LEVELS[text["risk_level"]], risk_score_numeric=ints["risk_score_numeric"],
+            biomarkers=biomarkers, motivation_level=text["motivation_level"], physician_name=text["physician_name"],
+            sex=text["sex"] or None, family_history=None if family_history != family_history else bool(family_history),
+            risk_source=text["risk_source"] or None,
+        )
+
+    def _remember(self, user_id: str, profile: PatientProfile):
+        if self.profile_cache_size <= 0:
+            return
+        with self._lock:
+            self._profiles[user_id] = profile
+            self._profiles.move_to_end(user_id)
+            while len(self._profiles) > self.profile_cache_size:
+                self._profiles.popitem(last=False)
+
+    def adopt(self, other: "RosterStore", exclude: Set[str]):
+        """Carries over `other`'s cached profiles, except `exclude`, so unchanged rows keep their objects."""
+        with other._lock:
+            carried = [(user_id, profile) for user_id, profile in other._profiles.items() if user_id not in exclude]
+        for user_id, profile in carried:
+            if user_id in self:
+                self._remember(user_id, profile)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """The roster decoded back into parse_roster-style arrays (for diffing and indexing)."""
+        if not len(self):
+            return {}
+        columns = {"user_id": self.user_ids, "name": np.array(self._names.tolist(), dtype=str)}
+        columns.update({name: values.astype(np.int64) for name, values in self._ints.items()})
+        columns.update(self._floats)
+        for name in CATEGORICAL_COLUMNS:
+            columns[name] = np.array(self._categories[name], dtype=str)[self._codes[name]]
+        return columns
+
+    def names(self, rows: np.ndarray = None) -> List[str]:
+        if rows is None:
+            return self._names.tolist()
+        return [self._names[row] for row in rows.tolist()]
+
+    def numeric(self, name: str) -> np.ndarray:
+        """A numeric column (INT_COLUMNS / FLOAT_COLUMNS), one value per row."""
+        return self._ints[name] if name in self._ints else self._floats[name]
+
+    def categorical(self, name: str) -> Tuple[np.ndarray, List[str]]:
+        """(codes, categories) of a CATEGORICAL_COLUMNS column; row i is categories[codes[i]]."""
+        return self._codes[name], self._categories[name]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the columns (excluding materialized profiles)."""
+        arrays = [self.user_ids, self._order, self._sorted_ids, *self._ints.values(), *self._floats.values(),
+                  *self._codes.values()]
+        strings = sum(sys.getsizeof(value) for values in self._categories.values() for value in values)
+        return sum(values.nbytes for values in arrays) + self._names.nbytes + strings
+
+    @property
+    def cached_profiles(self) -> int:
+        return len(self._profiles)
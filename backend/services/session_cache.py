@@ -0,0 +1,104 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+from backend.models.data_models import AgentState
+
+
+class SessionCache:
+    """
+    Bounded in-memory cache of live AgentStates.
+
+    Entries are kept in least-recently-used order and evicted when the cache is
+    full or when a session has been idle for longer than `idle_ttl` seconds.
+    Eviction is safe because every mutated state has already been handed to the
+    write-behind buffer (write-through), which keeps its own reference until the
+    state is flushed.
+    """
+
+    def __init__(self, max_size: int = None, idle_ttl: float = None):
+        self.max_size = max_size or int(os.getenv("ANTIGRAVITY_SESSION_CACHE_SIZE", "1000"))
+        self.idle_ttl = idle_ttl if idle_ttl is not None else float(os.getenv("ANTIGRAVITY_SESSION_IDLE_TTL", "1800"))
+        self._entries: "OrderedDict[str, Tuple[AgentState, float]]" = OrderedDict()
+
+        # Observability
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0     # capacity (LRU) evictions
+        self.expirations = 0   # idle-TTL evictions
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def items(self):
+        return [(user_id, state) for user_id, (state, _) in self._entries.items()]
+
+    def get(self, user_id: str) -> Optional[AgentState]:
+        entry = self._entries.get(user_id)
+        now = time.monotonic()
+        if entry is None:
+            self.misses += 1
+            return None
+        state, last_access = entry
+        if self.idle_ttl and now - last_access > self.idle_ttl:
+            del self._entries[user_id]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries[user_id] = (state, now)
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return state
+
+    def peek(self, user_id: str) -> Optional[AgentState]:
+        """The cached state without counting a lookup or refreshing its recency."""
+        entry = self._entries.get(user_id)
+        return entry[0] if entry else None
+
+    def put(self, user_id: str, state: AgentState):
+        now = time.monotonic()
+        self._entries[user_id] = (state, now)
+        self._entries.move_to_end(user_id)
+        self.evict_expired(now)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, user_id: str, default=None) -> Optional[AgentState]:
+        entry = self._entries.pop(user_id, None)
+        return entry[0] if entry else default
+
+    def evict_expired(self, now: float = None) -> int:
+        """Drops idle sessions. Entries are in access order, so only the expired prefix is visited."""
+        if not self.idle_ttl:
+            return 0
+        now = now or time.monotonic()
+        expired = 0
+        while self._entries:
+            user_id, (_, last_access) = next(iter(self._entries.items()))
+            if now - last_access <= self.idle_ttl:
+                break
+            del self._entries[user_id]
+            expired += 1
+        self.expirations += expired
+        return expired
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
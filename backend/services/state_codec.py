@@ -0,0 +1,96 @@
+"""
+Versioned storage codec for persisted state payloads (user_states blobs, archives).
+
+Layout of an encoded payload:
+
+    b"AG" | version (1 byte) | flags (1 byte) | body
+
+The body is UTF-8 JSON produced by pydantic's Rust serializer (for typed
+payloads) or orjson (for plain dicts/lists), zlib-compressed when it is larger
+than the compression threshold and compression actually helps. Rows written
+before the codec existed are plain JSON TEXT and are decoded transparently.
+"""
+import json
+import os
+import zlib
+from functools import lru_cache
+from typing import Any, Optional
+
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; stdlib json produces the same bytes format
+    orjson = None
+
+MAGIC = b"AG"
+VERSION = 1
+FLAG_ZLIB = 0x01
+HEADER_SIZE = len(MAGIC) + 2
+
+COMPRESS_THRESHOLD = int(os.getenv("ANTIGRAVITY_COMPRESS_THRESHOLD", "1024"))
+COMPRESS_LEVEL = 1  # fastest level; state blobs are written far more often than archived
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _loads(body: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def encode(value: Any, schema=None, compress_threshold: int = None) -> bytes:
+    """
+    Encodes `value` into a versioned payload. Pass `schema` (a pydantic model or
+    type such as List[Message]) to serialize with pydantic's Rust serializer.
+    """
+    body = _adapter(schema).dump_json(value) if schema is not None else _dumps(value)
+    threshold = COMPRESS_THRESHOLD if compress_threshold is None else compress_threshold
+    flags = 0
+    if threshold >= 0 and len(body) >= threshold:
+        compressed = zlib.compress(body, COMPRESS_LEVEL)
+        if len(compressed) < len(body):
+            body, flags = compressed, flags | FLAG_ZLIB
+    return MAGIC + bytes((VERSION, flags)) + body
+
+
+def is_encoded(raw: Any) -> bool:
+    return isinstance(raw, (bytes, bytearray, memoryview)) and bytes(raw[:2]) == MAGIC
+
+
+def decode_body(raw: Any) -> Optional[bytes]:
+    """Returns the JSON body of a payload, accepting legacy JSON TEXT rows."""
+    if raw is None:
+        return None
+    if isinstance(raw, str):
+        return raw.encode("utf-8")
+    raw = bytes(raw)
+    if raw[:2] != MAGIC:
+        return raw  # legacy JSON stored as bytes
+    version, flags = raw[2], raw[3]
+    if version > VERSION:
+        raise ValueError(f"state_codec: payload version {version} is newer than supported version {VERSION}")
+    body = raw[HEADER_SIZE:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+    return body
+
+
+def decode(raw: Any, schema=None) -> Any:
+    """Decodes a payload (or legacy JSON text) into `schema`, or plain Python objects."""
+    body = decode_body(raw)
+    if body is None:
+        return None
+    if schema is not None:
+        return _adapter(schema).validate_json(body)
+    return _loads(body)
@@ -0,0 +1,46 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+
+class UserTurnLocks:
+    """
+    Per-user mailbox for conversation turns.
+
+    Turns for the same user run strictly one at a time, in arrival order
+    (asyncio.Lock wakes waiters FIFO); turns for different users never wait on
+    each other. A user's lock only exists while a turn holds or waits on it, so
+    idle users cost no memory.
+    """
+
+    def __init__(self):
+        # user_id -> [lock, holders + waiters]
+        self._locks: Dict[str, List] = {}
+
+        # Observability
+        self.turns = 0
+        self.contended = 0  # turns that had to queue behind another turn of the same user
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, user_id: str):
+        entry = self._locks.get(user_id)
+        if entry is None:
+            entry = self._locks[user_id] = [asyncio.Lock(), 0]
+        elif entry[1]:
+            self.contended += 1
+        entry[1] += 1
+        self.turns += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[user_id]
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"active_users": len(self._locks), "turns": self.turns, "contended": self.contended}
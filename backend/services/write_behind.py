@@ -0,0 +1,114 @@
+import asyncio
+import os
+from typing import Dict, Optional
+
+from backend.models.data_models import AgentState
+
+
+class StateWriteBuffer:
+    """
+    Write-behind buffer for AgentState saves.
+
+    Keeps only the latest dirty state per user and flushes every dirty user in a
+    single transaction once `max_batch` users are dirty or `flush_interval`
+    seconds have passed. States are serialized at flush time, so a user who
+    takes several turns between flushes costs one row write.
+
+    A state stays visible through pending() until its save has committed:
+    while a flush is in flight its batch is kept in `_in_flight`, so a session
+    evicted from the cache meanwhile is not reloaded from the older DB row.
+
+    Ordering: flushes run one at a time and the pool's writer queue is FIFO, so
+    a newer snapshot of a user can never be committed before an older one.
+    """
+
+    def __init__(self, persistence, max_batch: int = None, flush_interval: float = None):
+        self.persistence = persistence
+        self.max_batch = max_batch or int(os.getenv("ANTIGRAVITY_FLUSH_BATCH", "100"))
+        self.flush_interval = flush_interval or float(os.getenv("ANTIGRAVITY_FLUSH_INTERVAL_MS", "250")) / 1000
+
+        self._dirty: Dict[str, AgentState] = {}
+        self._in_flight: Dict[str, AgentState] = {}  # the batch being committed by flush()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        # Observability
+        self.stats = {"marked": 0, "coalesced": 0, "flushes": 0, "states_written": 0, "flush_errors": 0}
+
+    def __len__(self) -> int:
+        return len(self._dirty)
+
+    def pending(self, user_id: str) -> Optional[AgentState]:
+        """The not-yet-committed state for `user_id`, which is newer than the DB copy."""
+        state = self._dirty.get(user_id)
+        return state if state is not None else self._in_flight.get(user_id)
+
+    def mark_dirty(self, user_id: str, state: AgentState):
+        """Schedules `state` to be persisted. Never blocks the caller."""
+        self._ensure_started()
+        self.stats["marked"] += 1
+        if user_id in self._dirty:
+            self.stats["coalesced"] += 1
+        self._dirty[user_id] = state
+        if len(self._dirty) >= self.max_batch:
+            self._wakeup.set()
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is not None and self._loop is loop and not self._task.done():
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._closing = False
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._dirty:
+                await self.flush()
+
+    async def flush(self):
+        """Writes every currently dirty state in one transaction."""
+        if self._flush_lock is None:
+            self._ensure_started()
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            batch, self._dirty = self._dirty, {}
+            self._in_flight = batch
+            try:
+                await self.persistence.save_states(batch)
+            except BaseException as e:
+                # Re-queue (also when cancelled), but never overwrite a state that was re-dirtied meanwhile
+                for user_id, state in batch.items():
+                    self._dirty.setdefault(user_id, state)
+                if not isinstance(e, Exception):
+                    raise
+                print(f"StateWriteBuffer: flush of {len(batch)} states failed, will retry: {e}")
+                self.stats["flush_errors"] += 1
+                return
+            finally:
+                self._in_flight = {}
+            self.stats["flushes"] += 1
+            self.stats["states_written"] += len(batch)
+
+    async def close(self):
+        """Stops the background flusher and drains everything still dirty."""
+        if self._task is None:
+            return
+        if self._loop is asyncio.get_running_loop():
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            await self.flush()
+        self._task = None
+        self._loop = None
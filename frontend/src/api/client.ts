@@ -12,11 +12,53 @@ export const apiClient = axios.create({
     },
 });
 
+export type ChatStreamHandlers = {
+    onToken: (text: string) => void;   // next piece of the reply
+    onReset?: () => void;              // a fallback provider restarts the reply: drop what was shown
+};
+
 export const api = {
     chat: async (userId: string, userInput: string) => {
         const response = await apiClient.post('/api/chat', { user_id: userId, user_input: userInput });
         return response.data;
     },
+    // Same turn as chat(), but the reply arrives token by token (Server-Sent Events).
+    // Resolves with the final { response, current_agent, ttft_ms, total_ms }.
+    chatStream: async (userId: string, userInput: string, handlers: ChatStreamHandlers) => {
+        const response = await fetch(`${API_BASE_URL}/api/chat/stream`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ user_id: userId, user_input: userInput }),
+        });
+        if (!response.ok || !response.body) {
+            throw new Error(`Request failed with status ${response.status}`);
+        }
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let event = 'message';
+                let data = '';
+                for (const line of block.split('\n')) {
+                    if (line.startsWith('event: ')) event = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                }
+                const payload = JSON.parse(data || '{}');
+                if (event === 'token') handlers.onToken(payload.text);
+                else if (event === 'reset') handlers.onReset?.();
+                else if (event === 'done') return payload;
+                else if (event === 'error') throw new Error(payload.detail);
+            }
+        }
+        throw new Error('The reply stream ended early');
+    },
     admin: {
         getAgents: async () => {
             const response = await apiClient.get('/api/admin/agents');
@@ -7,6 +7,7 @@ export default function Chat() {
     const [messages, setMessages] = useState<any[]>([]);
     const [input, setInput] = useState('');
     const [isLoading, setIsLoading] = useState(false);
+    const [isStreaming, setIsStreaming] = useState(false);
     const [userId, setUserId] = useState(() => {
         const saved = localStorage.getItem('antigravity_userId');
         if (saved) return saved;
@@ -52,18 +53,31 @@ export default function Chat() {
         setInput('');
         setIsLoading(true);
 
+        // The reply bubble appears with the first token and grows as more arrive
+        let reply = '';
+        let shown = false;
+        const show = (text: string) => {
+            const append = !shown;
+            shown = true;
+            setIsStreaming(true);
+            setMessages(prev => append
+                ? [...prev, { sender: 'ai', text }]
+                : [...prev.slice(0, -1), { sender: 'ai', text }]);
+        };
+
         try {
-            const result = await api.chat(userId, userMsg);
-            setMessages(prev => [...prev, { sender: 'ai', text: result.response }]);
+            const result = await api.chatStream(userId, userMsg, {
+                onToken: (piece) => { reply += piece; show(reply); },
+                onReset: () => { reply = ''; show(reply); },
+            });
+            show(result.response);
         } catch (error: any) {
             console.error("Chat API error:", error);
             let errorMsg = error.response?.data?.detail || error.message || "Network Interruption";
-            setMessages(prev => [...prev, {
-                sender: 'ai',
-                text: `I've encountered a brief disconnection from the strata. (Error: ${errorMsg}). Please try again shortly.`
-            }]);
+            show(`I've encountered a brief disconnection from the strata. (Error: ${errorMsg}). Please try again shortly.`);
         } finally {
             setIsLoading(false);
+            setIsStreaming(false);
         }
     };
 
@@ -119,7 +133,7 @@ export default function Chat() {
                     ))}
                 </AnimatePresence>
 
-                {isLoading && (
+                {isLoading && !isStreaming && (
                     <motion.div
                         initial={{ opacity: 0 }}
                         animate={{ opacity: 1 }}
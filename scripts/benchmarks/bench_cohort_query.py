@@ -0,0 +1,68 @@
+"""
+Benchmark: cohort queries over 100k (and 1M) synthetic patients.
+
+Times, per query, the median of 20 runs of
+  - loop:   a Python loop over materialized PatientProfiles (the old way)
+  - count:  cohort.count (mask only)
+  - page:   cohort.page, first 50 records
+  - groups: cohort.group_by physician with a1c / systolic_bp metrics
+
+Usage: python scripts/benchmarks/bench_cohort_query.py [--sizes 100000,1000000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_roster_memory import make_columns
+from backend.models.data_models import RiskLevel
+from backend.services import cohort
+from backend.services.roster_store import RosterStore
+
+QUERIES = [
+    ("a1c >= 6.0 and risk == High", lambda p: p.biomarkers.a1c >= 6.0 and p.diabetes_risk_score == RiskLevel.HIGH),
+    ("systolic between 130 and 160 and physician == 'Dr. Wei Zhang'",
+     lambda p: 130 <= p.biomarkers.systolic_bp <= 160 and p.physician_name == "Dr. Wei Zhang"),
+    ("(ldl > 4 or hdl < 1) and not segment in (Action, Unknown)",
+     lambda p: (p.biomarkers.ldl > 4 or p.biomarkers.hdl < 1) and p.motivation_level not in ("Action", "Unknown")),
+]
+
+
+def median_ms(fn, runs: int = 20) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000")
+    args = parser.parse_args()
+
+    for rows in [int(size) for size in args.sizes.split(",")]:
+        store = RosterStore(make_columns(rows), profile_cache_size=0)
+        profiles = [store[user_id] for user_id in store] if rows <= 100_000 else None
+        print(f"\n{rows} patients")
+        print(f"{'loop':>9} | {'count':>8} | {'page':>8} | {'groups':>8} | {'matches':>7} | query")
+        for query, predicate in QUERIES:
+            total = cohort.count(store, query)
+            if profiles is not None:
+                assert sum(1 for p in profiles if predicate(p)) == total
+                loop = f"{median_ms(lambda: [p for p in profiles if predicate(p)], runs=3):>7.1f}ms"
+            else:
+                loop = f"{'-':>9}"
+            count_ms = median_ms(lambda: cohort.count(store, query))
+            page_ms = median_ms(lambda: cohort.page(store, query, limit=50))
+            groups_ms = median_ms(lambda: cohort.group_by(store, query, "physician", ["a1c", "systolic"]))
+            print(f"{loop} | {count_ms:>6.2f}ms | {page_ms:>6.2f}ms | {groups_ms:>6.2f}ms | {total:>7} | {query}")
+
+
+if __name__ == "__main__":
+    main()
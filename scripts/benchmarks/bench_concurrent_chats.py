@@ -0,0 +1,121 @@
+"""
+Benchmark: N concurrent chats against a slow LLM, before and after making
+MCPServer.predict non-blocking.
+
+Each chat's LLM call takes a random 0.2-1.0s (seeded). Measured:
+  - wall:     time until every chat has its answer
+  - sum/max:  the sum and the max of the individual call latencies
+  - loop lag: worst delay of a 10ms heartbeat task (what /health would see)
+
+  - blocking: the previous behaviour, predictor(**inputs) called inline
+  - async:    MCPServer.predict with DSPy's async path (acall)
+  - thread:   MCPServer.predict with a sync-only predictor (worker thread)
+
+Usage: python scripts/benchmarks/bench_concurrent_chats.py [--chats 20] [--limit 0]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.mcp_server.mcp_server import MCPServer
+from backend.models.data_models import AgentState, PatientProfile, RiskLevel, Biomarkers
+from backend.models.signatures import EducationSignature
+from backend.services.provider_limits import ProviderLimits
+from backend.services.response_cache import ResponseCache
+
+
+class FakeLLM:
+    """A predictor whose answer for user_input 'i' takes latencies[i] seconds."""
+
+    def __init__(self, latencies):
+        self.latencies = latencies
+
+    def __call__(self, **inputs):
+        time.sleep(self.latencies[int(inputs["user_input"])])
+        return "ok"
+
+
+class AsyncFakeLLM(FakeLLM):
+    async def acall(self, **inputs):
+        await asyncio.sleep(self.latencies[int(inputs["user_input"])])
+        return "ok"
+
+
+def make_server(predictor, limit: int) -> MCPServer:
+    server = MCPServer()
+    server.lms = [MagicMock(provider_name="Fake", model="fake/model")]
+    server.predictor_cache = {EducationSignature: predictor}
+    server.response_cache = ResponseCache(signatures="")
+    server.provider_limits = ProviderLimits(default_limit=limit)
+
+    async def record(**fields):
+        pass
+    server.audit = MagicMock(record=record)
+    return server
+
+
+def make_state(i: int) -> AgentState:
+    return AgentState(current_agent="education", conversation_history=[], patient_profile=PatientProfile(
+        user_id=f"bench_{i}", name="Bench", age=50, diabetes_risk_score=RiskLevel.MODERATE, risk_score_numeric=40,
+        biomarkers=Biomarkers(a1c=5.9, fbs=5.6, systolic_bp=128, diastolic_bp=82, ldl=3.1, hdl=1.2,
+                              total_cholesterol=5.0, weight=80, height=175),
+    ))
+
+
+async def run(chats: int, call) -> tuple:
+    lag = 0.0
+
+    async def heartbeat():
+        nonlocal lag
+        while True:
+            before = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - before - 0.01)
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*[call(i) for i in range(chats)])
+    wall = time.perf_counter() - started
+    await asyncio.sleep(0.02)  # let the heartbeat observe a stall that just ended
+    beat.cancel()
+    return wall, lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=0, help="per-provider concurrency limit (0 = unlimited)")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    latencies = [rng.uniform(0.2, 1.0) for _ in range(args.chats)]
+    print(f"{args.chats} chats, sum of latencies {sum(latencies):.2f}s, slowest {max(latencies):.2f}s")
+    print(f"{'mode':>9} | {'wall':>7} | {'loop lag':>8}")
+
+    blocking = FakeLLM(latencies)
+
+    async def blocking_call(i):
+        await asyncio.sleep(0)
+        return blocking(user_input=str(i))  # the old inline call
+
+    modes = [
+        ("blocking", blocking_call),
+        ("async", lambda i, server=make_server(AsyncFakeLLM(latencies), args.limit):
+            server.predict(EducationSignature, make_state(i), user_input=str(i))),
+        ("thread", lambda i, server=make_server(FakeLLM(latencies), args.limit):
+            server.predict(EducationSignature, make_state(i), user_input=str(i))),
+    ]
+    for name, call in modes:
+        wall, lag = asyncio.run(run(args.chats, call))
+        print(f"{name:>9} | {wall:>6.2f}s | {lag * 1000:>6.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: history tokens per prompt as a conversation grows, before and
+after the token-budgeted ContextBuilder.
+
+A synthetic motivation-phase conversation: messages of 20-120 words, with
+the patient's importance rating stated in the very first message.
+
+  - last8:   the previous behaviour, the last 8 messages whatever their length
+  - budget:  ContextBuilder (default 1000-token budget, 300-token rolling summary)
+
+Reported at several conversation lengths: history tokens in that turn's
+prompt, whether the early rating is still in the prompt, and the mean build
+time. Summary updates run between turns, as they do in the app.
+
+Usage: python scripts/benchmarks/bench_context_builder.py [--turns 200] [--budget 1000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.models.data_models import AgentState, PatientProfile, RiskLevel, Biomarkers, Message
+from backend.services.context_builder import ContextBuilder, estimate_tokens
+
+WORDS = ("walk dinner sugar tired family work stress sleep vegetables weekend doctor morning energy "
+         "snack water goal week try feel better habit plan small step").split()
+RATING = "On importance I'd say 8 out of 10"
+
+
+def make_message(rng: random.Random, role: str) -> Message:
+    return Message(role=role, content=" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120))) + ".")
+
+
+def make_state() -> AgentState:
+    return AgentState(current_agent="motivation", conversation_history=[], patient_profile=PatientProfile(
+        user_id="bench_context", name="Bench", age=50, diabetes_risk_score=RiskLevel.MODERATE, risk_score_numeric=40,
+        biomarkers=Biomarkers(a1c=5.9, fbs=5.6, systolic_bp=128, diastolic_bp=82, ldl=3.1, hdl=1.2,
+                              total_cholesterol=5.0, weight=80, height=175),
+    ))
+
+
+def last8(state: AgentState) -> str:
+    return "\n".join([f"{m.role}: {m.content}" for m in state.conversation_history[-8:]])
+
+
+async def run(turns: int, budget: int, checkpoints: set):
+    rng = random.Random(5)
+    builder = ContextBuilder(default_budget=budget)
+    state = make_state()
+    state.conversation_history.append(Message(role="user", content=RATING + ", it really matters to me."))
+    rows, build_seconds = [], 0.0
+    for turn in range(1, turns + 1):
+        if turn > 1:
+            state.conversation_history.append(make_message(rng, "user"))
+        started = time.perf_counter()
+        history = builder.build("MotivationSignature", state)
+        build_seconds += time.perf_counter() - started
+        if turn in checkpoints:
+            old = last8(state)
+            rows.append((turn, estimate_tokens(old), RATING in old, estimate_tokens(history), "8 out of 10" in history))
+        state.conversation_history.append(make_message(rng, "assistant"))
+        await builder.drain()  # the background summary update, between turns
+    return rows, build_seconds / turns, builder.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=1000)
+    args = parser.parse_args()
+
+    checkpoints = {t for t in (1, 5, 10, 25, 50, 100, 200, 500) if t <= args.turns} | {args.turns}
+    rows, mean_build, stats = asyncio.run(run(args.turns, args.budget, checkpoints))
+    print(f"{'turn':>5}  {'last8 tokens':>12}  {'rating kept':>11}  {'budget tokens':>13}  {'rating kept':>11}")
+    for turn, old_tokens, old_kept, new_tokens, new_kept in rows:
+        print(f"{turn:>5}  {old_tokens:>12}  {str(old_kept):>11}  {new_tokens:>13}  {str(new_kept):>11}")
+    print(f"max history tokens: {stats['max_tokens_sent']} (budget {args.budget}); "
+          f"tokens saved vs whole in-memory history: {stats['tokens_saved']}")
+    print(f"summary updates: {stats['summary_updates']} ({stats['summarized_messages']} messages folded); "
+          f"mean build time: {mean_build * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: profile context per LLM call, before and after per-signature
+projection with memoized serialization.
+
+  - full:      state.patient_profile.model_dump_json() on every call (previous behaviour)
+  - projected: ProfileProjector.project(signature, profile), memoized per profile revision
+
+Reports estimated prompt tokens of the profile input per signature (with a
+psychographics dict), then the CPU per call (best of --repeat runs) over a simulated session of
+--turns turns, one call per turn, going through the four phases in order,
+where the profile changes every --change-every turns (as when
+MotivationAgent records new ratings).
+
+Usage: python scripts/benchmarks/bench_context_projection.py [--turns 2000] [--change-every 5] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.models.data_models import PatientProfile, RiskLevel, Biomarkers
+from backend.services.context_builder import estimate_tokens
+from backend.services.context_projection import PROJECTIONS, ProfileProjector
+
+
+def make_profile() -> PatientProfile:
+    return PatientProfile(
+        user_id="bench_projection", name="Sam", age=52, diabetes_risk_score=RiskLevel.HIGH, risk_score_numeric=60,
+        biomarkers=Biomarkers(a1c=6.1, fbs=5.9, systolic_bp=128, diastolic_bp=82, ldl=3.1, hdl=1.2,
+                              total_cholesterol=5.0, weight=80, height=175),
+        psychographics={"activity": "walks the dog most evenings", "diet": "skips breakfast, large dinners",
+                        "support": "spouse, two adult children", "work": "shift work, nights twice a week",
+                        "sleep": "about 6 hours", "cooking": "partner cooks on weekdays"},
+        barriers=["time", "night shifts"], facilitators=["grandchildren", "doctor's advice"],
+    )
+
+
+def run(turns: int, change_every: int, use_projector: bool):
+    profile = make_profile()
+    projector = ProfileProjector()
+    phases = list(PROJECTIONS)
+    started = time.perf_counter()
+    for turn in range(turns):
+        if turn % change_every == 0:
+            profile.importance_rating = float(turn % 10 + 1)
+        signature_name = phases[turn * len(phases) // turns]
+        if use_projector:
+            projector.project(signature_name, profile)
+        else:
+            profile.model_dump_json()
+    return (time.perf_counter() - started) / turns, projector.stats["serializations"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--change-every", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    args = parser.parse_args()
+
+    profile = make_profile()
+    projector = ProfileProjector()
+    full = estimate_tokens(profile.model_dump_json())
+    print(f"{'signature':<22}  {'full tokens':>11}  {'projected':>9}  {'saved':>6}")
+    for signature_name in PROJECTIONS:
+        projected = estimate_tokens(projector.project(signature_name, profile))
+        print(f"{signature_name:<22}  {full:>11}  {projected:>9}  {1 - projected / full:>6.0%}")
+
+    before = min(run(args.turns, args.change_every, use_projector=False)[0] for _ in range(args.repeat))
+    after, serializations = min(run(args.turns, args.change_every, use_projector=True) for _ in range(args.repeat))
+    print(f"CPU per call: full {before * 1e6:.1f}us, projected {after * 1e6:.1f}us ({before / after:.1f}x); "
+          f"{serializations} serializations for {args.turns} calls (profile changed every {args.change_every} turns)")
+
+
+if __name__ == "__main__":
+    main()
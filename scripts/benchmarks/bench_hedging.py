@@ -0,0 +1,117 @@
+"""
+Benchmark: tail latency of MCPServer.predict with and without hedging.
+
+Two fake providers with the same latency distribution: most calls take
+~40ms, but a `--tail` fraction (default 5%) stalls for 800ms, independently
+per call. Requests run `--concurrency` at a time; the first `--warmup` are not
+measured (they teach ProviderHealth each provider's latency percentile).
+
+  - off:    no hedging, every request waits for its first provider
+  - hedged: HedgePolicy with the defaults (p95 delay, 10% rate cap)
+
+Reported: p50 / p95 / p99 / max latency, the share of requests that hedged
+and the extra upstream calls / estimated prompt tokens they cost.
+
+Usage: python scripts/benchmarks/bench_hedging.py [--requests 1000] [--tail 0.05]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from unittest.mock import MagicMock
+
+import dspy
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.mcp_server.mcp_server import MCPServer
+from backend.models.data_models import AgentState, PatientProfile, RiskLevel, Biomarkers
+from backend.models.signatures import EducationSignature
+from backend.services.hedging import HedgePolicy
+from backend.services.provider_health import ProviderHealth
+from backend.services.provider_limits import ProviderLimits
+from backend.services.response_cache import ResponseCache
+
+
+class FakeLLM:
+    """~40ms per call, except a `tail` fraction of calls that stall for 800ms."""
+
+    def __init__(self, tail: float, seed: int):
+        self.tail = tail
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    async def acall(self, **inputs):
+        self.calls += 1
+        slow = self.random.random() < self.tail
+        await asyncio.sleep(0.8 if slow else self.random.uniform(0.03, 0.05))
+        return f"{dspy.settings.lm.provider_name}: ok"
+
+
+def make_server(predictor, hedging: HedgePolicy) -> MCPServer:
+    server = MCPServer()
+    server.lms = [MagicMock(provider_name="Primary", model="fake/a"), MagicMock(provider_name="Secondary", model="fake/b")]
+    server.predictor_cache = {EducationSignature: predictor}
+    server.response_cache = ResponseCache(signatures="")
+    server.provider_limits = ProviderLimits(default_limit=0)
+    server.health = ProviderHealth()
+    server.hedging = hedging
+
+    async def record(**fields):
+        pass
+    server.audit = MagicMock(record=record)
+    return server
+
+
+def make_state(i: int) -> AgentState:
+    return AgentState(current_agent="education", conversation_history=[], patient_profile=PatientProfile(
+        user_id=f"bench_{i}", name="Bench", age=50, diabetes_risk_score=RiskLevel.MODERATE, risk_score_numeric=40,
+        biomarkers=Biomarkers(a1c=5.9, fbs=5.6, systolic_bp=128, diastolic_bp=82, ldl=3.1, hdl=1.2,
+                              total_cholesterol=5.0, weight=80, height=175),
+    ))
+
+
+async def run(server: MCPServer, requests: int, warmup: int, concurrency: int) -> list:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await server.predict(EducationSignature, make_state(i), user_input="How do I eat better?")
+            if i >= warmup:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(warmup + requests)))
+    return sorted(latencies)
+
+
+def percentile(ordered: list, p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--tail", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests (+{args.warmup} warmup), {args.concurrency} concurrent, {args.tail:.0%} slow calls")
+    print(f"{'mode':<8}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}  {'hedged':>7}  {'upstream calls':>14}  {'extra tokens':>12}")
+    for mode, signatures in (("off", ""), ("hedged", "EducationSignature")):
+        predictor = FakeLLM(args.tail, args.seed)
+        server = make_server(predictor, HedgePolicy(signatures=signatures))
+        ordered = asyncio.run(run(server, args.requests, args.warmup, args.concurrency))
+        stats = server.hedging.stats
+        print(f"{mode:<8}{percentile(ordered, 50):>6.0f}ms{percentile(ordered, 95):>6.0f}ms"
+              f"{percentile(ordered, 99):>6.0f}ms{ordered[-1]:>6.0f}ms  {server.hedging.hedge_rate:>7.1%}"
+              f"  {predictor.calls:>14}  {stats['extra_prompt_tokens_est']:>12}")
+
+
+if __name__ == "__main__":
+    main()
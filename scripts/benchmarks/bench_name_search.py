@@ -0,0 +1,71 @@
+"""
+Benchmark: patient name lookups on a synthetic 100k-patient roster.
+
+Compares the previous linear, case-insensitive scan over every profile with
+NameIndex exact / prefix / fuzzy lookups and the ranked search, reporting the
+one-off index build time and mean latency per lookup.
+
+Usage: python scripts/benchmarks/bench_name_search.py [--patients 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.services.name_index import NameIndex
+
+FIRST = ["Abishek", "Alessia", "Alireza", "Aly", "Anita", "Arta", "Asha", "Benjamin", "Chen", "Dana", "Elif", "Farah",
+         "Gabriel", "Hana", "Ibrahim", "José", "Kiran", "Lena", "Mateo", "Nadia", "Omar", "Priya", "Quinn", "Rosa"]
+SYLLABLES = ["ka", "ro", "mi", "san", "del", "vo", "ter", "ash", "lin", "gu", "per", "zo", "han", "be", "ri", "mont",
+             "ell", "ad", "nu", "ski", "o", "ch", "ber", "wa", "ti", "mül", "fer", "qu", "yan", "ez"]
+
+
+def surname(rng):
+    # Pronounceable synthetic surnames: tens of thousands of distinct values, like a real roster
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def per_call(fn, queries, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            fn(query)
+    return (time.perf_counter() - started) / (len(queries) * repeat) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    names = [f"{rng.choice(FIRST)} {surname(rng)}" for _ in range(args.patients)]
+    user_ids = [str(1001 + i) for i in range(args.patients)]
+    queries = [names[rng.randrange(args.patients)] for _ in range(200)]
+
+    started = time.perf_counter()
+    index = NameIndex(user_ids, names)
+    build_s = time.perf_counter() - started
+
+    def linear(name):
+        name_lower = name.lower().strip()
+        for candidate in names:
+            if candidate.lower() == name_lower:
+                return candidate
+        return None
+
+    typos = [q[:3] + q[4:] for q in queries]  # drop one character
+    print(f"{args.patients} patients, index built in {build_s:.2f}s")
+    print(f"  linear scan   {per_call(linear, queries[:20]):8.3f} ms/lookup")
+    print(f"  exact         {per_call(index.exact, queries, repeat=20):8.4f} ms/lookup")
+    print(f"  prefix (4ch)  {per_call(lambda q: index.prefix(q[:4]), queries, repeat=5):8.4f} ms/lookup")
+    print(f"  fuzzy (typo)  {per_call(index.fuzzy, typos):8.3f} ms/lookup")
+    print(f"  search (typo) {per_call(lambda q: index.search(q, limit=20), typos):8.3f} ms/lookup")
+    print(f"  search (4ch)  {per_call(lambda q: index.search(q[:4], limit=20), queries):8.3f} ms/lookup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: INFORM outreach throughput (patients per minute) of OutreachJob
+by worker count, against fake LLM keys.
+
+A synthetic roster of --patients patients, all in the cohort. Each generation
+takes ~--latency-ms (uniform +-20%) on one of two fake keys. With --rpm, each
+key also has a client-side RateLimits quota, so throughput tops out at the
+combined quota instead of running into 429s.
+
+  - workers=1: one patient at a time, as when going through the chat flow
+  - workers=N: the bounded worker pool
+
+Reported: patients/min, elapsed time, checkpoint batches written and the
+quota waits.
+
+Usage: python scripts/benchmarks/bench_outreach.py [--patients 400] [--latency-ms 300] [--rpm 0]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from unittest.mock import MagicMock
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.mcp_server.mcp_server import MCPServer
+from backend.models.signatures import OutreachSignature
+from backend.services.outreach import OutreachJob
+from backend.services.provider_health import ProviderHealth
+from backend.services.provider_limits import ProviderLimits
+from backend.services.rate_limits import RateLimits
+from backend.services.response_cache import ResponseCache
+from backend.services.roster_store import RosterStore
+
+
+class FakeLLM:
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.random = random.Random(3)
+
+    async def acall(self, user_profile):
+        await asyncio.sleep(self.latency * self.random.uniform(0.8, 1.2))
+        return MagicMock(subject="An invitation from your clinic", message="Hello! " + user_profile[:40])
+
+
+def make_roster(n: int) -> RosterStore:
+    rng = np.random.default_rng(7)
+    return RosterStore({
+        "user_id": np.array([str(100000 + i) for i in range(n)]),
+        "name": np.array([f"Patient {i}" for i in range(n)]),
+        "age": rng.integers(30, 80, n), "risk_level": np.array(["High"] * n), "risk_score_numeric": rng.integers(50, 100, n),
+        "a1c": rng.uniform(5.7, 6.4, n).round(1), "fbs": rng.uniform(5.0, 6.5, n).round(1),
+        "systolic_bp": rng.integers(110, 160, n), "diastolic_bp": rng.integers(70, 100, n),
+        "ldl": rng.uniform(2, 4.5, n).round(1), "hdl": rng.uniform(0.8, 1.6, n).round(1),
+        "total_cholesterol": rng.uniform(3.5, 6.5, n).round(1), "weight": rng.uniform(55, 110, n).round(1),
+        "motivation_level": np.array(["Unknown"] * n), "physician_name": np.array(["Dr. Wei Zhang"] * n),
+    })
+
+
+async def run(roster: RosterStore, workers: int, latency_ms: float, rpm: int, db_path: str):
+    server = MCPServer()
+    server.lms = [MagicMock(provider_name=name, model="fake/gemini") for name in ("Gemini Primary", "Gemini Secondary")]
+    server.predictor_cache = {OutreachSignature: FakeLLM(latency_ms)}
+    server.response_cache = ResponseCache(signatures="")
+    server.provider_limits = ProviderLimits(default_limit=0)
+    server.health = ProviderHealth()
+    server.rate_limits = RateLimits(default_rpm=rpm, queue_timeout=600)
+
+    async def record(**fields):
+        pass
+    server.audit = MagicMock(record=record)
+    report = await OutreachJob(server, roster, db_path=db_path, workers=workers).run("risk == High")
+    return report, server.rate_limits.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--rpm", type=int, default=0, help="client-side quota per key (0: unlimited)")
+    parser.add_argument("--workers", default="1,8,32")
+    args = parser.parse_args()
+
+    roster = make_roster(args.patients)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in [int(w) for w in args.workers.split(",")]:
+            report, quota = asyncio.run(run(roster, workers, args.latency_ms, args.rpm, os.path.join(tmp, f"w{workers}.db")))
+            waits = [provider["wait_ms"]["p95"] for provider in quota.values() if provider["queued"]]
+            rows.append((workers, report, max(waits) if waits else 0))
+
+    print(f"{'workers':>7}  {'patients/min':>12}  {'elapsed s':>9}  {'batches':>7}  {'quota wait p95 ms':>17}")
+    for workers, report, wait in rows:
+        print(f"{workers:>7}  {report['patients_per_minute']:>12.0f}  {report['elapsed_s']:>9.1f}  "
+              f"{report['batches_written']:>7}  {wait:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
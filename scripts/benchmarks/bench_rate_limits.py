@@ -0,0 +1,137 @@
+"""
+Benchmark: MCPServer.predict against per-key quotas, with and without the
+client-side rate limiter.
+
+Two fake provider keys, each enforcing --rpm requests per minute server-side
+(a token bucket, already spent at the start, as in steady state): a call
+within quota takes ~200ms, one over quota is answered with a 429 after 50ms.
+Requests arrive at --rate per second for --seconds seconds (by default 25%
+more than the two keys' combined quota).
+
+  - reactive: no client limits; a 429 opens the key's circuit (breaker
+              cooldown scaled down to 1s) and the failover loop moves on
+  - limited:  RateLimits with the same --rpm per key; requests queue for
+              quota up to ANTIGRAVITY_LLM_QUEUE_TIMEOUT_S (10s)
+
+Reported: answered / failed requests, 429 round-trips spent, latency of the
+answered ones, and the limiter's queue depth and wait time.
+
+Usage: python scripts/benchmarks/bench_rate_limits.py [--rpm 240] [--rate 10] [--seconds 10]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from unittest.mock import MagicMock
+
+import dspy
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.mcp_server.mcp_server import MCPServer
+from backend.models.data_models import AgentState, PatientProfile, RiskLevel, Biomarkers
+from backend.models.signatures import EducationSignature
+from backend.services.provider_health import ProviderHealth
+from backend.services.provider_limits import ProviderLimits
+from backend.services.rate_limits import RateLimits
+from backend.services.response_cache import ResponseCache
+
+KEYS = ["Gemini Primary", "Gemini Secondary"]
+
+
+class QuotaLLM:
+    """Fake provider keys, each with a server-side requests-per-minute bucket."""
+
+    def __init__(self, rpm: int):
+        self.rpm = rpm
+        self.allowance = {key: 0.0 for key in KEYS}
+        self.updated = {key: time.monotonic() for key in KEYS}
+        self.rejected = 0
+
+    async def acall(self, **inputs):
+        key = dspy.settings.lm.provider_name
+        now = time.monotonic()
+        self.allowance[key] = min(self.rpm, self.allowance[key] + (now - self.updated[key]) * self.rpm / 60)
+        self.updated[key] = now
+        if self.allowance[key] < 1:
+            self.rejected += 1
+            await asyncio.sleep(0.05)
+            raise RuntimeError("429 Too Many Requests: Quota exceeded")
+        self.allowance[key] -= 1
+        await asyncio.sleep(0.2)
+        return f"{key}: ok"
+
+
+def make_state(i: int) -> AgentState:
+    return AgentState(current_agent="education", conversation_history=[], patient_profile=PatientProfile(
+        user_id=f"bench_quota_{i}", name="Bench", age=50, diabetes_risk_score=RiskLevel.MODERATE, risk_score_numeric=40,
+        biomarkers=Biomarkers(a1c=5.9, fbs=5.6, systolic_bp=128, diastolic_bp=82, ldl=3.1, hdl=1.2,
+                              total_cholesterol=5.0, weight=80, height=175),
+    ))
+
+
+async def run(rpm: int, rate: float, seconds: float, limited: bool):
+    llm = QuotaLLM(rpm)
+    server = MCPServer()
+    server.lms = [MagicMock(provider_name=key, model="fake/gemini") for key in KEYS]
+    server.predictor_cache = {EducationSignature: llm}
+    server.response_cache = ResponseCache(signatures="")
+    server.provider_limits = ProviderLimits(default_limit=0)
+    server.health = ProviderHealth(cooldown=1.0, max_cooldown=4.0)
+    server.rate_limits = RateLimits(default_rpm=rpm if limited else 0)
+
+    async def record(**fields):
+        pass
+    server.audit = MagicMock(record=record)
+    if limited:
+        for key in KEYS:
+            server.rate_limits._bucket(key).requests = 0  # quota already spent, like the server side
+
+    latencies, failures = [], 0
+
+    async def request(i: int):
+        nonlocal failures
+        started = time.perf_counter()
+        try:
+            await server.predict(EducationSignature, make_state(i), user_input=f"question {i}")
+            latencies.append((time.perf_counter() - started) * 1000)
+        except Exception:
+            failures += 1
+
+    rng = random.Random(11)
+    tasks = []
+    for i in range(int(rate * seconds)):
+        tasks.append(asyncio.ensure_future(request(i)))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+    return latencies, failures, llm.rejected, server.rate_limits.stats
+
+
+def pct(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpm", type=int, default=240, help="quota per key")
+    parser.add_argument("--rate", type=float, default=10, help="requests per second")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{'mode':<9}  {'answered':>8}  {'failed':>6}  {'429s':>5}  {'p50 ms':>7}  {'p95 ms':>7}  {'max ms':>7}")
+    for mode in ("reactive", "limited"):
+        latencies, failures, rejected, stats = asyncio.run(run(args.rpm, args.rate, args.seconds, mode == "limited"))
+        print(f"{mode:<9}  {len(latencies):>8}  {failures:>6}  {rejected:>5}  {pct(latencies, 0.5):>7.0f}  "
+              f"{pct(latencies, 0.95):>7.0f}  {max(latencies, default=float('nan')):>7.0f}")
+        if mode == "limited":
+            for key, provider in stats.items():
+                print(f"  {key}: {provider['requests']} granted, {provider['queued']} queued "
+                      f"(peak depth {provider['peak_queue_depth']}), {provider['spilled']} spilled, "
+                      f"{provider['timeouts']} deadline misses, wait p50/p95 {provider['wait_ms']['p50']}/{provider['wait_ms']['p95']} ms")
+
+
+if __name__ == "__main__":
+    main()
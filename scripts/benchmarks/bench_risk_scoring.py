@@ -0,0 +1,76 @@
+"""
+Benchmark: risk scoring throughput, in patients per second.
+
+  - batch:   risk_scoring.score_arrays over the whole roster (one numpy pass)
+  - loop:    the same bands applied patient by patient in plain Python
+  - single:  risk_scoring.breakdown for one profile (the incremental path)
+
+Usage: python scripts/benchmarks/bench_risk_scoring.py [--sizes 10000,100000,1000000]
+"""
+import argparse
+import bisect
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_roster_memory import make_columns
+from backend.services import risk_scoring
+from backend.services.roster_store import DEFAULT_HEIGHT, RosterStore
+
+
+def loop_score(inputs: dict) -> list:
+    """Per-patient Python scoring with the same RISK_FACTORS, as the baseline."""
+    columns = {name: values.tolist() for name, values in inputs.items()}
+    scores = []
+    for i in range(len(columns["fbs"])):
+        total = 0
+        for bands in risk_scoring.RISK_FACTORS.values():
+            best = 0
+            for name, cutoffs, points in bands:
+                value = columns[name][i]
+                if isinstance(cutoffs, dict):
+                    cutoffs = cutoffs["female" if columns[risk_scoring.SEX_INPUT][i] == 1 else "male"]
+                if value == value and (value > 0 or name in risk_scoring.BINARY_INPUTS):
+                    best = max(best, points[bisect.bisect_right(cutoffs, value)])
+            total += best
+        risk_by_points = risk_scoring.RISK_BY_POINTS
+        scores.append(int(risk_by_points[min(max(total - risk_scoring.RISK_FLOOR_POINTS, 0), len(risk_by_points) - 1)]))
+    return scores
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} | {'batch':>9} | {'batch/s':>12} | {'loop':>9} | {'loop/s':>10} | {'single':>8}")
+    for rows in [int(size) for size in args.sizes.split(",")]:
+        columns = make_columns(rows)
+        inputs = {name: columns[name] for name in risk_scoring.INPUTS if name in columns}
+        inputs["bmi"] = columns["weight"] / (DEFAULT_HEIGHT / 100) ** 2
+        inputs[risk_scoring.SEX_INPUT] = risk_scoring.sex_inputs(columns["sex"])
+
+        batch, batch_s = timed(lambda: risk_scoring.score_arrays(inputs))
+        loop, loop_s = timed(lambda: loop_score(inputs))
+        assert np.array_equal(batch["score"], np.array(loop))
+
+        profile = RosterStore(columns, profile_cache_size=0)[columns["user_id"][0]]
+        _, single_s = timed(lambda: [risk_scoring.breakdown(profile) for _ in range(1000)])  # seconds per 1000 = ms per call
+
+        print(f"{rows:>8} | {batch_s * 1000:>7.1f}ms | {rows / batch_s:>12,.0f} | {loop_s * 1000:>7.0f}ms | "
+              f"{rows / loop_s:>10,.0f} | {single_s:>6.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: roster startup cost for 1k, 10k and 100k synthetic patients.
+
+For each size this writes a synthetic PREVENT-shaped xlsx and times
+  - legacy:   pd.read_excel + df.iterrows() + validated PatientProfile per row
+              (what DataLoader.load_data did before)
+  - cold:     pd.read_excel + column-wise parse_roster + profiles, snapshot written
+  - parse:    the column-wise part of `cold` alone (excluding read_excel)
+  - snapshot: a fresh DataLoader served from the .npz snapshot (columns only)
+  - warm:     snapshot + building the RosterStore (what the orchestrator does)
+
+Usage: python scripts/benchmarks/bench_roster_load.py [--sizes 1000,10000,100000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.models.data_models import PatientProfile, Biomarkers, RiskLevel
+from backend.services.data_loader import DataLoader, parse_roster
+
+FIRST_NAMES = ["Abishek", "Alessia", "Alireza", "Aly", "Anita", "Arta", "Asha", "Ben", "Chen", "Dana", "Elif", "Farah"]
+DOCTORS = ["Dr. Benjamin Jones", "Dr. Benjamin Perez", "Dr. Maria Garcia", "Dr. Wei Zhang"]
+
+
+def make_sheet(path: str, rows: int):
+    rng = random.Random(rows)
+    pd.DataFrame({
+        "PREVENT_ID": range(1001, 1001 + rows),
+        "Name": [f"{rng.choice(FIRST_NAMES)} {i}" for i in range(rows)],
+        "Age": [rng.randint(30, 75) for _ in range(rows)],
+        "Sex": [rng.choice(["Male", "Female"]) for _ in range(rows)],
+        "Blood Pressure": [f"{rng.randint(90, 170)}/{rng.randint(60, 100)}" for _ in range(rows)],
+        "Years to DM": [rng.randint(3, 10) for _ in range(rows)],
+        "BMI": [round(rng.uniform(20, 40), 1) for _ in range(rows)],
+        "LDL": [round(rng.uniform(1.5, 5), 1) for _ in range(rows)],
+        "HDL": [round(rng.uniform(0.8, 2), 1) for _ in range(rows)],
+        "A1c": [round(rng.uniform(4.8, 6.4), 1) for _ in range(rows)],
+        "FBS": [round(rng.uniform(4.5, 7), 1) for _ in range(rows)],
+        "Total_Cholesterol": [round(rng.uniform(3, 7.5), 1) for _ in range(rows)],
+        "Diabetes Risk": [rng.choice(["High", "Moderate", "Low"]) for _ in range(rows)],
+        "Doctor Name": [rng.choice(DOCTORS) for _ in range(rows)],
+    }).to_excel(path, index=False)
+
+
+def legacy_load(path: str) -> dict:
+    """The previous DataLoader.load_data loop, kept verbatim as the baseline."""
+    profiles = {}
+    df = pd.read_excel(path)
+    for _, row in df.iterrows():
+        try:
+            bp = str(row.get('Blood Pressure', '120/80'))
+            if '/' in bp:
+                systolic, diastolic = map(int, bp.split('/'))
+            else:
+                systolic, diastolic = 120, 80
+            risk_val = row.get('Diabetes Risk', 'Moderate')
+            risk_enum = RiskLevel.MODERATE
+            if isinstance(risk_val, str):
+                if 'High' in risk_val: risk_enum = RiskLevel.HIGH
+                elif 'Low' in risk_val: risk_enum = RiskLevel.LOW
+            user_id = str(row.get('PREVENT_ID', ''))
+            if not user_id: continue
+            biomarkers = Biomarkers(
+                a1c=float(row.get('A1c', 0)), fbs=float(row.get('FBS', 0)),
+                systolic_bp=systolic, diastolic_bp=diastolic,
+                ldl=float(row.get('LDL', 0)), hdl=float(row.get('HDL', 0)),
+                total_cholesterol=float(row.get('Total_Cholesterol', 0)),
+                weight=float(row.get('BMI', 25) * 2.5), height=170,
+            )
+            profiles[user_id] = PatientProfile(
+                user_id=user_id, name=str(row.get('Name', 'User')), age=int(row.get('Age', 30)),
+                diabetes_risk_score=risk_enum, risk_score_numeric=int(row.get('Years to DM', 5) * 10),
+                biomarkers=biomarkers, motivation_level=str(row.get('Behavioral Segment', 'Unknown')),
+                physician_name=str(row.get('Physician', 'Dr. Smith')),
+            )
+        except Exception:
+            continue
+    return profiles
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} | {'legacy':>9} | {'cold':>9} | {'parse':>9} | {'snapshot':>9} | {'warm':>9} | {'xlsx':>8} | {'npz':>8}")
+    for rows in [int(size) for size in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "roster.xlsx")
+            make_sheet(path, rows)
+            cache_dir = os.path.join(tmp, "cache")
+
+            legacy, legacy_s = timed(lambda: legacy_load(path))
+            loader = DataLoader(path, cache_dir=cache_dir)
+            cold, cold_s = timed(loader.load_data)
+            df = pd.read_excel(path)
+            _, parse_s = timed(lambda: parse_roster(df))
+            _, snapshot_s = timed(DataLoader(path, cache_dir=cache_dir).load_columns)
+            warm_loader = DataLoader(path, cache_dir=cache_dir)
+            warm, warm_s = timed(warm_loader.load_data)
+            assert warm_loader.source == "snapshot" and len(warm) == len(cold) == len(legacy) == rows
+            # Same patient data; the legacy loop ignored "Doctor Name" and had mock risk score / weight mappings
+            assert warm["1001"].name == legacy["1001"].name and warm["1001"].age == legacy["1001"].age
+            assert warm["1001"].biomarkers.a1c == legacy["1001"].biomarkers.a1c
+
+            print(f"{rows:>7} | {legacy_s:>8.3f}s | {cold_s:>8.3f}s | {parse_s:>8.3f}s | {snapshot_s:>8.4f}s | "
+                  f"{warm_s:>8.3f}s | {os.path.getsize(path) / 1e6:>6.1f}MB | {os.path.getsize(loader.snapshot_path) / 1e6:>6.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark: resident memory of the loaded roster, eager profiles vs RosterStore.
+
+For each size this synthesizes parse_roster-shaped columns (no xlsx, so 1M
+rows stays quick) and measures, with tracemalloc, the memory retained by
+  - eager:  one PatientProfile + Biomarkers per row in a dict (what
+            DataLoader.load_data kept before)
+  - store:  RosterStore columns, no profiles materialized
+  - +1k:    the store after 1,000 lookups (a busy profile cache)
+  - index:  the NameIndex, which is now only built on the first name search
+and the time to build each and to look up 10k profiles from the store.
+
+Usage: python scripts/benchmarks/bench_roster_memory.py [--sizes 10000,100000,300000]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.models.data_models import PatientProfile, Biomarkers, RiskLevel
+from backend.services.data_loader import ROSTER_COLUMNS
+from backend.services.name_index import NameIndex
+from backend.services.roster_store import RosterStore, DEFAULT_HEIGHT
+
+FIRST_NAMES = ["Abishek", "Alessia", "Alireza", "Aly", "Anita", "Arta", "Asha", "Ben", "Chen", "Dana", "Elif", "Farah"]
+LAST_NAMES = ["Jones", "Perez", "Garcia", "Zhang", "Okafor", "Singh", "Novak", "Haddad"]
+DOCTORS = ["Dr. Benjamin Jones", "Dr. Benjamin Perez", "Dr. Maria Garcia", "Dr. Wei Zhang"]
+SEGMENTS = ["Precontemplation", "Contemplation", "Preparation", "Action", "Unknown"]
+
+
+def make_columns(rows: int) -> dict:
+    rng = np.random.default_rng(rows)
+    pick = random.Random(rows)
+    return {
+        "user_id": np.array([str(1001 + i) for i in range(rows)]),
+        "name": np.array([f"{pick.choice(FIRST_NAMES)} {pick.choice(LAST_NAMES)} {i}" for i in range(rows)]),
+        "age": rng.integers(30, 76, rows),
+        "risk_level": rng.choice(["High", "Moderate", "Low"], rows),
+        "risk_score_numeric": rng.integers(3, 11, rows) * 10,
+        "a1c": rng.uniform(4.8, 6.4, rows).round(1),
+        "fbs": rng.uniform(4.5, 7, rows).round(1),
+        "systolic_bp": rng.integers(90, 171, rows),
+        "diastolic_bp": rng.integers(60, 101, rows),
+        "ldl": rng.uniform(1.5, 5, rows).round(1),
+        "hdl": rng.uniform(0.8, 2, rows).round(1),
+        "total_cholesterol": rng.uniform(3, 7.5, rows).round(1),
+        "weight": (rng.uniform(20, 40, rows) * 2.5).round(2),
+        "motivation_level": rng.choice(SEGMENTS, rows),
+        "physician_name": rng.choice(DOCTORS, rows),
+        "triglycerides": rng.uniform(0.5, 3, rows).round(1),
+        "sex": rng.choice(["Female", "Male"], rows),
+        "family_history": rng.choice([0.0, 1.0, np.nan], rows),
+        "risk_source": np.array(["PREVENT_Risk_V22"] * rows),
+    }
+
+
+def eager_profiles(columns: dict) -> dict:
+    """The previous load_data result: every profile built up front."""
+    risk_levels = {level.value: level for level in RiskLevel}
+    lists = {name: values.tolist() for name, values in columns.items()}
+    profiles = {}
+    for (user_id, name, age, risk, risk_numeric, a1c, fbs, systolic, diastolic, ldl, hdl, total_cholesterol,
+         weight, motivation, physician, triglycerides, sex, family_history, risk_source) in zip(*(lists[name] for name in ROSTER_COLUMNS)):
+        biomarkers = Biomarkers.model_construct(
+            a1c=a1c, fbs=fbs, systolic_bp=systolic, diastolic_bp=diastolic, ldl=ldl, hdl=hdl,
+            total_cholesterol=total_cholesterol, weight=weight, height=DEFAULT_HEIGHT, triglycerides=triglycerides,
+        )
+        profiles[user_id] = PatientProfile.model_construct(
+            user_id=user_id, name=name, age=age, diabetes_risk_score=risk_levels[risk],
+            risk_score_numeric=risk_numeric, biomarkers=biomarkers,
+            motivation_level=motivation, physician_name=physician, sex=sex,
+            family_history=None if family_history != family_history else bool(family_history), risk_source=risk_source,
+        )
+    return profiles
+
+
+def retained(build):
+    """(result, bytes still allocated after build returns, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,300000")
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} | {'eager':>9} | {'store':>9} | {'+1k':>9} | {'index':>9} | {'ratio':>6} | "
+          f"{'eager s':>8} | {'store s':>8} | {'10k gets':>8}")
+    for rows in [int(size) for size in args.sizes.split(",")]:
+        columns = make_columns(rows)
+        eager, eager_bytes, eager_s = retained(lambda: eager_profiles(columns))
+        del eager
+        store, store_bytes, store_s = retained(lambda: RosterStore(columns))
+        ids = columns["user_id"][np.random.default_rng(0).integers(0, rows, 1000)].tolist()
+        _, busy_bytes, _ = retained(lambda: [store[user_id] for user_id in ids])
+        _, index_bytes, _ = retained(lambda: NameIndex(store.user_ids.tolist(), store.names()))
+
+        lookups = columns["user_id"][np.random.default_rng(1).integers(0, rows, 10_000)].tolist()
+        cold = RosterStore(columns, profile_cache_size=0)
+        started = time.perf_counter()
+        for user_id in lookups:
+            cold[user_id]
+        gets_s = time.perf_counter() - started
+        assert store["1001"].model_dump() == eager_profiles({k: v[:1] for k, v in columns.items()})["1001"].model_dump()
+
+        mb = lambda size: f"{size / 1e6:>7.1f}MB"
+        print(f"{rows:>7} | {mb(eager_bytes)} | {mb(store_bytes)} | {mb(store_bytes + busy_bytes)} | {mb(index_bytes)} | "
+              f"{eager_bytes / store_bytes:>5.1f}x | {eager_s:>7.3f}s | {store_s:>7.3f}s | {gets_s:>7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: state saves/sec as a function of the shard count.
+
+Each run uses a fresh temporary database layout and issues individual
+save_state calls (one per turn, no write-behind coalescing) from many
+concurrent users, so every save costs a real write on its user's shard.
+
+Usage: python scripts/benchmarks/bench_sharding.py [saves] [concurrency]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.models.data_models import AgentState, Message, PatientProfile, RiskLevel, Biomarkers
+from backend.services.persistence import AsyncPersistence
+
+
+def make_state(user_id: str) -> AgentState:
+    profile = PatientProfile(
+        user_id=user_id, name="Bench", age=50, diabetes_risk_score=RiskLevel.HIGH, risk_score_numeric=80,
+        biomarkers=Biomarkers(a1c=6.1, fbs=5.9, systolic_bp=130, diastolic_bp=85, ldl=3.1, hdl=1.1,
+                              total_cholesterol=5.0, weight=88, height=172),
+    )
+    return AgentState(current_agent="motivation", conversation_history=[], patient_profile=profile)
+
+
+async def run(shards: int, saves: int, concurrency: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        persistence = AsyncPersistence()
+        persistence.db_path = os.path.join(tmp, "bench.db")
+        persistence.shards = shards
+        await persistence.init_db()
+
+        users = [f"user_{i}" for i in range(concurrency)]
+        states = {user_id: make_state(user_id) for user_id in users}
+
+        async def worker(user_id: str, turns: int):
+            state = states[user_id]
+            for t in range(turns):
+                state.conversation_history.append(Message(role="user", content=f"turn {t} " * 20))
+                state.conversation_history.append(Message(role="assistant", content=f"reply {t} " * 40))
+                await persistence.save_state(user_id, state)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(user_id, saves // concurrency) for user_id in users])
+        elapsed = time.perf_counter() - start
+        await persistence.close()
+        return (saves // concurrency) * concurrency / elapsed
+
+
+async def main(saves: int, concurrency: int):
+    print(f"{saves} saves from {concurrency} concurrent users")
+    print(f"{'shards':>6} | {'saves/sec':>10} | {'speed-up':>8}")
+    baseline = None
+    for shards in (1, 2, 4, 8):
+        rate = await run(shards, saves, concurrency)
+        baseline = baseline or rate
+        print(f"{shards:>6} | {rate:>10.0f} | {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    saves = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(main(saves, concurrency))
@@ -0,0 +1,112 @@
+"""
+Benchmark: state_codec vs the previous JSON path for persisted state payloads.
+
+For realistic 50-, 500- and 5000-message histories this compares
+  - json:  json.dumps([m.model_dump() ...]) + model_dump_json() + json.dumps(context)
+           and json.loads + Message(**m) + model_validate_json on the way back
+           (what save_state/load_state did before the codec)
+  - codec: state_codec.encode/decode (pydantic/orjson JSON + zlib above the threshold)
+reporting encode/decode time per payload and bytes on disk.
+
+Usage: python scripts/benchmarks/bench_state_codec.py
+"""
+import json
+import os
+import random
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.models.data_models import Message, PatientProfile, RiskLevel, Biomarkers
+from backend.services import state_codec
+
+SENTENCES = [
+    "On a scale of 1 to 10, how important is it for you to lower your blood sugar?",
+    "I think it's about a 6, I know I should walk more but work gets in the way.",
+    "That makes sense. What makes it a 6 and not a 3?",
+    "My dad had diabetes and I saw how hard it was for him, I don't want that.",
+    "It sounds like your family is a big reason you want to make a change.",
+    "I usually skip breakfast and then snack on chips in the afternoon.",
+    "What is one small step you could take in the next 48 hours?",
+    "Maybe I could take a ten minute walk after lunch on Tuesday and Thursday.",
+    "Your A1c of 6.1 is in the prediabetes range, which means there is still time to turn it around.",
+    "My knee hurts when I run, so I'd rather swim or cycle if that counts.",
+]
+
+
+def make_history(n: int) -> List[Message]:
+    rng = random.Random(n)
+    return [
+        Message(role="user" if i % 2 == 0 else "assistant",
+                content=" ".join(rng.choice(SENTENCES) for _ in range(rng.randint(1, 4))),
+                timestamp=f"2026-01-{1 + i % 28:02d}T10:{i % 60:02d}:00")
+        for i in range(n)
+    ]
+
+
+PROFILE = PatientProfile(
+    user_id="1001", name="Abishek", age=49, diabetes_risk_score=RiskLevel.HIGH, risk_score_numeric=100,
+    biomarkers=Biomarkers(a1c=6.0, fbs=5.5, systolic_bp=122, diastolic_bp=80, ldl=1.9, hdl=1.1,
+                          total_cholesterol=3.7, weight=87.25, height=170),
+    barriers=["time", "knee pain"], facilitators=["family", "walking"],
+    importance_rating=6.0, confidence_rating=5.0,
+)
+CONTEXT = {"importance_rating": 6.0, "confidence_rating": 5.0, "readiness_stage": "contemplation",
+           "barriers": ["time", "knee pain"], "suggested_action": "Walk 10 minutes after lunch on Tuesday"}
+
+
+def json_encode(history):
+    return (json.dumps([m.model_dump() for m in history]), PROFILE.model_dump_json(), json.dumps(CONTEXT))
+
+
+def json_decode(payload):
+    history_raw, profile_raw, context_raw = payload
+    return ([Message(**m) for m in json.loads(history_raw)],
+            PatientProfile.model_validate_json(profile_raw), json.loads(context_raw))
+
+
+def codec_encode(history, threshold=None):
+    return (state_codec.encode(history, List[Message], threshold),
+            state_codec.encode(PROFILE, PatientProfile, threshold),
+            state_codec.encode(CONTEXT, compress_threshold=threshold))
+
+
+def codec_decode(payload):
+    history_raw, profile_raw, context_raw = payload
+    return (state_codec.decode(history_raw, List[Message]),
+            state_codec.decode(profile_raw, PatientProfile), state_codec.decode(context_raw))
+
+
+def timed(fn, arg, reps):
+    start = time.perf_counter()
+    for _ in range(reps):
+        out = fn(arg)
+    return (time.perf_counter() - start) / reps * 1000, out
+
+
+def size(payload):
+    return sum(len(p.encode("utf-8")) if isinstance(p, str) else len(p) for p in payload)
+
+
+def main():
+    print(f"orjson available: {state_codec.orjson is not None}, compression threshold: {state_codec.COMPRESS_THRESHOLD} bytes")
+    print(f"{'messages':>8} | {'path':<14} | {'encode ms':>9} | {'decode ms':>9} | {'bytes':>9} | {'vs json':>7}")
+    for n in (50, 500, 5000):
+        history = make_history(n)
+        reps = max(3, 2000 // n)
+        enc_ms, payload = timed(json_encode, history, reps)
+        dec_ms, _ = timed(json_decode, payload, reps)
+        baseline = size(payload)
+        print(f"{n:>8} | {'json (before)':<14} | {enc_ms:>9.3f} | {dec_ms:>9.3f} | {baseline:>9} | {'1.00x':>7}")
+        for label, threshold in (("codec", None), ("codec no-zlib", -1)):
+            enc_ms, payload = timed(lambda h: codec_encode(h, threshold), history, reps)
+            dec_ms, decoded = timed(codec_decode, payload, reps)
+            assert decoded[0] == history and decoded[1] == PROFILE and decoded[2] == CONTEXT
+            nbytes = size(payload)
+            print(f"{n:>8} | {label:<14} | {enc_ms:>9.3f} | {dec_ms:>9.3f} | {nbytes:>9} | {baseline / nbytes:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Stress benchmark for per-user turn serialization (Orchestrator.process_request).
+
+Fires thousands of interleaved chat turns for many users at once through a fake
+agent with random latency, then checks that every user's history is exactly
+the turns they sent, in order, with user/assistant alternating - both in memory
+and after the write-behind buffer has flushed to SQLite.
+
+Usage: python scripts/benchmarks/bench_turn_ordering.py [users] [turns_per_user]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["ANTIGRAVITY_DB"] = os.path.join(_tmp.name, "bench_turns.db")
+# Keep every benchmark user in memory so consistency is checked on live states
+os.environ.setdefault("ANTIGRAVITY_SESSION_CACHE_SIZE", "100000")
+
+from backend.orchestrator.orchestrator import Orchestrator
+
+
+class EchoAgent:
+    """Stands in for an LLM-backed agent: random latency, echoes the turn."""
+
+    async def process(self, user_input, state):
+        await asyncio.sleep(random.uniform(0, 0.005))
+        return {"response": f"ack {user_input}", "updated_context": {"last": user_input}}
+
+
+def check_history(user_id, messages, turns):
+    expected = []
+    for t in range(turns):
+        expected.append(("user", f"{user_id}:{t}"))
+        expected.append(("assistant", f"ack {user_id}:{t}"))
+    actual = [(m.role, m.content) for m in messages]
+    return actual == expected
+
+
+async def main(users: int, turns: int):
+    orchestrator = Orchestrator()
+    orchestrator.agents = {name: EchoAgent() for name in orchestrator.agents}
+    await orchestrator.persistence.init_db()
+
+    # Interleave: every user's turns are submitted in order, but users are shuffled together
+    schedule = []
+    cursors = {f"bench_{u}": 0 for u in range(users)}
+    while cursors:
+        user_id = random.choice(list(cursors))
+        schedule.append((user_id, cursors[user_id]))
+        cursors[user_id] += 1
+        if cursors[user_id] == turns:
+            del cursors[user_id]
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        orchestrator.process_request(user_id, f"{user_id}:{t}") for user_id, t in schedule
+    ])
+    elapsed = time.perf_counter() - start
+
+    in_memory_ok = all(
+        check_history(f"bench_{u}", orchestrator.states.get(f"bench_{u}").conversation_history, turns)
+        for u in range(users)
+    )
+    await orchestrator.shutdown()
+    persisted_ok = True
+    for u in range(users):
+        messages = await orchestrator.persistence.load_messages(f"bench_{u}")
+        persisted_ok = persisted_ok and check_history(f"bench_{u}", messages, turns)
+    await orchestrator.persistence.close()
+
+    total = len(schedule)
+    print(f"Turns: {total} ({users} users x {turns} turns), elapsed {elapsed:.2f}s, {total / elapsed:.0f} turns/s")
+    print(f"Turn locks: {orchestrator.turn_locks.stats}")
+    print(f"Write-behind: {orchestrator.write_buffer.stats}")
+    print(f"In-memory histories consistent: {in_memory_ok}")
+    print(f"Persisted histories consistent: {persisted_ok}")
+    return in_memory_ok and persisted_ok
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    ok = asyncio.run(main(users, turns))
+    sys.exit(0 if ok else 1)
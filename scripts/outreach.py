@@ -0,0 +1,65 @@
+"""
+Offline INFORM outreach generation for a roster cohort.
+
+Generates a personalized first message for every patient matching the cohort
+query, through the MCP layer (provider failover, rate limits and auditing as
+for chat). Progress is checkpointed in SQLite: run the same command again
+after a crash or with failures and it picks up where it stopped.
+
+Usage:
+    python scripts/outreach.py --query "a1c >= 6.0 and risk == High"
+    python scripts/outreach.py --query "risk == High" --workers 16 --export outreach.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.mcp_server.mcp_server import MCPServer
+from backend.services.outreach import OutreachJob
+from backend.services.persistence import AsyncPersistence
+from backend.services.roster_registry import get_roster_registry
+
+
+async def run(args) -> dict:
+    roster = await get_roster_registry().load_async()
+    persistence = AsyncPersistence()
+    await persistence.init_db()
+    server = MCPServer(persistence)
+    # A batch can wait longer for quota than a chat turn
+    server.rate_limits.queue_timeout = args.quota_wait
+    job = OutreachJob(server, roster, db_path=args.db, workers=args.workers, batch_size=args.batch_size)
+    try:
+        report = await job.run(args.query, run_id=args.run_id, limit=args.limit)
+        report["llm_quota"] = server.rate_limits.stats
+        if args.export:
+            report["exported"] = await job.export(report["run_id"], args.export)
+        return report
+    finally:
+        await server.audit.close()
+        await persistence.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate INFORM outreach messages for a roster cohort.")
+    parser.add_argument("--query", required=True, help='Cohort query, e.g. "a1c >= 6.0 and risk == High"')
+    parser.add_argument("--run-id", help="Checkpoint name (default: derived from the query)")
+    parser.add_argument("--db", help="Results database (ANTIGRAVITY_OUTREACH_DB)")
+    parser.add_argument("--workers", type=int, help="Concurrent generations (ANTIGRAVITY_OUTREACH_WORKERS)")
+    parser.add_argument("--batch-size", type=int, help="Results per checkpoint write (ANTIGRAVITY_OUTREACH_BATCH)")
+    parser.add_argument("--limit", type=int, help="Generate at most this many patients in this run")
+    parser.add_argument("--quota-wait", type=float, default=120, help="Seconds a request may queue for provider quota")
+    parser.add_argument("--export", help="Also write the run's messages to this JSON lines file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if report["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Offline resharding tool for the SQLite persistence layer.
+
+Stop the backend, run this, then restart with ANTIGRAVITY_DB_SHARDS=<to>.
+
+Usage:
+    python scripts/reshard.py --from 1 --to 4
+    python scripts/reshard.py --db backend/antigravity.db --from 4 --to 8 --delete-source
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.services.persistence import AsyncPersistence
+from backend.services.resharding import reshard
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move users and audit records to a new shard layout.")
+    parser.add_argument("--db", default=AsyncPersistence().db_path, help="Base database path (ANTIGRAVITY_DB)")
+    parser.add_argument("--from", dest="from_shards", type=int, required=True, help="Current shard count")
+    parser.add_argument("--to", dest="to_shards", type=int, required=True, help="Target shard count")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--force", action="store_true",
+                        help="Merge into a target layout that already has data, or reshard a source whose audit "
+                             "chain fails verification (its files are then never deleted)")
+    parser.add_argument("--delete-source", action="store_true", help="Remove the source shard files afterwards")
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(reshard(args.db, args.from_shards, args.to_shards, args.batch_size,
+                                     force=args.force, delete_source=args.delete_source))
+    except (RuntimeError, ValueError) as e:
+        print(f"reshard: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(report, indent=2))
+    if report["source_chain"]["broken_at"] is not None:
+        print("reshard: the source audit chain is broken; its files were kept.", file=sys.stderr)
+        sys.exit(1)
+    if report["target_chain"]["broken_at"] is not None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
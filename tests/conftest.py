@@ -2,7 +2,12 @@ import pytest
 import os
 import asyncio
 from unittest.mock import MagicMock, patch
+from backend.mcp_server.mcp_server import MCPServer
+from backend.models.data_models import AgentState, PatientProfile, RiskLevel, Biomarkers
 from backend.services.persistence import AsyncPersistence
+from backend.services.provider_health import ProviderHealth
+from backend.services.provider_limits import ProviderLimits
+from backend.services.response_cache import ResponseCache
 
 # Define the test database path
 TEST_DB_PATH = "test_antigravity.db"
@@ -33,6 +38,7 @@ def init_test_db():
     # Run async init
     loop = asyncio.get_event_loop_policy().get_event_loop()
     loop.run_until_complete(p.init_db())
+    loop.run_until_complete(p.close())
     
     yield
     
@@ -56,3 +62,58 @@ def global_llm_mock():
         )
         mock_predict.return_value = mock_instance
         yield mock_predict
+
+# Shared test harness: the MCPServer layer tests (response cache, provider limits, rate limits, health,
+# hedging, context, profile projection, outreach, chat streaming) all build on these three factories.
+# Change them with every one of those suites in mind.
+
+@pytest.fixture
+def make_profile():
+    """
+    Factory for a test PatientProfile (a high-risk 45-year-old with fixed
+    biomarkers); keyword arguments override any profile field.
+    """
+    def factory(user_id="test_user", **fields):
+        values = dict(
+            user_id=user_id, name="Test", age=45, diabetes_risk_score=RiskLevel.HIGH, risk_score_numeric=50,
+            biomarkers=Biomarkers(a1c=6.1, fbs=5.9, systolic_bp=128, diastolic_bp=82, ldl=3.1, hdl=1.2,
+                                  total_cholesterol=5.0, weight=80, height=175),
+        )
+        values.update(fields)
+        return PatientProfile(**values)
+    return factory
+
+@pytest.fixture
+def make_state(make_profile):
+    """Factory for an AgentState around make_profile(user_id, **profile_fields)."""
+    def factory(user_id="test_user", current_agent="education", history=(), **profile_fields):
+        return AgentState(current_agent=current_agent, conversation_history=list(history),
+                          patient_profile=make_profile(user_id, **profile_fields))
+    return factory
+
+@pytest.fixture
+def make_server():
+    """
+    Factory for an MCPServer on fake LLMs: `predictors` maps signatures to
+    stand-ins for dspy.Predict, and there is one fake LM per name in
+    `providers`. Response caching and concurrency limits are off and provider
+    health is fresh; any layer can be replaced by keyword (hedging=...,
+    rate_limits=..., health=...). Audit records are dropped, but
+    `server.audited` lists the provider behind each answer.
+    """
+    def factory(predictors, providers=("Primary",), **layers):
+        server = MCPServer()
+        server.lms = [MagicMock(provider_name=name, model=f"fake/{name.lower()}") for name in providers]
+        server.predictor_cache = dict(predictors)
+        server.response_cache = ResponseCache(signatures="")
+        server.provider_limits = ProviderLimits(default_limit=0)
+        server.health = ProviderHealth()
+        for name, layer in layers.items():
+            setattr(server, name, layer)
+        server.audited = []
+
+        async def record(**fields):
+            server.audited.append(fields["provider"])
+        server.audit = MagicMock(record=record)
+        return server
+    return factory
@@ -0,0 +1,87 @@
+import pytest
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.persistence import AsyncPersistence
+from backend.services.audit_sink import AuditSink
+from backend.mcp_server.mcp_server import MCPServer
+from backend.models.signatures import CoachingSignature
+from tests.test_persistence import make_state
+
+
+@pytest.fixture
+def persistence(tmp_path):
+    p = AsyncPersistence()
+    p.db_path = str(tmp_path / "audit_test.db")
+    return p
+
+
+async def count_rows(persistence):
+    async with persistence.pool.reader() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM llm_interactions")
+        (count,) = await cursor.fetchone()
+        await cursor.close()
+    return count
+
+
+def test_records_are_batched_and_chained(persistence):
+    async def scenario():
+        await persistence.init_db()
+        sink = AuditSink(persistence, max_batch=1000, flush_interval=60)
+        for i in range(250):
+            await sink.record(f"u{i % 5}", "coaching", "CoachingSignature", {"user_input": f"hi {i}"},
+                              {"response": f"ok {i}"}, "gemini/gemini-2.0-flash", "Gemini Primary", 12.5)
+        rows_before_close = await count_rows(persistence)
+        await sink.close()
+        rows = await count_rows(persistence)
+        chain = await persistence.verify_interaction_chain()
+        await persistence.close()
+        return sink.stats, rows_before_close, rows, chain
+
+    stats, rows_before_close, rows, chain = asyncio.run(scenario())
+    assert rows_before_close == 0  # nothing hit SQLite on the record() path
+    assert rows == 250
+    assert stats["flushes"] == 1
+    assert chain == {"verified": 250, "broken_at": None, "broken_shard": None}
+
+
+def test_tampering_breaks_the_chain(persistence):
+    async def scenario():
+        await persistence.init_db()
+        sink = AuditSink(persistence, max_batch=1000, flush_interval=60)
+        for i in range(10):
+            await sink.record("u1", "coaching", "CoachingSignature", {"user_input": f"hi {i}"},
+                              {"response": f"ok {i}"}, "model", "provider", 1.0)
+        await sink.close()
+
+        async def tamper(db):
+            await db.execute("UPDATE llm_interactions SET response_output = 'edited' WHERE id = 4")
+
+        await persistence.pool.write(tamper)
+        chain = await persistence.verify_interaction_chain()
+        await persistence.close()
+        return chain
+
+    assert asyncio.run(scenario()) == {"verified": 3, "broken_at": 4, "broken_shard": 0}
+
+
+def test_mcp_predict_feeds_audit_sink(persistence):
+    async def scenario():
+        await persistence.init_db()
+        server = MCPServer(persistence)
+        await server.predict(CoachingSignature, make_state("audited_user"), user_input="Give me a goal")
+        pending = len(server.audit)
+        await server.audit.close()
+        async with persistence.pool.reader() as db:
+            cursor = await db.execute("SELECT user_id, signature_name, provider FROM llm_interactions")
+            rows = await cursor.fetchall()
+        await persistence.close()
+        return pending, rows
+
+    pending, rows = asyncio.run(scenario())
+    assert pending == 1
+    assert rows == [("audited_user", "CoachingSignature", "Gemini Primary")]
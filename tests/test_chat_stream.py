@@ -0,0 +1,111 @@
+import pytest
+import sys
+import os
+import asyncio
+import json
+import uuid
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.main import app, orchestrator
+from backend.models.signatures import EducationSignature
+from backend.services.chat_stream import TokenStream
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+async def fake_stream_call(predictor, inputs, stream):
+    """An LLM that streams its answer in three pieces, then resolves the structured fields."""
+    for piece in ["Nice to ", "meet you, ", "Sam!"]:
+        await asyncio.sleep(0.02)
+        stream.push(piece)
+    return MagicMock(response="Nice to meet you, Sam!", extracted_name="Sam", next_step="transition_to_motivation")
+
+
+def test_streamed_turn_end_to_end(monkeypatch):
+    monkeypatch.setattr(orchestrator.mcp_server, "_stream_call", fake_stream_call)
+    user_id = f"stream_test_{uuid.uuid4().hex[:8]}"  # the app's DB outlives the test session
+
+    with TestClient(app) as client:
+        # First turn is the static welcome: no LLM, sent as one token
+        first = parse_sse(client.post("/api/chat/stream", json={"user_id": user_id, "user_input": "Hello"}).text)
+        assert [kind for kind, _ in first] == ["token", "done"]
+        assert first[0][1]["text"] == first[1][1]["response"]
+
+        response = client.post("/api/chat/stream", json={"user_id": user_id, "user_input": "Call me Sam"})
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.text)
+        assert [kind for kind, _ in events] == ["token", "token", "token", "done"]
+        assert "".join(data["text"] for kind, data in events if kind == "token") == "Nice to meet you, Sam!"
+
+        done = events[-1][1]
+        assert done["response"] == "Nice to meet you, Sam!"
+        assert done["current_agent"] == "motivation"  # next_step resolved from the final prediction
+        assert 0 < done["ttft_ms"] < done["total_ms"]
+
+        # The turn was applied exactly once
+        state = client.get(f"/api/debug/state/{user_id}").json()
+        assert state["history_count"] == 4 and state["current_agent"] == "motivation"
+        assert orchestrator.states.peek(user_id).patient_profile.name == "Sam"
+
+        metrics = client.get("/api/metrics").json()["chat_stream"]
+        assert metrics["streams"] >= 2 and metrics["ttft_ms"]["p50"] is not None
+
+
+def test_failover_mid_stream_resets_the_partial_answer(make_server, make_state):
+    server = make_server({EducationSignature: MagicMock()}, ("Primary", "Secondary"))
+
+    calls = []
+
+    async def flaky_stream_call(predictor, inputs, stream):
+        calls.append(len(calls))
+        stream.push("Half an ans")
+        if len(calls) == 1:
+            raise ConnectionError("stream dropped")
+        stream.push("wer")
+        return MagicMock(response="Half an answer")
+    server._stream_call = flaky_stream_call
+
+    state = make_state("stream_failover")
+
+    async def scenario():
+        stream = TokenStream()
+        result = await server.predict(EducationSignature, state, stream=stream, user_input="hi")
+        stream.finish({"type": "done"})
+        return result, [event async for event in stream.events()]
+
+    result, events = asyncio.run(scenario())
+    assert result.response == "Half an answer"
+    assert events == [
+        {"type": "token", "text": "Half an ans"},
+        {"type": "reset"},
+        {"type": "token", "text": "Half an ans"},
+        {"type": "token", "text": "wer"},
+        {"type": "done"},
+    ]
+
+
+def test_failed_turn_ends_the_stream_with_its_error():
+    async def scenario():
+        stream = TokenStream()
+        stream.push("partial")
+        stream.finish(error=RuntimeError("429 Too Many Requests"))
+        seen = []
+        with pytest.raises(RuntimeError):
+            async for event in stream.events():
+                seen.append(event)
+        return seen, stream
+
+    seen, stream = asyncio.run(scenario())
+    assert seen == [{"type": "token", "text": "partial"}]
+    assert stream.first_token_ms is not None and stream.tokens == 1
@@ -0,0 +1,82 @@
+import pytest
+import sys
+import os
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services import cohort
+from backend.services.roster_store import RosterStore
+
+
+@pytest.fixture
+def store():
+    return RosterStore({
+        "user_id": np.array(["1001", "1002", "1003", "1004", "1005"]),
+        "name": np.array(["Abishek", "Alessia", "Alireza", "Aly", "Anita"]),
+        "age": np.array([49, 48, 62, 35, 71]),
+        "risk_level": np.array(["High", "Low", "High", "Moderate", "High"]),
+        "risk_score_numeric": np.array([100, 90, 60, 50, 30]),
+        "a1c": np.array([6.0, 5.7, 6.3, 5.2, 6.4]),
+        "fbs": np.array([5.5, 5.4, 5.6, 5.0, 6.1]),
+        "systolic_bp": np.array([122, 140, 90, 135, 150]),
+        "diastolic_bp": np.array([80, 83, 70, 85, 95]),
+        "ldl": np.array([1.9, 3.2, 1.9, 4.1, 2.5]),
+        "hdl": np.array([1.1, 1.2, 1.1, 0.9, 1.4]),
+        "total_cholesterol": np.array([3.7, 4.7, 0.0, 5.1, 4.4]),
+        "weight": np.array([87.25, 50.0, 91.0, 62.5, 70.0]),
+        "motivation_level": np.array(["Unknown"] * 5),
+        "physician_name": np.array(["Dr. Benjamin Jones", "Dr. Benjamin Perez", "Dr. Benjamin Perez",
+                                    "Dr. Wei Zhang", "Dr. Benjamin Jones"]),
+    })
+
+
+def ids(store, query):
+    return store.user_ids[cohort.select(store, query)].tolist()
+
+
+def test_filters_compile_to_masks(store):
+    assert ids(store, "a1c >= 6.0 and risk == high") == ["1001", "1003", "1005"]
+    assert ids(store, "systolic between 130 and 150") == ["1002", "1004", "1005"]
+    assert ids(store, "physician = 'Dr. Benjamin Perez' or age > 70") == ["1002", "1003", "1005"]
+    assert ids(store, "not risk in (High, Low)") == ["1004"]
+    assert ids(store, "(ldl > 4 or hdl < 1) and age >= 30") == ["1004"]
+    assert ids(store, "id in (1001, 1005)") == ["1001", "1005"]
+    assert ids(store, "physician == 'Dr. Nobody'") == []
+    assert cohort.count(store, "") == 5
+
+
+@pytest.mark.parametrize("query", [
+    "a1c >=", "bogus > 1", "risk > High", "a1c == High", "age between 1", "(a1c > 1", "a1c > 1 extra",
+])
+def test_bad_queries_are_rejected(store, query):
+    with pytest.raises(cohort.CohortQueryError):
+        cohort.select(store, query)
+
+
+def test_pages_and_streams_records_without_profiles(store):
+    result = cohort.page(store, "risk == High", limit=2, offset=1)
+    assert result["total"] == 3
+    assert [r["user_id"] for r in result["results"]] == ["1003", "1005"]
+    assert result["results"][0]["name"] == "Alireza" and result["results"][0]["a1c"] == 6.3
+    assert result["results"][0]["physician_name"] == "Dr. Benjamin Perez"
+
+    chunks = list(cohort.stream(store, "age < 70", chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2]
+    assert store.stats["materialized"] == 0
+
+
+def test_group_by_aggregates(store):
+    result = cohort.group_by(store, "a1c >= 5.5", "physician", ["a1c", "systolic"])
+    assert result["total"] == 4
+    jones, perez = result["groups"]
+    assert (jones["group"], jones["count"]) == ("Dr. Benjamin Jones", 2)
+    assert jones["a1c"] == {"mean": 6.2, "min": 6.0, "max": 6.4}
+    assert perez["systolic_bp"] == {"mean": 115.0, "min": 90.0, "max": 140.0}
+
+    by_score = cohort.group_by(store, "", "risk_score_numeric")
+    assert len(by_score["groups"]) == 5
+    with pytest.raises(cohort.CohortQueryError):
+        cohort.group_by(store, "", "risk", ["physician"])
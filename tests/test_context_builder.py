@@ -0,0 +1,137 @@
+import pytest
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.data_models import Message
+from backend.services.context_builder import ContextBuilder, EARLIER, SUMMARY_KEY, SUMMARY_HEADER, estimate_tokens, rolling_summary
+
+
+@pytest.fixture
+def motivation_state(make_state):
+    return lambda messages: make_state("context_user", current_agent="motivation", history=messages)
+
+
+def turn(i):
+    return [
+        Message(role="user", content=f"Turn {i}: " + "I walked a little today and felt okay about it. " * 3),
+        Message(role="assistant", content=f"Reply {i}: " + "That is a great step, tell me more about how it felt. " * 3),
+    ]
+
+
+def test_history_is_packed_newest_first_within_the_budget(motivation_state):
+    builder = ContextBuilder(default_budget=200)
+    state = motivation_state([m for i in range(30) for m in turn(i)])
+
+    async def scenario():
+        return builder.build("MotivationSignature", state)
+
+    history = asyncio.run(scenario())
+    assert estimate_tokens(history) <= 200
+    assert history.endswith(state.conversation_history[-1].content)  # newest message last, always included
+    assert "Turn 0:" not in history
+    assert builder.stats["trimmed"] == 1 and builder.stats["tokens_saved"] > 0
+
+    small = motivation_state(turn(0))  # fits: same format as before, nothing to summarize
+    assert builder.build("MotivationSignature", small) == "\n".join(f"{m.role}: {m.content}" for m in small.conversation_history)
+
+
+def test_older_turns_fold_into_a_rolling_summary_off_the_critical_path(motivation_state):
+    updated = []
+    builder = ContextBuilder(default_budget=250, summary_tokens=100, on_update=updated.append)
+    state = motivation_state([Message(role="user", content="Importance is 8 out of 10 for me.")] +
+                       [m for i in range(20) for m in turn(i)])
+
+    async def scenario():
+        first = builder.build("MotivationSignature", state)
+        assert SUMMARY_HEADER not in first and SUMMARY_KEY not in state.context_variables  # not awaited inline
+        await builder.drain()
+        return first, builder.build("MotivationSignature", state)
+
+    first, second = asyncio.run(scenario())
+    summary = state.context_variables[SUMMARY_KEY]
+    assert updated and all(s is state for s in updated)
+    assert 0 < summary["through"] < len(state.conversation_history)
+    assert estimate_tokens(summary["text"]) <= 100
+    assert second.startswith(SUMMARY_HEADER) and estimate_tokens(second) <= 250
+    # Messages the summary covers are not repeated verbatim
+    assert state.conversation_history[summary["through"] - 1].content not in second.split("\n\n", 1)[1]
+
+
+def test_prompt_tokens_stay_bounded_as_the_conversation_grows(motivation_state):
+    builder = ContextBuilder(default_budget=300, summary_tokens=80)
+    state = motivation_state([Message(role="user", content="My confidence is 6 out of 10.")])
+    sizes = []
+
+    async def scenario():
+        for i in range(60):
+            state.conversation_history.extend(turn(i))
+            sizes.append(estimate_tokens(builder.build("MotivationSignature", state)))
+            await builder.drain()
+
+    asyncio.run(scenario())
+    assert max(sizes) <= 300
+    assert builder.stats["summary_updates"] > 1
+    assert builder.stats["tokens_full"] > 5 * builder.stats["tokens_sent"]
+    # The early rating is a key point: it outlives the turns summarized after it
+    assert "confidence is 6 out of 10" in state.context_variables[SUMMARY_KEY]["text"]
+
+
+def test_per_signature_budget_and_fresh_start(monkeypatch, motivation_state):
+    monkeypatch.setenv("ANTIGRAVITY_CONTEXT_TOKENS_INTAKE_SIGNATURE", "40")
+    builder = ContextBuilder(default_budget=1000)
+    assert builder.budget_for("IntakeSignature") == 40
+    assert builder.budget_for("CoachingSignature") == 1000
+
+    state = motivation_state([m for i in range(10) for m in turn(i)])
+
+    async def scenario():
+        builder.build("IntakeSignature", state)
+        state.conversation_history = state.conversation_history[-1:]  # fresh start while summarizing
+        await builder.drain()
+
+    asyncio.run(scenario())
+    assert SUMMARY_KEY not in state.context_variables  # the stale summary is discarded
+
+
+def test_messages_older_than_the_loaded_window_are_folded(motivation_state):
+    stored = [m for i in range(30) for m in turn(i)]  # the whole conversation, as in the database
+    requested = []
+
+    async def load_messages(user_id, start, end):
+        requested.append((user_id, start, end))
+        return stored[start:end]
+
+    folded = []
+
+    def summarize(messages, previous):
+        folded.extend(messages)
+        return "summary"
+
+    builder = ContextBuilder(default_budget=250, summarize=summarize, load_messages=load_messages)
+    state = motivation_state(stored[-10:])
+    state._history_offset = len(stored) - 10  # loaded with only the recent window, no summary yet
+
+    async def scenario():
+        builder.build("MotivationSignature", state)
+        await builder.drain()
+
+    asyncio.run(scenario())
+    summary = state.context_variables[SUMMARY_KEY]
+    assert requested == [("context_user", 0, 50)]
+    assert folded == stored[:summary["through"]]  # nothing between the summary and the loaded window is skipped
+
+
+def test_key_facts_match_whole_words_only():
+    summary = rolling_summary([
+        Message(role="user", content="I am ready to try."),
+        Message(role="user", content="I already walk daily."),
+        Message(role="user", content="That seems unimportant."),
+        Message(role="user", content="Importance is 7/10."),
+    ])
+    key_points = summary.split(EARLIER)[0]
+    assert "ready to try" in key_points and "Importance is 7/10" in key_points
+    assert "already" not in key_points and "unimportant" not in key_points
@@ -0,0 +1,90 @@
+import pytest
+import sys
+import os
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.agents.motivation_agent import MotivationAgent
+from backend.mcp_server.mcp_server import MCPServer
+from backend.models.data_models import AgentState
+from backend.models.signatures import EducationSignature, IntakeSignature, MotivationSignature
+from backend.services.context_projection import ProfileProjector
+from backend.services.data_loader import patch_profile
+
+
+@pytest.fixture
+def make_profile(make_profile):
+    """The shared test profile, named and with psychographics, so there is something to leave out."""
+    return lambda **fields: make_profile("projection_user", name="Sam", age=52, risk_score_numeric=60,
+                                         psychographics={"notes": "likes walking"}, **fields)
+
+
+def test_each_signature_gets_only_its_fields(make_profile):
+    projector = ProfileProjector()
+    profile = make_profile(importance_rating=7)
+
+    assert json.loads(projector.project("IntakeSignature", profile)) == {"name": "Sam"}
+    motivation = json.loads(projector.project("MotivationSignature", profile))
+    assert motivation["importance_rating"] == 7 and motivation["confidence_rating"] is None
+    assert "biomarkers" not in motivation and "psychographics" not in motivation
+    education = json.loads(projector.project("EducationSignature", profile))
+    assert education["biomarkers"]["a1c"] == 6.1 and "user_id" not in education
+
+    # Unknown signatures still get the whole profile
+    assert projector.project("CustomSignature", profile) == profile.model_dump_json()
+    assert projector.stats["serializations"] == 4 and projector.stats["tokens_sent"] > 0
+
+
+def test_projection_is_reused_until_the_profile_changes(make_profile):
+    projector = ProfileProjector()
+    profile = make_profile()
+
+    first = projector.project("MotivationSignature", profile)
+    assert projector.project("MotivationSignature", profile) is first
+    assert projector.stats["serializations"] == 1 and projector.stats["hits"] == 1
+
+    profile.importance_rating = None  # same value: not a change
+    assert projector.project("MotivationSignature", profile) is first
+
+    profile.importance_rating = 8.0
+    assert json.loads(projector.project("MotivationSignature", profile))["importance_rating"] == 8.0
+    assert projector.stats["invalidations"] == 1
+
+    # In-place edits are picked up through touch(), e.g. a roster refresh patching biomarkers
+    projector.project("EducationSignature", profile)
+    fresh = make_profile()
+    fresh.biomarkers.a1c = 6.8
+    patch_profile(profile, fresh, ["a1c"])
+    assert json.loads(projector.project("EducationSignature", profile))["biomarkers"]["a1c"] == 6.8
+
+    # Entries go away with their profile
+    del profile
+    assert projector._memo == {}
+
+
+def test_predict_fills_user_context_and_agents_invalidate(make_profile):
+    server = MCPServer()
+    seen = []
+
+    async def upstream(signature, state, inputs, stream=None):
+        seen.append(inputs)
+        return MagicMock(response="ok", importance_rating="9", confidence_rating=None, readiness_score=None,
+                         readiness_stage=None, barriers=None, facilitators=None, next_step="continue_motivation")
+    server._predict_upstream = upstream
+    state = AgentState(current_agent="motivation", conversation_history=[], patient_profile=make_profile())
+
+    async def scenario():
+        await server.predict(EducationSignature, state, user_input="What is A1c?")
+        await server.predict(IntakeSignature, state, user_input="hi")
+        await MotivationAgent(server).process("It matters a lot, 9 out of 10", state)
+        await server.predict(MotivationSignature, state, user_input="yes")
+
+    asyncio.run(scenario())
+    assert json.loads(seen[0]["user_context"])["biomarkers"]["a1c"] == 6.1  # previously never filled
+    assert seen[1]["user_profile"] == '{"name":"Sam"}'
+    assert json.loads(seen[2]["user_profile"])["importance_rating"] is None
+    assert json.loads(seen[3]["user_profile"])["importance_rating"] == 9.0
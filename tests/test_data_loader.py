@@ -0,0 +1,168 @@
+import pytest
+import sys
+import os
+
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services import cohort
+from backend.services.data_loader import DataLoader, parse_roster
+from backend.services.name_index import FUZZY_THRESHOLD, NameIndex, normalize_name, trigrams
+from backend.services.roster_store import RosterStore
+from backend.models.data_models import RiskLevel
+
+ROSTER_PATH = os.path.join(os.path.dirname(__file__), "..", "backend", "data", "PREVENT_Inform_Table_V2 (2).xlsx")
+
+
+@pytest.fixture
+def sheet(tmp_path):
+    path = str(tmp_path / "roster.xlsx")
+    pd.DataFrame({
+        "PREVENT_ID": [1001, 1002, 1003, None, 1005],
+        "Name": ["Abishek", None, "Alireza", "Ghost", "Bad BP"],
+        "Age": [49, 48, 62, 50, 40],
+        "Blood Pressure": ["122/80", "140 / 83", None, "120/80", "12x/80"],
+        "Years to DM": [10, 9, 6, 5, 5],
+        "BMI": [34.9, 20.0, 36.4, 25.0, 25.0],
+        "LDL": [1.9, 3.2, 1.9, 2.0, 2.0],
+        "HDL": [1.1, 1.2, 1.1, 1.0, 1.0],
+        "A1c": [6.0, 5.7, 6.3, 5.5, 5.5],
+        "FBS": [5.5, 5.4, 5.6, 5.0, 5.0],
+        "Total_Cholesterol": [3.7, 4.7, 0.0, 4.0, 4.0],
+        "Diabetes Risk": ["High", "Low risk", "Moderate", "High", "High"],
+    }).to_excel(path, index=False)
+    return path
+
+
+def test_columns_are_parsed_vectorized(sheet, tmp_path):
+    profiles = DataLoader(sheet, cache_dir=str(tmp_path / "cache")).load_data()
+
+    # Missing ID and malformed blood pressure rows are skipped; float IDs keep their int form
+    assert list(profiles) == ["1001", "1002", "1003"]
+    first = profiles["1001"]
+    assert (first.biomarkers.systolic_bp, first.biomarkers.diastolic_bp) == (122, 80)
+    assert first.biomarkers.bmi == pytest.approx(34.9)
+    # glucose 0 + bmi 5 + hdl 0 + bp (122/80) 0 = 5 points: the model's 3% floor
+    assert first.risk_score_numeric == 3
+    assert first.diabetes_risk_score == RiskLevel.HIGH
+    assert first.motivation_level == "Unknown" and first.physician_name == "Dr. Smith"
+    assert profiles["1002"].name == "User"
+    assert profiles["1002"].diabetes_risk_score == RiskLevel.LOW
+    assert (profiles["1002"].biomarkers.systolic_bp, profiles["1002"].biomarkers.diastolic_bp) == (140, 83)
+    assert (profiles["1003"].biomarkers.systolic_bp, profiles["1003"].biomarkers.diastolic_bp) == (120, 80)
+    assert profiles["1003"].diabetes_risk_score == RiskLevel.MODERATE
+
+
+def test_text_lab_values_drop_the_row_and_blank_ones_score_nothing():
+    columns = parse_roster(pd.DataFrame({
+        "PREVENT_ID": [1, 2, 3], "Age": [50, 50, 50], "Years to DM": [5, 5, 5], "Blood Pressure": ["120/80"] * 3,
+        "BMI": [31.0, 31.0, 31.0], "FBS": [6.0, "pending", None], "HDL": [1.1, 1.1, None], "Sex": ["Male"] * 3,
+    }))
+    assert columns["user_id"].tolist() == ["1", "3"]  # "pending" is not a number: skipped, as float() did
+    store = RosterStore(columns)
+    assert store.numeric("fbs")[1] != store.numeric("fbs")[1]  # the blank cell is kept as NaN
+    assert store["1"].risk_score_numeric == 7  # FBS 6.0 (10) + BMI 31 (5) = 15 points
+    assert store["3"].risk_score_numeric == 3  # BMI only: blank FBS and HDL score nothing
+    assert store["3"].diabetes_risk_score == RiskLevel.LOW
+
+    # Comparisons never match NaN, so blank rows fall out of range filters; negations keep them
+    ids = lambda query: store.user_ids[cohort.select(store, query)].tolist()
+    assert ids("fbs between 0 and 10") == ["1"]
+    assert ids("hdl < 1.2") == ["1"] and ids("hdl >= 1.2") == []
+    assert ids("not hdl < 1.2") == ["3"] and ids("hdl != 1.1") == ["3"]
+
+
+def test_snapshot_serves_later_loads_and_tracks_the_sheet(sheet, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    cold = DataLoader(sheet, cache_dir=cache_dir)
+    cold.load_data()
+    assert cold.source == "excel" and os.path.exists(cold.snapshot_path)
+
+    warm = DataLoader(sheet, cache_dir=cache_dir)
+    assert warm.load_data()["1001"].model_dump() == cold.load_data()["1001"].model_dump()
+    assert warm.source == "snapshot"
+
+    # Touching the sheet keeps the snapshot (same content hash)...
+    os.utime(sheet, ns=(1_000_000_000, 1_000_000_000))
+    touched = DataLoader(sheet, cache_dir=cache_dir)
+    touched.load_data()
+    assert touched.source == "snapshot"
+
+    # ...editing it does not
+    df = pd.read_excel(sheet)
+    df.loc[0, "Name"] = "Renamed"
+    df.to_excel(sheet, index=False)
+    edited = DataLoader(sheet, cache_dir=cache_dir)
+    assert edited.load_data()["1001"].name == "Renamed"
+    assert edited.source == "excel"
+
+
+def test_bundled_roster_loads(tmp_path):
+    profiles = DataLoader(ROSTER_PATH, cache_dir=str(tmp_path / "cache")).load_data()
+    assert len(profiles) == 88
+    assert profiles["1001"].name == "Abishek"
+
+
+def test_name_lookup_uses_the_indexes(sheet, tmp_path):
+    loader = DataLoader(sheet, cache_dir=str(tmp_path / "cache"))
+    assert loader.get_patient_by_name("  ABISHEK ").user_id == "1001"
+    assert loader.get_patient_by_name("Nobody") is None
+
+    index = loader.name_index
+    assert index.prefix("ali") == ["1003"]
+    assert index.fuzzy("Abishk")[0][0] == "1001"
+
+
+def test_search_ranks_and_paginates():
+    index = NameIndex(
+        ["1", "2", "3", "4", "5"],
+        ["Ana Jones", "Anabel Smith", "José Ana", "Anna Jonas", "Bob Brown"],
+    )
+    page = index.search("ana", limit=2)
+    assert page["total"] == 4  # Bob Brown does not match
+    assert [r["user_id"] for r in page["results"]] == ["1", "2"]
+    assert [r["match"] for r in page["results"]] == ["prefix", "prefix"]
+
+    rest = index.search("ana", limit=2, offset=2)
+    assert [(r["user_id"], r["match"]) for r in rest["results"]] == [("3", "word_prefix"), ("4", "fuzzy")]
+
+    assert index.search("jose ana")["results"][0] == {"user_id": "3", "name": "José Ana", "score": 1.0, "match": "exact"}
+    assert index.search("")["total"] == 0
+
+
+def test_fuzzy_scores_only_candidates_but_misses_none():
+    names = ["Abishek Rao", "Abhishek Roy", "Abigail Shek", "Shek Abi", "Bob Brown", "Abi", ""]
+    index = NameIndex([str(i) for i in range(len(names))], names)
+    for query in ("Abishk", "shek", "Brwn", "zzz"):
+        grams = trigrams(normalize_name(query))
+        expected = {}
+        for i, name in enumerate(names):
+            name_grams = trigrams(normalize_name(name)) if name else set()
+            dice = 2 * len(grams & name_grams) / (len(grams) + len(name_grams))
+            if dice >= FUZZY_THRESHOLD:
+                expected[str(i)] = dice
+        assert dict(index.fuzzy(query)) == pytest.approx(expected), query
+
+
+def test_roster_store_materializes_profiles_on_demand(sheet, tmp_path):
+    store = DataLoader(sheet, cache_dir=str(tmp_path / "cache")).load_data()
+    assert len(store) == 3 and "1002" in store and "9999" not in store and store.get("9999") is None
+    assert store.stats["materialized"] == 0
+
+    profile = store["1003"]
+    assert store["1003"] is profile  # cached after the first lookup
+    assert store.stats == {"materialized": 1, "hits": 1}
+    assert isinstance(profile.age, int) and isinstance(profile.biomarkers.a1c, float)
+    assert profile.biomarkers.a1c == 6.3 and profile.physician_name == "Dr. Smith"
+
+    # Decoded columns round-trip to what parse_roster produced
+    columns = store.columns()
+    assert columns["name"].tolist() == ["Abishek", "User", "Alireza"]
+    assert columns["risk_level"].tolist() == ["High", "Low", "Moderate"]
+
+    small = RosterStore(columns, profile_cache_size=1)
+    first = small["1001"]
+    small["1002"]
+    assert small["1001"] is not first and small.cached_profiles == 1
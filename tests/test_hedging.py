@@ -0,0 +1,126 @@
+import pytest
+import sys
+import os
+import asyncio
+import time
+
+import dspy
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.signatures import EducationSignature
+from backend.services.hedging import HedgePolicy
+from backend.services.provider_health import ProviderHealth
+
+
+class ProviderPredictor:
+    """Stands in for dspy.Predict: latency (or an error) depends on the provider in dspy.context."""
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.cancelled = []
+
+    async def acall(self, **inputs):
+        provider = dspy.settings.lm.provider_name
+        delay, error = self.behaviour[provider]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(provider)
+            raise
+        if error:
+            raise error
+        return f"{provider}: {inputs['user_input']}"
+
+
+PROVIDERS = ("Primary", "Secondary")
+
+
+def make_hedging(**overrides):
+    hedging = HedgePolicy(signatures="EducationSignature", **overrides)
+    hedging.default_delay_ms = 50
+    hedging.min_delay_ms = 10
+    return hedging
+
+
+def test_slow_primary_is_hedged_and_the_loser_cancelled(make_server, make_state):
+    predictor = ProviderPredictor({"Primary": (1.0, None), "Secondary": (0.02, None)})
+    server = make_server({EducationSignature: predictor}, PROVIDERS, hedging=make_hedging())
+
+    started = time.perf_counter()
+    result = asyncio.run(server.predict(EducationSignature, make_state(), user_input="hi"))
+    elapsed = time.perf_counter() - started
+
+    assert result == "Secondary: hi"
+    assert elapsed < 0.5
+    assert predictor.cancelled == ["Primary"]
+    assert server.audited == ["Secondary"]  # only the answer that was used
+    stats = server.hedging.stats
+    assert (stats["hedges"], stats["hedge_wins"], stats["cancelled"]) == (1, 1, 1)
+    assert stats["extra_prompt_tokens_est"] > 0
+    primary = server.health.snapshot()[0]
+    assert primary["failures"] == 0 and primary["state"] == "closed"  # losing a race is not a failure
+
+
+def test_cancelled_caller_cancels_the_primary_and_the_hedge(make_server, make_state):
+    predictor = ProviderPredictor({"Primary": (1.0, None), "Secondary": (1.0, None)})
+    hedging = make_hedging()
+    hedging.default_delay_ms = 100
+    server = make_server({EducationSignature: predictor}, PROVIDERS, hedging=hedging)
+
+    async def cancel_after(seconds):
+        call = asyncio.ensure_future(server.predict(EducationSignature, make_state(), user_input="hi"))
+        await asyncio.sleep(seconds)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        await asyncio.sleep(0)  # let the cancelled calls unwind
+        return list(predictor.cancelled)
+
+    assert asyncio.run(cancel_after(0.03)) == ["Primary"]  # still within the hedge delay
+    predictor.cancelled.clear()
+    assert sorted(asyncio.run(cancel_after(0.2))) == ["Primary", "Secondary"]  # while the two race
+
+
+def test_fast_primary_and_unhedged_signatures_never_hedge(make_server, make_state):
+    predictor = ProviderPredictor({"Primary": (0.0, None), "Secondary": (0.0, None)})
+    server = make_server({EducationSignature: predictor}, PROVIDERS, hedging=make_hedging())
+    assert asyncio.run(server.predict(EducationSignature, make_state(), user_input="a")) == "Primary: a"
+
+    server.hedging.configure("EducationSignature", False)
+    predictor.behaviour["Primary"] = (0.1, None)
+    assert asyncio.run(server.predict(EducationSignature, make_state(), user_input="b")) == "Primary: b"
+    assert server.hedging.stats["hedges"] == 0 and server.hedging.stats["requests"] == 1
+
+
+def test_hedge_budget_caps_the_extra_calls(make_server, make_state):
+    # Both providers slower than the hedge delay, so every request would like to hedge
+    predictor = ProviderPredictor({"Primary": (0.1, None), "Secondary": (0.1, None)})
+    server = make_server({EducationSignature: predictor}, PROVIDERS, hedging=make_hedging(max_rate=0.0, burst=1))
+
+    async def scenario():
+        return [await server.predict(EducationSignature, make_state(), user_input=str(i)) for i in range(3)]
+
+    results = asyncio.run(scenario())
+    assert results == ["Primary: 0", "Primary: 1", "Primary: 2"]  # the head start wins the race
+    stats = server.hedging.stats
+    assert (stats["requests"], stats["hedges"], stats["over_budget"]) == (3, 1, 2)
+    assert stats["primary_wins"] == 1 and server.hedging.hedge_rate == pytest.approx(1 / 3)
+
+
+def test_failed_hedge_falls_back_to_the_primary(make_server, make_state):
+    predictor = ProviderPredictor({"Primary": (0.1, None), "Secondary": (0.0, ValueError("bad json"))})
+    server = make_server({EducationSignature: predictor}, PROVIDERS, hedging=make_hedging())
+    assert asyncio.run(server.predict(EducationSignature, make_state(), user_input="x")) == "Primary: x"
+    assert server.hedging.stats["primary_wins"] == 1
+    assert server.health.snapshot()[1]["failures"] == 1
+
+
+def test_hedge_delay_follows_the_learned_percentile():
+    health, hedging = ProviderHealth(), HedgePolicy(percentile=95)
+    assert hedging.delay_for(health, "Primary") == hedging.default_delay_ms / 1000  # nothing learned yet
+    for latency in range(1, 101):
+        health.record_success("Primary", float(latency * 10))
+    assert health.latency_percentile("Primary", 95) == 950.0
+    assert hedging.delay_for(health, "Primary") == pytest.approx(0.95)
@@ -0,0 +1,170 @@
+import pytest
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.persistence import AsyncPersistence, archive_path
+from backend.services.maintenance import MaintenanceJob
+from backend.services.context_builder import ContextBuilder, SUMMARY_KEY
+from tests.test_persistence import make_state
+
+
+@pytest.fixture
+def persistence(tmp_path):
+    p = AsyncPersistence()
+    p.db_path = str(tmp_path / "maintenance_test.db")
+    return p
+
+
+def make_job(persistence, **overrides):
+    job = MaintenanceJob(persistence)
+    job.pause = 0
+    job.archive_after_days = 0
+    job.compact_keep = 0
+    job.audit_retention_days = 0
+    for key, value in overrides.items():
+        setattr(job, key, value)
+    return job
+
+
+async def age_rows(persistence, sql):
+    async def write(db):
+        await db.execute(sql)
+    await persistence.pool.write(write)
+
+
+def test_idle_sessions_are_archived_and_restored_on_load(persistence):
+    async def scenario():
+        await persistence.init_db()
+        await persistence.save_states({f"u{i}": make_state(f"u{i}", messages=3) for i in range(5)})
+        await age_rows(persistence, "UPDATE user_states SET updated_at = '2020-01-01 00:00:00' WHERE user_id != 'u4'")
+        job = make_job(persistence, archive_after_days=30, is_active=lambda user_id: user_id == "u3")
+        report = await job.run_once()
+        hot = [row["users"] for row in await persistence.shard_summary()]
+        restored = await persistence.load_state("u0")
+        restored_again = await persistence.load_state("u0")
+        await persistence.close()
+        return report, hot, restored, restored_again
+
+    report, hot, restored, restored_again = asyncio.run(scenario())
+    assert report["archived_sessions"] == 3  # u3 is active, u4 is recent
+    assert hot == [2]
+    assert os.path.exists(archive_path(persistence.db_path))
+    assert [m.content for m in restored.conversation_history] == ["msg 0", "msg 1", "msg 2"]
+    assert restored_again.total_messages == 3
+
+
+def test_long_conversations_are_compacted_into_a_summary(persistence):
+    async def scenario():
+        await persistence.init_db()
+        persistence.history_window = 10
+        await persistence.save_state("u1", make_state("u1", messages=30))
+        job = make_job(persistence, compact_keep=10)
+        report = await job.run_once()
+        remaining = await persistence.load_messages("u1")
+        summary = await persistence.load_summary("u1")
+        state = await persistence.load_state("u1")
+        straddling = await persistence.load_message_range("u1", 15, 25)
+        await persistence.close()
+        return report, remaining, summary, state, straddling
+
+    report, remaining, summary, state, straddling = asyncio.run(scenario())
+    assert report["compacted_users"] == 1
+    assert report["compacted_messages"] == 20
+    assert [m.content for m in remaining] == [f"msg {i}" for i in range(20, 30)]
+    assert summary["through_seq"] == 19 and summary["summarized_count"] == 20
+    assert summary["summary"].startswith("user: msg 0\nassistant: msg 1")
+    assert state.total_messages == 30
+    assert [m.content for m in straddling] == [f"msg {i}" for i in range(20, 25)]  # 15-19 were compacted away
+
+
+def test_context_folds_compacted_turns_from_the_compaction_summary(persistence):
+    folded = []
+
+    def summarize(messages, previous):
+        folded.extend(m.content for m in messages)
+        return "summary"
+
+    async def scenario():
+        await persistence.init_db()
+        persistence.history_window = 10
+        await persistence.save_state("u1", make_state("u1", messages=30))
+        await make_job(persistence, compact_keep=10).run_once()  # msgs 0-19 now live only in the summary
+        persistence.history_window = 5
+        state = await persistence.load_state("u1")  # msgs 25-29 in memory, 20-24 still stored
+        builder = ContextBuilder(default_budget=12, summarize=summarize,
+                                 load_messages=persistence.load_message_range, load_summary=persistence.load_summary)
+        builder.build("MotivationSignature", state)
+        await builder.drain()
+        await persistence.close()
+        return state
+
+    state = asyncio.run(scenario())
+    through = state.context_variables[SUMMARY_KEY]["through"]
+    assert through > 25
+    assert folded == [f"msg {i}" for i in range(through)]  # no turn is skipped, compacted or not
+
+
+def test_audit_retention_keeps_the_chain_verifiable(persistence):
+    async def scenario():
+        await persistence.init_db()
+        for i in range(10):
+            await persistence.log_interaction("u1", "coaching", "Sig", f"in {i}", f"out {i}", "model", "provider", 1.0)
+        await age_rows(persistence, "UPDATE llm_interactions SET timestamp = '2020-01-01 00:00:00' WHERE id <= 4")
+        # The aged rows no longer match their hashes, but they are exactly the ones purged
+        job = make_job(persistence, audit_retention_days=90)
+        report = await job.run_once()
+        chain = await persistence.verify_interaction_chain()
+        await persistence.close()
+        return report, chain
+
+    report, chain = asyncio.run(scenario())
+    assert report["purged_interactions"] == 4
+    assert chain["verified"] == 6 and chain["broken_at"] is None
+
+
+def test_vacuum_returns_free_pages(persistence):
+    async def scenario():
+        await persistence.init_db()
+        await persistence.save_states({f"u{i}": make_state(f"u{i}", messages=40) for i in range(200)})
+
+        async def wipe(db):
+            await db.execute("DELETE FROM messages")
+        await persistence.pool.write(wipe)
+        job = make_job(persistence, vacuum_pages=50)
+        report = await job.run_once()
+        await persistence.close()
+        return report
+
+    report = asyncio.run(scenario())
+    assert report["freed_pages"] > 50  # took several throttled steps
+    assert report["wal_checkpointed"]
+    assert report["bytes_reclaimed"] > 0
+    assert set(report["step_seconds"]) == {"archive", "compact", "audit_retention", "vacuum"}
+
+
+def test_load_misses_check_archived_ids_without_opening_the_archive(persistence, monkeypatch):
+    import backend.services.persistence as persistence_module
+    opened = []
+    connect = persistence_module.aiosqlite.connect
+    monkeypatch.setattr(persistence_module.aiosqlite, "connect", lambda path, *a, **kw: opened.append(path) or connect(path, *a, **kw))
+
+    async def scenario():
+        await persistence.init_db()
+        await persistence.save_states({f"u{i}": make_state(f"u{i}") for i in range(3)})
+        await age_rows(persistence, "UPDATE user_states SET updated_at = '2020-01-01 00:00:00' WHERE user_id != 'u2'")
+        await make_job(persistence, archive_after_days=30).run_once()
+        opened.clear()
+        misses = [await persistence.load_state(f"new{i}") for i in range(20)]
+        after_misses = len(opened)
+        restored = await persistence.load_state("u0")
+        await persistence.close()
+        return misses, after_misses, restored
+
+    misses, after_misses, restored = asyncio.run(scenario())
+    assert misses == [None] * 20
+    assert after_misses == 1  # the archived ids are read once, not per miss
+    assert restored is not None and restored.total_messages == 2
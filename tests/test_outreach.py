@@ -0,0 +1,106 @@
+import pytest
+import sys
+import os
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import aiosqlite
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.signatures import OutreachSignature
+from backend.services.outreach import OutreachJob, outreach_path, run_id_for
+from backend.services.provider_health import ProviderHealth
+from backend.services.roster_store import RosterStore
+
+QUERY = "risk == High"
+
+
+@pytest.fixture
+def roster():
+    n = 12
+    return RosterStore({
+        "user_id": np.array([str(1001 + i) for i in range(n)]),
+        "name": np.array([f"Patient {i}" for i in range(n)]),
+        "age": np.full(n, 55),
+        "risk_level": np.array(["High", "Low", "High"] * 4),
+        "risk_score_numeric": np.full(n, 70),
+        "a1c": np.full(n, 6.2), "fbs": np.full(n, 6.0), "systolic_bp": np.full(n, 135), "diastolic_bp": np.full(n, 85),
+        "ldl": np.full(n, 3.0), "hdl": np.full(n, 1.1), "total_cholesterol": np.full(n, 5.0), "weight": np.full(n, 82.0),
+        "motivation_level": np.array(["Unknown"] * n),
+        "physician_name": np.array(["Dr. Wei Zhang"] * n),
+    })
+
+
+class OutreachLLM:
+    """Writes a message from the projected profile; fails for the user_ids in `failing` (once each)."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.profiles = []
+
+    async def acall(self, user_profile):
+        await asyncio.sleep(0.005)
+        profile = json.loads(user_profile)
+        self.profiles.append(profile)
+        if profile["name"] in self.failing:
+            self.failing.discard(profile["name"])
+            raise RuntimeError("503 Service Unavailable")
+        return MagicMock(subject="An invitation from your clinic",
+                         message=f"Hi {profile['name']}, the care team at {profile['physician_name']}'s clinic is reaching out.")
+
+
+@pytest.fixture
+def outreach_server(make_server):
+    """A server for an OutreachLLM whose breaker never opens, so each patient's failure stays its own."""
+    return lambda llm: make_server({OutreachSignature: llm}, health=ProviderHealth(failure_threshold=100))
+
+
+async def stored(db_path):
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute("SELECT user_id, status, attempts, message FROM outreach_messages ORDER BY user_id")
+        return await cursor.fetchall()
+
+
+def test_generates_the_cohort_in_batches_and_exports(roster, tmp_path, outreach_server):
+    llm = OutreachLLM()
+    job = OutreachJob(outreach_server(llm), roster, db_path=str(tmp_path / "outreach.db"), workers=3, batch_size=3)
+
+    report = asyncio.run(job.run(QUERY))
+    assert report["cohort"] == 8 and report["generated"] == 8 and report["failed"] == 0 and report["skipped"] == 0
+    assert report["batches_written"] >= 3 and report["patients_per_minute"] > 0
+    assert report["run_id"] == run_id_for("risk  ==  High")  # same query, same checkpoint
+
+    rows = asyncio.run(stored(job.db_path))
+    assert len(rows) == 8 and all(status == "generated" for _, status, _, _ in rows)
+    # Only the outreach projection of the profile is sent
+    assert set(llm.profiles[0]) == {"name", "age", "diabetes_risk_score", "biomarkers", "physician_name"}
+
+    path = tmp_path / "outreach.jsonl"
+    assert asyncio.run(job.export(report["run_id"], str(path))) == 8
+    first = json.loads(path.read_text().splitlines()[0])
+    assert first["user_id"] == "1001" and first["message"] == "Hi Patient 0, the care team at Dr. Wei Zhang's clinic is reaching out."
+
+
+def test_resumes_from_the_checkpoint_and_retries_failures(roster, tmp_path, outreach_server):
+    llm = OutreachLLM(failing={"Patient 3"})
+    db_path = str(tmp_path / "outreach.db")
+
+    first = asyncio.run(OutreachJob(outreach_server(llm), roster, db_path=db_path, workers=2, batch_size=2).run(QUERY, limit=5))
+    assert (first["generated"], first["failed"]) == (4, 1)  # stopped part way, one failure
+
+    second = asyncio.run(OutreachJob(outreach_server(llm), roster, db_path=db_path, workers=2, batch_size=2).run(QUERY))
+    assert (second["skipped"], second["generated"], second["failed"]) == (4, 4, 0)
+    assert len(llm.profiles) == 9  # nothing generated twice; only the failure was retried
+
+    rows = {user_id: (status, attempts) for user_id, status, attempts, _ in asyncio.run(stored(db_path))}
+    assert len(rows) == 8 and rows["1004"] == ("generated", 2)
+    assert set(status for status, _ in rows.values()) == {"generated"}
+
+
+def test_default_database_sits_next_to_the_app_database():
+    assert outreach_path("/data/antigravity.db") == "/data/antigravity.outreach.db"
+    assert run_id_for("a1c >= 6") != run_id_for("a1c >= 6.5")
@@ -0,0 +1,195 @@
+import pytest
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.persistence import AsyncPersistence
+from backend.models.data_models import AgentState, PatientProfile, Message, RiskLevel, Biomarkers
+
+
+def make_state(user_id: str, messages: int = 2) -> AgentState:
+    profile = PatientProfile(
+        user_id=user_id,
+        name="Test Patient",
+        age=45,
+        diabetes_risk_score=RiskLevel.HIGH,
+        risk_score_numeric=85,
+        biomarkers=Biomarkers(
+            a1c=6.5, fbs=7.0, systolic_bp=130, diastolic_bp=85,
+            ldl=3.5, hdl=1.1, total_cholesterol=5.2, weight=85, height=175
+        )
+    )
+    history = [Message(role="user" if i % 2 == 0 else "assistant", content=f"msg {i}") for i in range(messages)]
+    return AgentState(current_agent="motivation", conversation_history=history, patient_profile=profile)
+
+
+@pytest.fixture
+def persistence(tmp_path):
+    p = AsyncPersistence()
+    p.db_path = str(tmp_path / "pool_test.db")
+    return p
+
+
+def test_save_and_load_roundtrip(persistence):
+    async def scenario():
+        await persistence.init_db()
+        await persistence.save_state("u1", make_state("u1", messages=4))
+        loaded = await persistence.load_state("u1")
+        missing = await persistence.load_state("nobody")
+        await persistence.close()
+        return loaded, missing
+
+    loaded, missing = asyncio.run(scenario())
+    assert missing is None
+    assert loaded.current_agent == "motivation"
+    assert [m.content for m in loaded.conversation_history] == ["msg 0", "msg 1", "msg 2", "msg 3"]
+
+
+def test_concurrent_writes_are_group_committed(persistence):
+    """Writes queued together share one transaction on the single writer connection."""
+    async def scenario():
+        await persistence.init_db()
+        await asyncio.gather(*[persistence.save_state(f"u{i}", make_state(f"u{i}")) for i in range(50)])
+        loaded = await asyncio.gather(*[persistence.load_state(f"u{i}") for i in range(50)])
+        stats = dict(persistence.pool.stats)
+        await persistence.close()
+        return loaded, stats
+
+    loaded, stats = asyncio.run(scenario())
+    assert all(state is not None for state in loaded)
+    assert stats["write_ops"] == 51  # schema + 50 saves
+    assert stats["write_batches"] < stats["write_ops"]
+
+
+def test_failing_write_does_not_poison_batch(persistence):
+    async def scenario():
+        await persistence.init_db()
+
+        async def broken(db):
+            await db.execute("INSERT INTO no_such_table VALUES (1)")
+
+        results = await asyncio.gather(
+            persistence.save_state("ok_before", make_state("ok_before")),
+            persistence.pool.write(broken),
+            persistence.save_state("ok_after", make_state("ok_after")),
+            return_exceptions=True,
+        )
+        before = await persistence.load_state("ok_before")
+        after = await persistence.load_state("ok_after")
+        await persistence.close()
+        return results, before, after
+
+    results, before, after = asyncio.run(scenario())
+    assert isinstance(results[1], Exception)
+    assert before is not None and after is not None
+
+
+def test_close_drains_pending_writes(persistence):
+    async def scenario():
+        await persistence.init_db()
+        for i in range(20):
+            asyncio.create_task(persistence.save_state(f"bg{i}", make_state(f"bg{i}")))
+        await asyncio.sleep(0)
+        await persistence.close()
+        # Reopens the pool transparently
+        loaded = [await persistence.load_state(f"bg{i}") for i in range(20)]
+        await persistence.close()
+        return loaded
+
+    assert all(state is not None for state in asyncio.run(scenario()))
+
+
+def test_turns_append_only_new_messages(persistence):
+    async def scenario():
+        await persistence.init_db()
+        state = make_state("u1", messages=2)
+        await persistence.save_state("u1", state)
+        state.conversation_history.append(Message(role="user", content="msg 2"))
+        state.conversation_history.append(Message(role="assistant", content="msg 3"))
+
+        inserted = []
+
+        async def spy(db):
+            cursor = await db.execute("SELECT COUNT(*) FROM messages WHERE user_id = 'u1'")
+            inserted.append((await cursor.fetchone())[0])
+
+        await persistence.save_state("u1", state)
+        await persistence.pool.write(spy)
+        await persistence.close()
+        return state, inserted
+
+    state, inserted = asyncio.run(scenario())
+    assert inserted == [4]
+    assert state._persisted_count == 4 and state._next_seq == 4
+
+
+def test_load_state_fetches_recent_window(persistence):
+    async def scenario():
+        await persistence.init_db()
+        await persistence.save_state("u1", make_state("u1", messages=30))
+        persistence.history_window = 10
+        loaded = await persistence.load_state("u1")
+        loaded.conversation_history.append(Message(role="user", content="msg 30"))
+        await persistence.save_state("u1", loaded)
+        everything = await persistence.load_messages("u1")
+        older = await persistence.load_message_range("u1", 5, loaded._history_offset)
+        await persistence.close()
+        return loaded, everything, older
+
+    loaded, everything, older = asyncio.run(scenario())
+    assert [m.content for m in loaded.conversation_history[:2]] == ["msg 20", "msg 21"]
+    assert loaded.total_messages == 31
+    assert [m.content for m in everything] == [f"msg {i}" for i in range(31)]
+    assert [m.content for m in older] == [f"msg {i}" for i in range(5, 20)]  # the ones before the loaded window
+
+
+def test_replaced_history_rewrites_stored_messages(persistence):
+    """IntakeAgent's fresh start replaces the history list; stored messages must follow."""
+    async def scenario():
+        await persistence.init_db()
+        state = make_state("u1", messages=6)
+        await persistence.save_state("u1", state)
+        state.conversation_history = state.conversation_history[-1:]
+        state.conversation_history.append(Message(role="assistant", content="fresh"))
+        await persistence.save_state("u1", state)
+        loaded = await persistence.load_state("u1")
+        await persistence.close()
+        return loaded
+
+    loaded = asyncio.run(scenario())
+    assert [m.content for m in loaded.conversation_history] == ["msg 5", "fresh"]
+    assert loaded.total_messages == 2
+
+
+def test_migrates_legacy_conversation_history(persistence):
+    import json
+    import sqlite3
+
+    legacy = sqlite3.connect(persistence.db_path)
+    legacy.execute("""
+        CREATE TABLE user_states (
+            user_id TEXT PRIMARY KEY, current_agent TEXT, conversation_history TEXT,
+            patient_profile TEXT, context_variables TEXT, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    state = make_state("legacy_user", messages=3)
+    legacy.execute(
+        "INSERT INTO user_states (user_id, current_agent, conversation_history, patient_profile, context_variables) VALUES (?, ?, ?, ?, ?)",
+        ("legacy_user", "coaching", json.dumps([m.model_dump() for m in state.conversation_history]),
+         state.patient_profile.model_dump_json(), "{}"),
+    )
+    legacy.commit()
+    legacy.close()
+
+    async def scenario():
+        await persistence.init_db()
+        loaded = await persistence.load_state("legacy_user")
+        await persistence.close()
+        return loaded
+
+    loaded = asyncio.run(scenario())
+    assert loaded.current_agent == "coaching"
+    assert [m.content for m in loaded.conversation_history] == ["msg 0", "msg 1", "msg 2"]
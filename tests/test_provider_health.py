@@ -0,0 +1,89 @@
+import pytest
+import sys
+import os
+import asyncio
+
+import dspy
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.signatures import EducationSignature
+from backend.services.provider_health import ProviderHealth, classify_error, OPEN, HALF_OPEN, CLOSED
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("backend.services.provider_health.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_errors_are_classified():
+    assert classify_error(Exception("429 Too Many Requests")) == "rate_limit"
+    assert classify_error(Exception("Quota exceeded for model")) == "rate_limit"
+    assert classify_error(asyncio.TimeoutError()) == "timeout"
+    assert classify_error(ValueError("bad json")) == "error"
+
+
+def test_circuit_opens_cools_down_and_probes_back(clock):
+    health = ProviderHealth(failure_threshold=2, cooldown=30, max_cooldown=100)
+    providers = ["Primary", "Secondary"]
+    assert health.route(providers) == providers
+
+    health.record_failure("Primary", Exception("429 rate limited"))  # trips at once
+    assert health.route(providers) == ["Secondary"]
+
+    health.record_failure("Secondary", ValueError("flaky"))  # below the threshold
+    assert health.route(providers) == ["Secondary"]
+    health.record_failure("Secondary", ValueError("flaky"))
+    assert health.route(providers) == providers  # everything open: try all rather than nothing
+
+    clock[0] += 31
+    assert health.route(providers) == providers  # both half-open, probed first
+    assert health.begin("Primary") and not health.begin("Primary")  # one probe at a time
+    health.record_failure("Primary", Exception("429 again"))
+    primary = health.snapshot()[0]
+    assert (primary["state"], primary["retry_in_s"]) == (OPEN, 60.0)  # cooldown doubled
+
+    assert health.begin("Secondary")
+    health.record_success("Secondary", 120.0)
+    assert health.snapshot()[1]["state"] == CLOSED
+    assert health.route(providers) == ["Secondary"]
+
+    clock[0] += 61
+    assert health.snapshot()[0]["state"] == HALF_OPEN
+    health.record_success("Primary", 80.0)
+    assert health.route(providers) == ["Primary", "Secondary"]  # faster EWMA first
+
+
+def test_fastest_healthy_provider_is_preferred(clock):
+    health = ProviderHealth(alpha=0.5)
+    providers = ["Primary", "Secondary", "Fallback"]
+    health.record_success("Primary", 900.0)
+    health.record_success("Secondary", 300.0)
+    assert health.route(providers) == ["Secondary", "Primary", "Fallback"]  # unmeasured keep priority
+    health.record_success("Secondary", 2100.0)  # EWMA 1200
+    assert health.route(providers) == ["Primary", "Secondary", "Fallback"]
+
+
+def test_failover_skips_a_rate_limited_primary(make_server, make_state):
+    calls = []
+
+    class Predictor:
+        async def acall(self, **inputs):
+            provider = dspy.settings.lm.provider_name
+            calls.append(provider)
+            if provider == "Primary":
+                raise Exception("429 Resource has been exhausted")
+            return provider
+
+    server = make_server({EducationSignature: Predictor()}, ("Primary", "Secondary"))
+    state = make_state()
+
+    async def scenario():
+        return [await server.predict(EducationSignature, state, user_input="hi") for _ in range(3)]
+
+    assert asyncio.run(scenario()) == ["Secondary"] * 3
+    assert calls == ["Primary", "Secondary", "Secondary", "Secondary"]  # no more round-trips to Primary
+    assert server.health.snapshot()[0]["state"] == OPEN
@@ -0,0 +1,83 @@
+import pytest
+import sys
+import os
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.signatures import EducationSignature
+from backend.services.provider_limits import ProviderLimits
+
+
+class SlowPredictor:
+    """Stands in for dspy.Predict: an async call that takes `delay` seconds."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def acall(self, **inputs):
+        await asyncio.sleep(self.delay)
+        return inputs["user_input"]
+
+
+PROVIDERS = ("Fake Primary",)
+
+
+def test_llm_calls_do_not_block_the_event_loop(make_server, make_state):
+    server = make_server({EducationSignature: SlowPredictor(0.1)}, PROVIDERS)
+
+    async def scenario():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            server.predict(EducationSignature, make_state(f"u{i}"), user_input=f"q{i}") for i in range(10)
+        ])
+        elapsed = time.perf_counter() - started
+        beat.cancel()
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(scenario())
+    assert results == [f"q{i}" for i in range(10)]
+    assert elapsed < 0.5  # ~ one call, not ten
+    assert ticks >= 5  # the loop kept serving other work meanwhile
+
+
+def test_per_provider_limit_queues_excess_calls(monkeypatch, make_server, make_state):
+    monkeypatch.setenv("ANTIGRAVITY_LLM_CONCURRENCY_FAKE_PRIMARY", "2")
+    limits = ProviderLimits(default_limit=8)
+    assert limits.limit_for("Fake Primary") == 2 and limits.limit_for("Other") == 8
+    server = make_server({EducationSignature: SlowPredictor(0.05)}, PROVIDERS, provider_limits=limits)
+
+    async def scenario():
+        started = time.perf_counter()
+        await asyncio.gather(*[server.predict(EducationSignature, make_state("u"), user_input="q") for _ in range(4)])
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(scenario())
+    stats = limits.stats["Fake Primary"]
+    assert stats["peak_in_flight"] == 2 and stats["calls"] == 4 and stats["waits"] == 2
+    assert elapsed >= 0.1  # two waves
+
+
+def test_sync_predictors_run_in_a_worker_thread(make_server, make_state):
+    blocking = MagicMock(side_effect=lambda **inputs: time.sleep(0.05) or "done")
+    server = make_server({EducationSignature: blocking}, PROVIDERS)
+
+    async def scenario():
+        started = time.perf_counter()
+        await asyncio.gather(*[server.predict(EducationSignature, make_state("u"), user_input="q") for _ in range(4)])
+        return time.perf_counter() - started
+
+    assert asyncio.run(scenario()) < 0.15
+    assert blocking.call_count == 4
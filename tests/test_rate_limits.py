@@ -0,0 +1,88 @@
+import pytest
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.main import _chat_error
+from backend.models.signatures import EducationSignature
+from backend.services.rate_limits import ClientRateLimitError, RateLimits
+
+
+class EchoPredictor:
+    async def acall(self, **inputs):
+        await asyncio.sleep(0.01)
+        return inputs["user_input"]
+
+
+def test_spills_over_to_the_next_key_only_when_a_bucket_is_empty(monkeypatch, make_server, make_state):
+    monkeypatch.setenv("ANTIGRAVITY_LLM_RPM_PRIMARY", "2")
+    monkeypatch.setenv("ANTIGRAVITY_LLM_RPM_SECONDARY", "3")
+    server = make_server({EducationSignature: EchoPredictor()}, ("Primary", "Secondary"), rate_limits=RateLimits(queue_timeout=0.2))
+
+    async def scenario():
+        return await asyncio.gather(*[server.predict(EducationSignature, make_state(), user_input=f"q{i}")
+                                      for i in range(6)], return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert results[:5] == ["q0", "q1", "q2", "q3", "q4"]
+    assert isinstance(results[5], ClientRateLimitError)  # both keys out of quota past the deadline
+    assert server.audited == ["Primary"] * 2 + ["Secondary"] * 3  # no failed round-trips
+    stats = server.rate_limits.stats
+    assert stats["Primary"]["requests"] == 2 and stats["Primary"]["spilled"] == 3
+    assert stats["Secondary"]["requests"] == 3 and stats["Secondary"]["queue_depth"] == 0
+
+    # Reported to the user like a provider 429
+    assert _chat_error(results[5])[0] == 429
+
+
+def test_requests_queue_in_arrival_order_until_their_deadline():
+    limits = RateLimits(default_rpm=600)  # refills one request every 0.1s
+
+    async def scenario():
+        limits._bucket("Primary").requests = 0  # bucket just emptied
+        loop = asyncio.get_running_loop()
+        granted = []
+
+        async def request(name, timeout):
+            await limits.acquire("Primary", 100, loop.time() + timeout)
+            granted.append(name)
+
+        tasks = [asyncio.ensure_future(request(f"r{i}", 1.0)) for i in range(3)]
+        await asyncio.sleep(0)
+        late = asyncio.ensure_future(request("late", 0.15))  # needs ~0.4s of refill
+        await asyncio.gather(*tasks)
+        with pytest.raises(ClientRateLimitError):
+            await late
+        return granted
+
+    granted = asyncio.run(scenario())
+    assert granted == ["r0", "r1", "r2"]
+    stats = limits.stats["Primary"]
+    assert stats["queued"] == 4 and stats["timeouts"] == 1 and stats["peak_queue_depth"] == 4
+    assert stats["queue_depth"] == 0
+    assert 250 <= stats["wait_ms"]["max"] < 500  # the third one waited for three refills
+
+
+def test_token_budget_and_unlimited_keys():
+    limits = RateLimits(default_tpm=1000, output_tokens=100)
+    assert limits.cost({"user_input": "x" * 400}) == len('{"user_input": "' + "x" * 400 + '"}') // 4 + 100
+
+    async def scenario():
+        assert limits.try_acquire("Primary", 600)
+        assert not limits.try_acquire("Primary", 600)  # 400 tokens left
+        assert limits.try_acquire("Primary", 300)
+        assert limits.choose(["Primary", "Secondary"], 300) == "Secondary"
+
+    asyncio.run(scenario())
+
+    unlimited = RateLimits(default_rpm=0, default_tpm=0)
+
+    async def burst():
+        for _ in range(1000):
+            assert unlimited.try_acquire("Primary", 10_000)
+
+    asyncio.run(burst())
+    assert unlimited.stats["Primary"]["requests"] == 1000 and unlimited.stats["Primary"]["queued"] == 0
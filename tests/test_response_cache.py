@@ -0,0 +1,105 @@
+import pytest
+import sys
+import os
+import asyncio
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.data_models import Message
+from backend.models.signatures import EducationSignature, MotivationSignature
+from backend.services.response_cache import ResponseCache
+
+
+def test_lru_ttl_and_signature_settings(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("backend.services.response_cache.time.monotonic", lambda: now[0])
+    cache = ResponseCache(signatures="*", exclude="MotivationSignature", ttl=10, max_size=2)
+    assert cache.enabled_for("EducationSignature") and not cache.enabled_for("MotivationSignature")
+    cache.configure("MotivationSignature", enabled=True)
+    assert cache.enabled_for("MotivationSignature")
+    assert not ResponseCache(signatures="").enabled_for("EducationSignature")  # opt-in
+
+    key = ResponseCache.key("Sig", "instructions", "model", {"b": 1, "a": "x"})
+    assert key == ResponseCache.key("Sig", "instructions", "model", {"a": "x", "b": 1})
+    assert key != ResponseCache.key("Sig", "instructions", "other-model", {"a": "x", "b": 1})
+
+    cache.put("k1", "v1")
+    cache.put("k2", "v2")
+    assert cache.get("k1") == "v1"  # k1 is now most recently used
+    cache.put("k3", "v3")
+    assert cache.get("k2") is None and cache.stats["evictions"] == 1
+    now[0] += 11
+    assert cache.get("k1") is None and cache.stats["expirations"] == 1
+
+
+def test_concurrent_identical_requests_share_one_call():
+    cache = ResponseCache(signatures="*")
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    async def scenario():
+        results = await asyncio.gather(*[cache.get_or_call("k", upstream) for _ in range(5)])
+        again = await cache.get_or_call("k", upstream)
+        errors = await asyncio.gather(*[cache.get_or_call("bad", failing) for _ in range(3)], return_exceptions=True)
+        return results, again, errors
+
+    results, again, errors = asyncio.run(scenario())
+    assert sorted(how for _, how in results) == ["coalesced"] * 4 + ["miss"]
+    assert again == ("answer", "hit")
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert len(calls) == 2  # one upstream call per key, even for the failure
+    assert "bad" not in cache._entries
+
+
+def test_cancelled_leader_hands_the_call_to_a_waiter():
+    cache = ResponseCache(signatures="*")
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def scenario():
+        leader = asyncio.ensure_future(cache.get_or_call("k", upstream))
+        await asyncio.sleep(0)  # the leader's call is in flight
+        waiters = [asyncio.ensure_future(cache.get_or_call("k", upstream)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()  # e.g. its client disconnected
+        results = await asyncio.gather(*waiters)
+        return leader, results
+
+    leader, results = asyncio.run(scenario())
+    assert leader.cancelled()
+    assert [value for value, _ in results] == ["answer"] * 3  # the waiters are not cancelled with it
+    assert sorted(how for _, how in results) == ["coalesced"] * 2 + ["miss"]
+    assert len(calls) == 2 and cache.stats["cancelled_leaders"] == 1
+
+
+def test_predict_serves_repeats_from_cache(make_server, make_state):
+    state = make_state("cache_user", history=[Message(role="user", content="What is A1c?")])
+    predictor = MagicMock(return_value="prediction")
+    server = make_server({EducationSignature: predictor, MotivationSignature: predictor}, ("Fake",),
+                         response_cache=ResponseCache(signatures="*", exclude="MotivationSignature"))
+
+    async def scenario():
+        for _ in range(2):
+            assert await server.predict(EducationSignature, state, user_input="What is A1c?") == "prediction"
+        await server.predict(MotivationSignature, state, user_input="hi")
+        await server.predict(MotivationSignature, state, user_input="hi")
+
+    asyncio.run(scenario())
+    assert predictor.call_count == 3  # second Education call was a hit; Motivation is excluded
+    assert server.audited == ["Fake", "Response Cache", "Fake", "Fake"]
+    assert server.response_cache.stats["hits"] == 1
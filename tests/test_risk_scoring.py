@@ -0,0 +1,122 @@
+import pytest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.models.data_models import PatientProfile, Biomarkers, RiskLevel
+from backend.services import risk_scoring
+from backend.services.data_loader import DataLoader, parse_roster, patch_profile
+
+ROSTER_PATH = os.path.join(os.path.dirname(__file__), "..", "backend", "data", "PREVENT_Inform_Table_V2 (2).xlsx")
+
+
+def profile(sex="Male", family_history=False, risk_source=risk_scoring.MODEL_ID, **biomarkers):
+    values = dict(a1c=5.2, fbs=5.0, systolic_bp=118, diastolic_bp=75, ldl=2.5, hdl=1.5, triglycerides=1.2,
+                  total_cholesterol=4.0, weight=63.58, height=170)  # BMI 22
+    values.update(biomarkers)
+    return PatientProfile(user_id="u1", name="Test", age=40, diabetes_risk_score=RiskLevel.LOW,
+                          risk_score_numeric=0, biomarkers=Biomarkers(**values), sex=sex,
+                          family_history=family_history, risk_source=risk_source)
+
+
+def test_bands_are_inclusive_at_each_cutoff():
+    scored = risk_scoring.score_arrays({
+        "fbs": np.array([5.5, 5.6, 7.2]), "bmi": np.array([24.9, 25.0, 30.0]),
+        "hdl": np.array([1.03, 1.28, 1.28]), "female": np.array([0, 1, 0]),
+        "family_history": np.array([0, 1, np.nan]), "triglycerides": np.array([1.69, 1.7, 2.5]),
+        "systolic_bp": np.array([129, 118, 130]), "diastolic_bp": np.array([84, 85, 70]),
+    })
+    assert scored["fasting_glucose"].tolist() == [0, 10, 10]  # the diabetes range scores like 5.6-6.9
+    assert scored["bmi"].tolist() == [0, 2, 5]
+    assert scored["low_hdl"].tolist() == [0, 5, 0]  # 1.28 is low for a woman only
+    assert scored["parental_history"].tolist() == [0, 3, 0]
+    assert scored["triglycerides"].tolist() == [0, 3, 3]
+    assert scored["blood_pressure"].tolist() == [0, 2, 2]  # systolic or diastolic
+    assert scored["points"].tolist() == [0, 25, 20]
+    assert scored["score"].tolist() == [3, 35, 18]  # the paper's 8-year risk, %
+
+
+def test_point_totals_map_to_the_published_risk_table():
+    # Wilson et al. 2007, simple clinical model: <= 10 points 3%, then 4, 4, 5, 6, 7, 9, 11, 13, 15, 18, 21, 25, 29, 33, >= 25 35%
+    published = {10: 3, 11: 4, 12: 4, 13: 5, 14: 6, 15: 7, 16: 9, 17: 11, 18: 13, 19: 15,
+                 20: 18, 21: 21, 22: 25, 23: 29, 24: 33, 25: 35, 28: 35}
+    points = np.array(list(published))
+    scores = risk_scoring.RISK_BY_POINTS[np.clip(points - risk_scoring.RISK_FLOOR_POINTS, 0, None).clip(max=15)]
+    assert dict(zip(points.tolist(), scores.tolist())) == published
+    assert risk_scoring.MAX_POINTS == 28
+
+
+def test_missing_values_score_nothing():
+    scored = risk_scoring.score_arrays({name: np.array([0.0, np.nan]) for name in risk_scoring.INPUTS})
+    assert scored["points"].tolist() == [0, 0]  # notably hdl: a blank cell is not "low HDL"
+    assert scored["score"].tolist() == [3, 3]
+
+    result = risk_scoring.breakdown(profile(sex=None, family_history=None, triglycerides=0))
+    assert result["missing"] == ["parental_history", "triglycerides", "sex"]  # the score is a lower bound
+    assert "parental_history" not in risk_scoring.breakdown(profile())["missing"]  # "no" is an answer
+
+
+def test_known_roster_patients_land_in_their_published_bands():
+    profiles = DataLoader(ROSTER_PATH, cache_dir="").load_data()
+    # (sex, BMI, FBS, HDL, TG, BP) -> points -> 8-year risk %
+    expected = {
+        "1001": 3,   # man, BMI 34.9 (5)                                             5 points
+        "1002": 4,   # woman, BMI 50.8 (5), HDL 1.2 < 1.29 (5), BP 140/83 (2)        12 points
+        "1003": 7,   # man, FBS 5.6 (10), BMI 36.4 (5)                               15 points
+        "1005": 3,   # woman, BMI 28.1 (2), HDL 1.1 (5)                              7 points
+        "1007": 18,  # man, FBS 6.0 (10), BMI 31.5 (5), TG 1.9 (3), BP 140/81 (2)    20 points
+    }
+    assert {user_id: profiles[user_id].risk_score_numeric for user_id in expected} == expected
+    # The sheet's own level is kept, with the model it came from; the score does not downgrade it
+    first = profiles["1001"]
+    assert (first.diabetes_risk_score, first.risk_source) == (RiskLevel.HIGH, "PREVENT_Risk_V22")
+    result = risk_scoring.breakdown(first)
+    assert (result["level"], result["level_source"], result["model_level"]) == ("High", "PREVENT_Risk_V22", "Low")
+    assert result["not_in_model"] == {"a1c": 6.0, "age": 49}
+
+
+def test_levels_are_derived_only_where_the_sheet_has_none():
+    columns = parse_roster(pd.DataFrame({
+        "PREVENT_ID": [1, 2], "Age": [50, 50], "Years to DM": [5, 5], "Blood Pressure": ["140/90", "140/90"],
+        "BMI": [31.0, 31.0], "FBS": [6.0, 6.0], "HDL": [1.5, 1.5], "TG": [1.0, 1.0], "Sex": ["Male", "Male"],
+        "Diabetes Risk": ["Low", None], "Risk_Model_Name_&_VersionDate": ["PREVENT_Risk_V22", None],
+    }))
+    assert columns["risk_score_numeric"].tolist() == [11, 11]  # 10 + 5 + 2 = 17 points
+    assert columns["risk_level"].tolist() == ["Low", "High"]  # the sheet's level is not overridden
+    assert columns["risk_source"].tolist() == ["PREVENT_Risk_V22", risk_scoring.MODEL_ID]
+
+
+def test_single_patient_matches_the_batch():
+    healthy = profile()
+    at_risk = profile(sex="Female", family_history=True, fbs=6.3, systolic_bp=142, hdl=1.2, triglycerides=2.0,
+                      weight=92.5)  # BMI 32
+    assert risk_scoring.breakdown(healthy)["score"] == 3
+
+    result = risk_scoring.breakdown(at_risk)
+    assert result["factors"]["fasting_glucose"] == {"values": {"fbs": 6.3}, "points": 10, "max_points": 10}
+    assert result["factors"]["low_hdl"]["values"] == {"hdl": 1.2, "sex": "Female"}
+    assert result["points"] == 10 + 5 + 5 + 3 + 3 + 2
+    assert (result["score"], result["model_level"], result["missing"]) == (35, RiskLevel.HIGH.value, [])
+
+    batch = risk_scoring.score_arrays({name: np.array([value]) for name, value in risk_scoring.profile_inputs(at_risk).items()})
+    assert risk_scoring.rescore(at_risk) == int(batch["score"][0]) == result["score"]
+    assert at_risk.risk_score_numeric == result["score"]
+
+
+def test_patched_biomarkers_rescore_only_that_profile():
+    session, other = profile(), profile()
+    risk_scoring.rescore(session), risk_scoring.rescore(other)
+    patch_profile(session, profile(fbs=6.0), ["fbs"])
+    assert session.biomarkers.fbs == 6.0 and session.risk_score_numeric == 3  # 10 points: still the floor
+    patch_profile(session, profile(weight=92.5), ["weight"])
+    assert session.risk_score_numeric == 7 and other.risk_score_numeric == 3  # 15 points
+    assert session.diabetes_risk_score == RiskLevel.MODERATE  # a model-derived level follows the score
+
+    sheet_level = profile(risk_source="PREVENT_Risk_V22")
+    patch_profile(sheet_level, profile(fbs=6.0, weight=92.5), ["fbs", "weight"])
+    assert sheet_level.risk_score_numeric == 7 and sheet_level.diabetes_risk_score == RiskLevel.LOW  # the sheet's stays
@@ -0,0 +1,103 @@
+import pytest
+import sys
+import os
+import asyncio
+import threading
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.roster_registry import RosterRegistry, get_roster_registry
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setenv("ANTIGRAVITY_ROSTER_CACHE_DIR", str(tmp_path / "cache"))
+    return RosterRegistry()
+
+
+def test_concurrent_first_callers_share_one_load(registry, monkeypatch):
+    calls = []
+    original = registry.loader.load_data
+
+    def slow_load():
+        if not registry.loader._cache:
+            calls.append(threading.get_ident())
+            time.sleep(0.05)
+        return original()
+
+    monkeypatch.setattr(registry.loader, "load_data", slow_load)
+
+    async def scenario():
+        return await asyncio.gather(*[registry.load_async() for _ in range(8)])
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert registry.stats["loads"] == 1
+    assert registry.stats["patients"] == 88
+    assert registry.stats["load_seconds"] >= 0.05
+    assert registry.stats["columns_bytes"] > 0
+
+
+def test_lookups_go_through_the_shared_roster(registry):
+    assert not registry.loaded
+    assert registry.get_profile("1001").name == "Abishek"
+    assert registry.loader._name_index is not None  # built with the roster, not on the first name lookup
+    assert registry.get_patient_by_name("abishek").user_id == "1001"
+    assert registry.search_patients("abish")["results"][0]["user_id"] == "1001"
+    assert registry.stats["loads"] == 1
+
+
+def test_process_wide_registry_is_a_singleton():
+    assert get_roster_registry() is get_roster_registry()
+
+
+def test_reload_swaps_only_the_changed_profiles(tmp_path, monkeypatch):
+    import pandas as pd
+    monkeypatch.setenv("ANTIGRAVITY_ROSTER_CACHE_DIR", str(tmp_path / "cache"))
+    sheet = str(tmp_path / "roster.xlsx")
+    df = pd.DataFrame({
+        "PREVENT_ID": [1001, 1002, 1003],
+        "Name": ["Abishek", "Alessia", "Alireza"],
+        "Age": [49, 48, 62],
+        "Blood Pressure": ["122/80", "140/83", "120/80"],
+        "A1c": [6.0, 5.7, 6.3],
+        "Diabetes Risk": ["High", "Low", "Moderate"],
+    })
+    df.to_excel(sheet, index=False)
+    registry = RosterRegistry(sheet)
+    before = registry.load()
+    session_profile = before["1001"].model_copy(deep=True)
+    session_profile.name = "Abi"  # e.g. corrected during intake; not a roster column that changes
+    unchanged = before["1003"]
+
+    assert registry.reload() is None  # sheet untouched
+
+    df.loc[0, "A1c"] = 6.4
+    df = pd.concat([df[df["PREVENT_ID"] != 1002], pd.DataFrame({
+        "PREVENT_ID": [1004], "Name": ["Aly"], "Age": [30], "Blood Pressure": ["110/70"],
+        "A1c": [5.2], "Diabetes Risk": ["Low"],
+    })])
+    df.to_excel(sheet, index=False)
+    os.utime(sheet, ns=(2_000_000_000, 2_000_000_000))  # distinct mtime even on coarse filesystems
+
+    diff = registry.reload()
+    assert diff == {"added": ["1004"], "changed": {"1001": ["a1c"]}, "removed": ["1002"]}
+    after = registry.load()
+    assert list(after) == ["1001", "1003", "1004"]
+    assert registry.loader._name_index is not None  # names changed: rebuilt before the swap
+    assert after["1003"] is unchanged  # profiles already handed out survive unchanged rows
+    assert after["1001"].biomarkers.a1c == 6.4 and session_profile.biomarkers.a1c == 6.0
+    assert registry.get_patient_by_name("aly").user_id == "1004"
+    assert registry.stats["reloads"] == 1 and registry.stats["last_reload"]["changed"] == 1
+
+    # Sessions persisted before the reload only pick up the changed columns
+    assert registry.patch_profile("1001", session_profile)
+    assert session_profile.biomarkers.a1c == 6.4 and session_profile.name == "Abi"
+    # Once per reload: later loads of the saved state keep the session's own edits
+    session_profile.biomarkers.a1c = 6.1
+    assert not registry.patch_profile("1001", session_profile)
+    assert session_profile.biomarkers.a1c == 6.1 and not registry._reloaded_columns
+    assert not registry.patch_profile("1003", unchanged.model_copy(deep=True))
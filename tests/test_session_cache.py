@@ -0,0 +1,70 @@
+import pytest
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.session_cache import SessionCache
+from backend.services.persistence import AsyncPersistence
+from tests.test_persistence import make_state
+
+
+def test_lru_eviction_keeps_size_bounded():
+    cache = SessionCache(max_size=3, idle_ttl=0)
+    for i in range(3):
+        cache.put(f"u{i}", make_state(f"u{i}"))
+    cache.get("u0")  # u0 becomes most recently used
+    cache.put("u3", make_state("u3"))
+
+    assert len(cache) == 3
+    assert "u1" not in cache
+    assert "u0" in cache
+    assert cache.stats["evictions"] == 1
+
+
+def test_idle_ttl_expires_sessions(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("backend.services.session_cache.time.monotonic", lambda: now[0])
+    cache = SessionCache(max_size=10, idle_ttl=60)
+    cache.put("idle", make_state("idle"))
+    now[0] += 30
+    cache.put("active", make_state("active"))
+    now[0] += 45
+
+    assert cache.get("idle") is None
+    assert cache.get("active") is not None
+    assert cache.stats["expirations"] == 1
+
+
+def test_hit_and_miss_counters():
+    cache = SessionCache(max_size=10, idle_ttl=0)
+    cache.put("u1", make_state("u1"))
+    cache.get("u1")
+    cache.get("u1")
+    cache.get("nobody")
+
+    stats = cache.stats
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_rate"] == pytest.approx(0.6667, abs=1e-4)
+
+
+def test_recent_user_ids_for_prewarm(tmp_path):
+    persistence = AsyncPersistence()
+    persistence.db_path = str(tmp_path / "prewarm_test.db")
+
+    async def scenario():
+        await persistence.init_db()
+        for i in range(5):
+            await persistence.save_state(f"u{i}", make_state(f"u{i}"))
+
+        async def age(db):
+            await db.execute("UPDATE user_states SET updated_at = datetime('now', '-' || substr(user_id, 2) || ' hours')")
+
+        await persistence.pool.write(age)
+        recent = await persistence.recent_user_ids(3)
+        await persistence.close()
+        return recent
+
+    assert asyncio.run(scenario()) == ["u0", "u1", "u2"]
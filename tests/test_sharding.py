@@ -0,0 +1,110 @@
+import pytest
+import sys
+import os
+import asyncio
+import sqlite3
+import subprocess
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.persistence import AsyncPersistence, shard_index, shard_paths
+from backend.services.resharding import reshard
+from tests.test_persistence import make_state
+
+
+def make_persistence(db_path, shards):
+    p = AsyncPersistence()
+    p.db_path = db_path
+    p.shards = shards
+    return p
+
+
+def test_shard_choice_is_stable_and_spread():
+    assert shard_paths("/tmp/a.db", 1) == ["/tmp/a.db"]
+    assert shard_paths("/tmp/a.db", 2) == ["/tmp/a.shard0-of-2.db", "/tmp/a.shard1-of-2.db"]
+    assert shard_index("user_42", 4) == shard_index("user_42", 4)
+    counts = [0] * 4
+    for i in range(1000):
+        counts[shard_index(f"user_{i}", 4)] += 1
+    assert min(counts) > 150
+
+
+def test_sharded_saves_loads_and_fan_out(tmp_path):
+    persistence = make_persistence(str(tmp_path / "sharded.db"), 4)
+
+    async def scenario():
+        await persistence.init_db()
+        await persistence.save_states({f"u{i}": make_state(f"u{i}", messages=i % 5) for i in range(40)})
+        loaded = [await persistence.load_state(f"u{i}") for i in range(40)]
+        conversations = await persistence.list_conversations(limit=100)
+        summary = await persistence.shard_summary()
+        await persistence.close()
+        return loaded, conversations, summary
+
+    loaded, conversations, summary = asyncio.run(scenario())
+    assert [len(s.conversation_history) for s in loaded] == [i % 5 for i in range(40)]
+    assert len(conversations) == 40
+    assert sum(s["users"] for s in summary) == 40
+    assert all(s["users"] > 0 for s in summary)
+
+
+def test_reshard_moves_users_and_rechains_audit_log(tmp_path):
+    db_path = str(tmp_path / "reshard.db")
+    source = make_persistence(db_path, 1)
+
+    async def seed():
+        await source.init_db()
+        await source.save_states({f"u{i}": make_state(f"u{i}", messages=3) for i in range(30)})
+        await source.log_interactions([
+            (f"u{i}", "coaching", "CoachingSignature", "{}", "{}", "model", "provider", 1.0, f"2026-01-01 00:00:{i:02d}")
+            for i in range(30)
+        ])
+        await source.close()
+
+    asyncio.run(seed())
+    report = asyncio.run(reshard(db_path, 1, 3, batch_size=7))
+    assert (report["users"], report["messages"], report["llm_interactions"]) == (30, 90, 30)
+    assert report["target_chain"]["verified"] == 30 and report["target_chain"]["broken_at"] is None
+
+    target = make_persistence(db_path, 3)
+
+    async def check():
+        loaded = [await target.load_state(f"u{i}") for i in range(30)]
+        await target.close()
+        return loaded
+
+    assert all(len(state.conversation_history) == 3 for state in asyncio.run(check()))
+    with pytest.raises(RuntimeError):
+        asyncio.run(reshard(db_path, 1, 3))
+
+
+def test_reshard_refuses_a_tampered_source_and_keeps_it(tmp_path):
+    db_path = str(tmp_path / "tampered.db")
+    source = make_persistence(db_path, 1)
+
+    async def seed():
+        await source.init_db()
+        await source.save_states({f"u{i}": make_state(f"u{i}") for i in range(5)})
+        await source.log_interactions([
+            (f"u{i}", "coaching", "CoachingSignature", "{}", "{}", "model", "provider", 1.0, "2026-01-01 00:00:00")
+            for i in range(5)
+        ])
+        await source.close()
+
+    asyncio.run(seed())
+    with sqlite3.connect(db_path) as db:
+        db.execute("UPDATE llm_interactions SET response_output = 'edited' WHERE id = 3")
+
+    script = os.path.join(os.path.dirname(__file__), "..", "scripts", "reshard.py")
+    run = lambda *flags: subprocess.run([sys.executable, script, "--db", db_path, "--from", "1", "--to", "2", *flags],
+                                        capture_output=True, text=True)
+    refused = run("--delete-source")
+    assert refused.returncode == 1 and "broken at record 3" in refused.stderr
+    assert not any(os.path.exists(path) for path in shard_paths(db_path, 2))  # nothing was copied
+
+    forced = run("--force", "--delete-source")
+    assert forced.returncode == 1  # copied on request, but still reported as a failure
+    assert os.path.exists(db_path)  # the only evidence of the tampering is never deleted
+    with sqlite3.connect(db_path) as db:
+        assert db.execute("SELECT response_output FROM llm_interactions WHERE id = 3").fetchone() == ("edited",)
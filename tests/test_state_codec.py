@@ -0,0 +1,49 @@
+import pytest
+import sys
+import os
+import json
+from typing import List
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services import state_codec
+from backend.models.data_models import Message, PatientProfile
+from tests.test_persistence import make_state
+
+
+def test_roundtrip_typed_and_plain_payloads():
+    state = make_state("u1", messages=40)
+    profile_raw = state_codec.encode(state.patient_profile, PatientProfile)
+    history_raw = state_codec.encode(state.conversation_history, List[Message])
+    context_raw = state_codec.encode({"importance_rating": 7.0, "barriers": ["time"]})
+
+    assert state_codec.is_encoded(profile_raw)
+    assert state_codec.decode(profile_raw, PatientProfile) == state.patient_profile
+    assert state_codec.decode(history_raw, List[Message]) == state.conversation_history
+    assert state_codec.decode(context_raw) == {"importance_rating": 7.0, "barriers": ["time"]}
+
+
+def test_large_payloads_are_compressed():
+    history = make_state("u1", messages=500).conversation_history
+    compressed = state_codec.encode(history, List[Message], compress_threshold=1024)
+    plain = state_codec.encode(history, List[Message], compress_threshold=-1)
+
+    assert compressed[3] & state_codec.FLAG_ZLIB
+    assert not plain[3] & state_codec.FLAG_ZLIB
+    assert len(compressed) < len(plain)
+    assert state_codec.decode(compressed, List[Message]) == history
+
+
+def test_legacy_json_rows_decode_transparently():
+    state = make_state("u1")
+    assert state_codec.decode(state.patient_profile.model_dump_json(), PatientProfile) == state.patient_profile
+    assert state_codec.decode(json.dumps({"a": 1})) == {"a": 1}
+    assert state_codec.decode(None) is None
+
+
+def test_rejects_newer_payload_versions():
+    raw = bytearray(state_codec.encode({"a": 1}))
+    raw[2] = state_codec.VERSION + 1
+    with pytest.raises(ValueError):
+        state_codec.decode(bytes(raw))
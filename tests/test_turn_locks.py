@@ -0,0 +1,61 @@
+import pytest
+import sys
+import os
+import asyncio
+import random
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.turn_locks import UserTurnLocks
+
+
+def test_same_user_turns_run_in_arrival_order():
+    locks = UserTurnLocks()
+    log = []
+
+    async def turn(user_id, n):
+        async with locks.hold(user_id):
+            log.append((user_id, n, "start"))
+            await asyncio.sleep(random.uniform(0, 0.002))
+            log.append((user_id, n, "end"))
+
+    async def scenario():
+        await asyncio.gather(*[turn("u1", n) for n in range(20)])
+
+    asyncio.run(scenario())
+    assert log == [("u1", n, phase) for n in range(20) for phase in ("start", "end")]
+
+
+def test_different_users_run_in_parallel():
+    locks = UserTurnLocks()
+    inside = []
+    peak = [0]
+
+    async def turn(user_id):
+        async with locks.hold(user_id):
+            inside.append(user_id)
+            peak[0] = max(peak[0], len(inside))
+            await asyncio.sleep(0.01)
+            inside.remove(user_id)
+
+    async def scenario():
+        await asyncio.gather(*[turn(f"u{i}") for i in range(10)])
+
+    asyncio.run(scenario())
+    assert peak[0] == 10
+
+
+def test_idle_user_locks_are_reclaimed():
+    locks = UserTurnLocks()
+
+    async def scenario():
+        async def turn(user_id):
+            async with locks.hold(user_id):
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*[turn(f"u{i % 50}") for i in range(500)])
+
+    asyncio.run(scenario())
+    assert len(locks) == 0
+    assert locks.stats["turns"] == 500
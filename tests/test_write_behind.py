@@ -0,0 +1,111 @@
+import pytest
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.persistence import AsyncPersistence
+from backend.services.write_behind import StateWriteBuffer
+from backend.models.data_models import Message
+from tests.test_persistence import make_state
+
+
+@pytest.fixture
+def persistence(tmp_path):
+    p = AsyncPersistence()
+    p.db_path = str(tmp_path / "write_behind_test.db")
+    return p
+
+
+def test_coalesces_repeated_saves_for_same_user(persistence):
+    async def scenario():
+        await persistence.init_db()
+        buffer = StateWriteBuffer(persistence, max_batch=1000, flush_interval=60)
+        state = make_state("u1", messages=0)
+        for i in range(10):
+            state.conversation_history.append(Message(role="user", content=f"turn {i}"))
+            buffer.mark_dirty("u1", state)
+        assert buffer.pending("u1") is state
+        await buffer.close()
+        loaded = await persistence.load_state("u1")
+        await persistence.close()
+        return buffer.stats, loaded
+
+    stats, loaded = asyncio.run(scenario())
+    assert stats["coalesced"] == 9
+    assert stats["states_written"] == 1
+    assert len(loaded.conversation_history) == 10
+
+
+def test_size_trigger_flushes_many_users_in_one_batch(persistence):
+    async def scenario():
+        await persistence.init_db()
+        buffer = StateWriteBuffer(persistence, max_batch=25, flush_interval=60)
+        for i in range(25):
+            buffer.mark_dirty(f"u{i}", make_state(f"u{i}"))
+        for _ in range(50):
+            if buffer.stats["flushes"]:
+                break
+            await asyncio.sleep(0.01)
+        stats = dict(buffer.stats)
+        await buffer.close()
+        await persistence.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["flushes"] == 1
+    assert stats["states_written"] == 25
+
+
+def test_latest_state_wins_across_flushes(persistence):
+    async def scenario():
+        await persistence.init_db()
+        buffer = StateWriteBuffer(persistence, max_batch=1000, flush_interval=0.005)
+        state = make_state("u1", messages=0)
+        for i in range(30):
+            state.current_agent = f"agent_{i}"
+            buffer.mark_dirty("u1", state)
+            await asyncio.sleep(0.001)
+        await buffer.close()
+        loaded = await persistence.load_state("u1")
+        await persistence.close()
+        return loaded
+
+    assert asyncio.run(scenario()).current_agent == "agent_29"
+
+
+def test_state_stays_pending_until_its_save_commits(persistence):
+    class SlowSaves:
+        def __init__(self):
+            self.release = asyncio.Event()
+            self.fail = True
+
+        async def save_states(self, batch):
+            await self.release.wait()
+            if self.fail:
+                raise RuntimeError("database is locked")
+            await persistence.save_states(batch)
+
+    async def scenario():
+        await persistence.init_db()
+        slow = SlowSaves()
+        buffer = StateWriteBuffer(slow, max_batch=1000, flush_interval=60)
+        state = make_state("u1")
+        buffer.mark_dirty("u1", state)
+        flushing = asyncio.ensure_future(buffer.flush())
+        await asyncio.sleep(0.01)
+        in_flight = buffer.pending("u1")  # e.g. the session was evicted from the cache mid-flush
+        slow.release.set()
+        await flushing
+        after_failure = buffer.pending("u1")
+        slow.fail = False
+        await buffer.close()
+        await persistence.close()
+        return state, in_flight, after_failure, buffer.pending("u1")
+
+    state, in_flight, after_failure, after_commit = asyncio.run(scenario())
+    assert in_flight is state
+    assert after_failure is state  # back in the dirty set for the next flush
+    assert after_commit is None